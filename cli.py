@@ -0,0 +1,6 @@
+import sys
+
+from src.main.python.ligne_de_commande import main
+
+if __name__ == "__main__":
+    sys.exit(main())
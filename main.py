@@ -1,12 +1,15 @@
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 import os
+import queue
 import shutil
+import threading
 from pathlib import Path
 
-from src.main.python.algo_affectation_classement import tri_df_etudiant_semestre_ponderation, traitement_scenario_hybride
-from src.main.python.conversion_df_brute import conversion_df_brute_pour_affectation
-from src.main.python.excel_en_dataframe import charger_excels
+from src.main.python.algo_affectation_classement import tri_df_etudiant_semestre_ponderation, traitement_scenario_hybride, AffectationAnnulee
+from src.main.python.cache_entrees import charger_entrees_converties
+from src.main.python.export_resultats import exporter_resultats
+from src.main.python.journalisation import configurer_journalisation
 
 import sys
 
@@ -16,13 +19,22 @@ if getattr(sys, 'frozen', False):
 else:
     BASE_DIR = Path(__file__).resolve().parent / "src" / "main"
 
+# Cache des entrées converties, hors du dossier data qui est vidé au démarrage
+DOSSIER_CACHE = Path(os.environ.get("LOCALAPPDATA") or Path.home() / ".cache") / "algo_affectation" / "cache_entrees"
+
+# Point de reprise de l'affectation en cours : un traitement interrompu (annulation, fermeture) reprend là où il s'était arrêté
+FICHIER_REPRISE = DOSSIER_CACHE.parent / "reprise_affectation.npz"
+
+# Logs de l'algorithme (log.txt et log_debug.txt dans le dossier courant)
+configurer_journalisation()
+
 # App setup
 ctk.set_appearance_mode("System")
 #ctk.set_default_color_theme("blue")
 
 app = ctk.CTk()
 app.title("Algorithme D'affectation")
-app.geometry("800x500")
+app.geometry("800x560")
 app.resizable(False, False)
 
 # Nettoyage du dossier data au démarrage
@@ -154,17 +166,77 @@ label_info = ctk.CTkLabel(
 label_info.pack(pady=10)
 
 # Traitement
-def traitement_personnalise():
+# Le traitement tourne dans un thread : il communique avec l'interface par cette file, lue par sonder_traitement via app.after
+file_traitement = queue.Queue()
+annulation = threading.Event()
+INTERVALLE_SONDAGE_MS = 100
+
+def traitement_personnalise(alpha, limite_ordre, rappel_progression=None, evenement_annulation=None):
+    dataframes_convertis = charger_entrees_converties(str(BASE_DIR / "data"), str(DOSSIER_CACHE))
+    df_univ = dataframes_convertis["universites_partenaires"]
+    df_etu = dataframes_convertis["choix_etudiants"]
+    df_etu = tri_df_etudiant_semestre_ponderation(df_etu, alpha=alpha)
+    df_resultat = traitement_scenario_hybride(df_univ, df_etu, limite_ordre, "Taux",
+                                              rappel_progression=rappel_progression, evenement_annulation=evenement_annulation,
+                                              fichier_reprise=str(FICHIER_REPRISE))
+    return df_resultat
+
+def traitement_en_arriere_plan(alpha, limite_ordre):
+    # Aucun appel à tkinter ici : tout passe par la file
+    try:
+        df_resultat = traitement_personnalise(
+            alpha, limite_ordre,
+            rappel_progression=lambda semestre, traites, total: file_traitement.put(("progression", semestre, traites, total)),
+            evenement_annulation=annulation,
+        )
+        file_traitement.put(("termine", df_resultat))
+    except AffectationAnnulee:
+        file_traitement.put(("annule",))
+    except Exception as e:
+        file_traitement.put(("erreur", str(e)))
+
+def fin_traitement():
+    bouton_annuler.configure(state="disabled")
+    bouton_traiter.configure(state="normal")
+
+def sonder_traitement():
+    while True:
+        try:
+            message = file_traitement.get_nowait()
+        except queue.Empty:
+            app.after(INTERVALLE_SONDAGE_MS, sonder_traitement)
+            return
+
+        if message[0] == "progression":
+            _, semestre, traites, total = message
+            barre_progression.set(traites / total if total else 1.0)
+            label_progression.configure(text=f"{semestre} : {traites} / {total} étudiants traités")
+        elif message[0] == "annule":
+            fin_traitement()
+            label_progression.configure(text="Traitement annulé")
+            return
+        elif message[0] == "erreur":
+            fin_traitement()
+            label_progression.configure(text="")
+            messagebox.showerror("Erreur", message[1])
+            return
+        else:
+            fin_traitement()
+            label_progression.configure(text="Traitement terminé")
+            enregistrer_resultat(message[1])
+            return
+
+def enregistrer_resultat(df_resultat):
     try:
-        alpha = alpha_var.get()
-        limite_ordre = limite_ordre_var.get()
-        dataframes = charger_excels(str(BASE_DIR / "data"))
-        dataframes_convertis = conversion_df_brute_pour_affectation(dataframes)
-        df_univ = dataframes_convertis["universites_partenaires"]
-        df_etu = dataframes_convertis["choix_etudiants"]
-        df_etu = tri_df_etudiant_semestre_ponderation(df_etu, alpha=alpha)
-        df_resultat = traitement_scenario_hybride(df_univ, df_etu, limite_ordre, "Taux")
-        return df_resultat
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Fichier Excel", "*.xlsx"), ("Fichier CSV", "*.csv"), ("Fichier Parquet", "*.parquet")]
+        )
+        if save_path:
+            # Colonnes séparées par des virgules, toutes (sauf les colonnes d'aide au tri) si le champ est vide
+            colonnes = [colonne.strip() for colonne in champ_colonnes.get().split(",") if colonne.strip()] or None
+            exporter_resultats(df_resultat, save_path, colonnes=colonnes, listes_par_universite=listes_var.get())
+            messagebox.showinfo("Succès", f"Fichier généré :\n{save_path}")
     except Exception as e:
         messagebox.showerror("Erreur", str(e))
 
@@ -182,22 +254,51 @@ def traiter():
             shutil.copy(chemin_source, chemin_copie)
             chemins_copies.append(str(chemin_copie))
 
-        df_resultat = traitement_personnalise()
-
-        save_path = filedialog.asksaveasfilename(
-            defaultextension=".xlsx",
-            filetypes=[("Fichier Excel", "*.xlsx")]
-        )
-        if save_path:
-            df_resultat.to_excel(save_path, index=False)
-            messagebox.showinfo("Succès", f"Fichier généré :\n{save_path}")
-
     except Exception as e:
         messagebox.showerror("Erreur", str(e))
+        return
+
+    # Les variables tkinter sont lues ici, dans le thread de l'interface
+    annulation.clear()
+    barre_progression.set(0)
+    label_progression.configure(text="Chargement des fichiers...")
+    bouton_traiter.configure(state="disabled")
+    bouton_annuler.configure(state="normal")
+    threading.Thread(target=traitement_en_arriere_plan, args=(alpha_var.get(), limite_ordre_var.get()), daemon=True).start()
+    app.after(INTERVALLE_SONDAGE_MS, sonder_traitement)
+
+def annuler():
+    annulation.set()
+    bouton_annuler.configure(state="disabled")
+    label_progression.configure(text="Annulation en cours...")
+
+# Option d'export des listes d'étudiants par université
+listes_var = ctk.BooleanVar(value=False)
+case_listes = ctk.CTkCheckBox(app, text="Exporter aussi la liste des étudiants de chaque université", variable=listes_var)
+case_listes.pack(pady=(10, 0))
+
+# Colonnes exportées
+champ_colonnes = ctk.CTkEntry(app, width=500, placeholder_text="Colonnes à exporter, séparées par des virgules (toutes si vide)")
+champ_colonnes.pack(pady=(10, 0))
 
 # Bouton traiter
-bouton_traiter = ctk.CTkButton(app, text="Traiter les fichiers", command=traiter, state="disabled")
-bouton_traiter.pack(pady=30)
+frame_traitement = ctk.CTkFrame(app, fg_color="transparent")
+frame_traitement.pack(pady=(20, 5))
+
+bouton_traiter = ctk.CTkButton(frame_traitement, text="Traiter les fichiers", command=traiter, state="disabled")
+bouton_traiter.pack(side="left", padx=5)
+
+# Bouton d'annulation, actif pendant le traitement
+bouton_annuler = ctk.CTkButton(frame_traitement, text="Annuler", command=annuler, state="disabled")
+bouton_annuler.pack(side="left", padx=5)
+
+# Progression du traitement
+barre_progression = ctk.CTkProgressBar(app)
+barre_progression.set(0)
+barre_progression.pack(padx=20, fill="x")
+
+label_progression = ctk.CTkLabel(app, text="", text_color="gray")
+label_progression.pack()
 
 # Lancement de l'app
 app.mainloop()
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.benchmark.outils_benchmark import FICHIER_REFERENCES, SEUIL_REGRESSION, TAILLES
+
+_resultats = {}
+
+
+def pytest_addoption(parser):
+    groupe = parser.getgroup("benchmark", "Benchmarks de l'affectation")
+    groupe.addoption("--benchmark", action="store_true", help="Lance les benchmarks et échoue en cas de régression par rapport aux références")
+    groupe.addoption("--benchmark-enregistrer", action="store_true", help="Enregistre les mesures comme nouvelles références au lieu de comparer")
+    groupe.addoption("--benchmark-seuil", type=float, default=SEUIL_REGRESSION, help="Ratio mesure / référence toléré (défaut : %(default)s)")
+    groupe.addoption("--benchmark-tailles", type=int, nargs="+", default=TAILLES, help="Nombres d'étudiants à mesurer")
+    groupe.addoption("--benchmark-references", default=FICHIER_REFERENCES, help="Fichier JSON des références")
+
+
+def pytest_collection_modifyitems(config, items):
+    dossier = os.path.dirname(os.path.abspath(__file__))
+    items = [item for item in items if str(item.path).startswith(dossier)]
+    if config.getoption("--benchmark") or config.getoption("--benchmark-enregistrer"):
+        tailles = set(config.getoption("--benchmark-tailles"))
+        a_ignorer = pytest.mark.skip(reason="taille non demandée (--benchmark-tailles)")
+        for item in items:
+            taille = getattr(item, "callspec", None) and item.callspec.params.get("nb_etudiants")
+            if taille and taille not in tailles:
+                item.add_marker(a_ignorer)
+        return
+    a_ignorer = pytest.mark.skip(reason="benchmarks lancés uniquement avec --benchmark ou --benchmark-enregistrer")
+    for item in items:
+        item.add_marker(a_ignorer)
+
+
+@pytest.fixture
+def resultats_benchmark():
+    return _resultats
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not _resultats:
+        return
+    terminalreporter.section("benchmarks")
+    for nom, mesure in sorted(_resultats.items()):
+        terminalreporter.write_line(f"{nom:<60} {mesure['temps_s']:>10.3f} s {mesure['pic_memoire_mo']:>10.1f} Mo")
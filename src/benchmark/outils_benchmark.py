@@ -0,0 +1,81 @@
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.main.python.generation_synthetique import generer_df_choix_etudiants_vectorise, generer_df_univ_synthetique
+
+TAILLES = [150, 1_000, 10_000, 100_000]
+
+# Nombre de partenaires du catalogue fictif, proche de celui de l'école
+NB_PARTENAIRES = 300
+
+# Taux de ralentissement (ou de hausse de mémoire) toléré par rapport à la référence avant d'échouer
+SEUIL_REGRESSION = 1.3
+
+# Écart absolu toujours toléré, pour que le bruit des mesures de quelques millisecondes ne soit pas pris pour une régression
+TOLERANCE_ABSOLUE = {"temps_s": 0.02, "pic_memoire_mo": 1.0}
+
+FICHIER_REFERENCES = os.path.join(os.path.dirname(__file__), "references.json")
+
+
+def donnees_fictives(nb_etudiants:int, graine:int=0) -> dict:
+    """Retourne le catalogue brut, le catalogue converti et une cohorte fictive triée par note, reproductibles par la graine."""
+    rng = np.random.default_rng(graine)
+    df_univ_brut = generer_df_univ_synthetique(NB_PARTENAIRES, rng)
+    df_univ = traitement_df_univ(df_univ_brut)
+    df_etudiants = generer_df_choix_etudiants_vectorise(nb_etudiants, df_univ, rng)
+    return {"univ_data_mobility": df_univ_brut, "universites_partenaires": df_univ, "choix_etudiants": df_etudiants}
+
+
+def mesurer(preparer, executer, repetitions:int=1) -> dict:
+    """Mesure executer(preparer()) : meilleur temps sur les répétitions, puis pic mémoire Python (tracemalloc) sur une exécution à part.
+
+    preparer est rappelé avant chaque exécution (hors mesure) pour que les fonctions qui modifient leurs entrées repartent des mêmes données.
+    """
+    temps = []
+    for _ in range(repetitions):
+        arguments = preparer()
+        gc.collect()
+        debut = time.perf_counter()
+        executer(*arguments)
+        temps.append(time.perf_counter() - debut)
+
+    arguments = preparer()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        executer(*arguments)
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"temps_s": min(temps), "pic_memoire_mo": pic / 2**20}
+
+
+def charger_references(chemin:str=FICHIER_REFERENCES) -> dict:
+    if not os.path.exists(chemin):
+        return {}
+    with open(chemin, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def enregistrer_references(resultats:dict, chemin:str=FICHIER_REFERENCES):
+    """Fusionne les résultats dans le fichier de références (les benchmarks non relancés gardent leur ancienne référence)."""
+    references = charger_references(chemin)
+    references.update(resultats)
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(references.items())), f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def regressions(mesure:dict, reference:dict, seuil:float=SEUIL_REGRESSION) -> list[str]:
+    """Retourne la description des grandeurs de la mesure qui dépassent seuil fois la référence (plus la tolérance absolue)."""
+    res = []
+    for grandeur, tolerance in TOLERANCE_ABSOLUE.items():
+        if grandeur in reference and mesure[grandeur] > seuil * reference[grandeur] + tolerance:
+            res.append(f"{grandeur} : {mesure[grandeur]:.3f} pour une référence de {reference[grandeur]:.3f} (seuil x{seuil})")
+    return res
@@ -0,0 +1,123 @@
+import os
+import sys
+
+import pytest
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.benchmark.outils_benchmark import TAILLES, charger_references, donnees_fictives, enregistrer_references, mesurer, regressions
+from src.main.python.algo_affectation_classement import (
+    convertir_colonne_en_tuple,
+    get_depuis_df_univ_prioritaire_avec_place_niveau_spe,
+    get_universite_la_moins_remplie,
+    traitement_scenario_hybride,
+    tri_df_etudiant_semestre_ponderation,
+)
+from src.main.python.conversion_df_brute import conversion_df_brute_pour_affectation, traitement_df_univ
+from src.main.python.excel_en_dataframe import charger_excels
+
+# Nombre d'appels des fonctions de recherche sur le df des universités (la recherche par spécialité parcourt tout le catalogue)
+NB_APPELS_RECHERCHE = 100
+NB_APPELS_RECHERCHE_SPECIALITE = 10
+
+
+@pytest.fixture(scope="module")
+def cache_donnees():
+    return {}
+
+
+def donnees(cache_donnees, nb_etudiants):
+    if nb_etudiants not in cache_donnees:
+        cache_donnees[nb_etudiants] = donnees_fictives(nb_etudiants)
+    return cache_donnees[nb_etudiants]
+
+
+def verifier(request, resultats_benchmark, nom, mesure):
+    """Enregistre la mesure comme référence ou la compare à la référence selon le mode demandé."""
+    resultats_benchmark[nom] = mesure
+    chemin = request.config.getoption("--benchmark-references")
+    if request.config.getoption("--benchmark-enregistrer"):
+        enregistrer_references({nom: mesure}, chemin)
+        return
+    reference = charger_references(chemin).get(nom)
+    if reference is None:
+        pytest.skip(f"Pas de référence pour {nom} (lancer avec --benchmark-enregistrer)")
+    depassements = regressions(mesure, reference, request.config.getoption("--benchmark-seuil"))
+    assert not depassements, f"Régression de {nom} : " + " ; ".join(depassements)
+
+
+def test_traitement_df_univ(request, resultats_benchmark, cache_donnees):
+    df_univ_brut = donnees(cache_donnees, TAILLES[0])["univ_data_mobility"]
+    mesure = mesurer(lambda: (df_univ_brut,), traitement_df_univ, repetitions=5)
+    verifier(request, resultats_benchmark, "traitement_df_univ", mesure)
+
+
+@pytest.mark.parametrize("calcul_completion", ["Taux", "Places Prises"])
+def test_recherches_df_univ(request, resultats_benchmark, cache_donnees, calcul_completion):
+    jeu = donnees(cache_donnees, NB_APPELS_RECHERCHE)
+    df_univ = jeu["universites_partenaires"]
+    df_etudiants = jeu["choix_etudiants"].copy()
+    convertir_colonne_en_tuple(df_etudiants, "Choix S8")
+    etudiants = [
+        (choix, note, specialite)
+        for choix, note, specialite in zip(df_etudiants["Choix S8"], df_etudiants["Note"], df_etudiants["Specialite"])
+        if isinstance(choix, tuple)
+    ]
+
+    def moins_remplie(df_univ):
+        for choix, _, _ in etudiants:
+            get_universite_la_moins_remplie(df_univ, choix, "S8", calcul_completion)
+
+    def prioritaire_niveau_spe(df_univ):
+        for _, note, specialite in etudiants[:NB_APPELS_RECHERCHE_SPECIALITE]:
+            get_depuis_df_univ_prioritaire_avec_place_niveau_spe(df_univ, note, "S8", specialite, calcul_completion)
+
+    mesure = mesurer(lambda: (df_univ,), moins_remplie)
+    verifier(request, resultats_benchmark, f"get_universite_la_moins_remplie[{calcul_completion}]", mesure)
+    mesure = mesurer(lambda: (df_univ,), prioritaire_niveau_spe)
+    verifier(request, resultats_benchmark, f"get_depuis_df_univ_prioritaire_avec_place_niveau_spe[{calcul_completion}]", mesure)
+
+
+@pytest.mark.parametrize("nb_etudiants", TAILLES)
+def test_preparation_etudiants(request, resultats_benchmark, cache_donnees, nb_etudiants):
+    df_etudiants = donnees(cache_donnees, nb_etudiants)["choix_etudiants"]
+    repetitions = 3 if nb_etudiants <= 10_000 else 1
+
+    mesure = mesurer(lambda: (df_etudiants.copy(), "Choix S8"), convertir_colonne_en_tuple, repetitions)
+    verifier(request, resultats_benchmark, f"convertir_colonne_en_tuple[{nb_etudiants}]", mesure)
+    mesure = mesurer(lambda: (df_etudiants.copy(),), tri_df_etudiant_semestre_ponderation, repetitions)
+    verifier(request, resultats_benchmark, f"tri_df_etudiant_semestre_ponderation[{nb_etudiants}]", mesure)
+
+
+@pytest.mark.parametrize("moteur", ["reference", "rapide"])
+@pytest.mark.parametrize("nb_etudiants", TAILLES)
+def test_traitement_scenario_hybride(request, resultats_benchmark, cache_donnees, nb_etudiants, moteur):
+    jeu = donnees(cache_donnees, nb_etudiants)
+    df_etudiants = tri_df_etudiant_semestre_ponderation(jeu["choix_etudiants"].copy())
+
+    def preparer():
+        return jeu["universites_partenaires"].copy(), df_etudiants.copy()
+
+    def executer(df_univ, df_etudiants):
+        traitement_scenario_hybride(df_univ, df_etudiants, 3, "Taux", moteur=moteur)
+
+    mesure = mesurer(preparer, executer)
+    verifier(request, resultats_benchmark, f"traitement_scenario_hybride[{moteur}-{nb_etudiants}]", mesure)
+
+
+@pytest.mark.parametrize("nb_etudiants", TAILLES)
+def test_pipeline_complet(request, resultats_benchmark, cache_donnees, tmp_path, nb_etudiants):
+    """charger_excels -> conversion_df_brute_pour_affectation -> tri_df_etudiant_semestre_ponderation -> traitement_scenario_hybride,
+    comme traitement_personnalise dans main.py."""
+    jeu = donnees(cache_donnees, nb_etudiants)
+    jeu["univ_data_mobility"].to_excel(tmp_path / "univ_data_mobility.xlsx", index=False)
+    jeu["choix_etudiants"].to_excel(tmp_path / "choix_etudiants.xlsx", index=False)
+
+    def pipeline(dossier):
+        dataframes_convertis = conversion_df_brute_pour_affectation(charger_excels(dossier))
+        df_etudiants = tri_df_etudiant_semestre_ponderation(dataframes_convertis["choix_etudiants"], alpha=0.05)
+        traitement_scenario_hybride(dataframes_convertis["universites_partenaires"], df_etudiants, 3, "Taux")
+
+    mesure = mesurer(lambda: (str(tmp_path),), pipeline)
+    verifier(request, resultats_benchmark, f"pipeline_complet[{nb_etudiants}]", mesure)
@@ -0,0 +1,94 @@
+import heapq
+import time
+from collections import deque
+
+import numpy as np
+
+from src.main.python.affectation_optimale import enregistrer_issues, niveaux_aretes
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.journalisation import logger_general
+from src.main.python.moteur_rapide import CohorteEncodee
+from src.main.python.statistiques import StatistiquesAffectation
+
+
+def listes_de_preferences(cohorte:CohorteEncodee, etat_univ:EtatUniversites, semestre:str, limite_ordre:int):
+    """Retourne les listes de préférences des étudiants au format CSR (debuts, ids des partenaires).
+
+    Seuls les partenaires admissibles (places connues et libres, note min atteinte) y figurent, dans l'ordre des niveaux
+    de niveaux_aretes : voeux ordonnés, autres voeux (prioritaires d'abord), puis partenaires compatibles avec la spécialité
+    (prioritaires d'abord), chaque groupe dans l'ordre des voeux ou du DataFrame.
+    """
+    lignes, ids, niveaux, rangs = niveaux_aretes(cohorte, etat_univ, semestre, limite_ordre)
+    ordre = np.argsort((lignes * (2 * limite_ordre + 4) + niveaux) * (int(rangs.max(initial=0)) + 1) + rangs)
+    debuts = np.zeros(len(cohorte) + 1, dtype=np.int64)
+    debuts[1:] = np.cumsum(np.bincount(lignes, minlength=len(cohorte)))
+    return debuts, ids[ordre].astype(np.int32)
+
+
+def affecter_semestre_acceptation_differee(cohorte:CohorteEncodee, etat_univ:EtatUniversites, semestre:str, limite_ordre:int,
+                                           statistiques:StatistiquesAffectation | None=None) -> np.ndarray:
+    """Affecte un semestre par acceptation différée (Gale-Shapley), les étudiants proposant.
+
+    Chaque partenaire classe ses candidats selon l'ordre de priorité de la cohorte (celui de tri_df_etudiant_semestre_ponderation)
+    et garde au plus ses places restantes : ses candidats retenus sont dans un tas borné dont la racine est le moins prioritaire,
+    si bien qu'une proposition coûte O(log places). Un étudiant refusé propose au partenaire suivant de sa liste
+    (voir listes_de_preferences), un étudiant évincé repart dans la file. Le résultat est stable : aucun étudiant ne préfère un partenaire qui a gardé
+    un étudiant moins prioritaire que lui ou qui a encore une place. Les places prises de l'état sont mises à jour.
+
+    La file part dans l'ordre de priorité et chaque étudiant propose jusqu'à être retenu : comme tous les partenaires partagent
+    ce classement, les évincements sont rares et l'essentiel du coût est le parcours des partenaires déjà pleins.
+
+    Args:
+        cohorte: La cohorte encodée, dans l'ordre de priorité.
+        etat_univ: L'état des universités, dont les places prises du semestre sont modifiées.
+        semestre: Le semestre à traiter.
+        limite_ordre: Le nombre de voeux ordonnés.
+        statistiques: Si fourni, complété avec l'issue de chaque étudiant et la durée.
+
+    Returns:
+        resultat: le tableau int32 des ids obtenus (-1 si aucun), dans l'ordre de la cohorte.
+    """
+    depart = time.perf_counter()
+    debuts, preferences = listes_de_preferences(cohorte, etat_univ, semestre, limite_ordre)
+    capacites = np.maximum(etat_univ.places[semestre] - etat_univ.places_prises[semestre], 0).tolist()
+    # Les listes Python sont plus rapides que les scalaires NumPy dans la boucle
+    debuts, preferences = debuts.tolist(), preferences.tolist()
+
+    # tas[p] contient -position des candidats retenus par p : la racine est le candidat le moins prioritaire.
+    # pire[p] est la position de cette racine une fois p plein, -1 tant qu'il a des places libres.
+    tas = [[] for _ in range(len(etat_univ))]
+    pire = [-1] * len(etat_univ)
+    prochain = debuts[:-1]
+    file = deque(i for i in range(len(cohorte)) if debuts[i] < debuts[i + 1])
+    propositions = 0
+    while file:
+        i = file.popleft()
+        k = prochain[i]
+        fin = debuts[i + 1]
+        while k < fin:
+            p = preferences[k]
+            k += 1
+            if 0 <= pire[p] < i:
+                continue
+            retenus = tas[p]
+            if pire[p] < 0:
+                heapq.heappush(retenus, -i)
+                if len(retenus) == capacites[p]:
+                    pire[p] = -retenus[0]
+            else:
+                file.append(-heapq.heapreplace(retenus, -i))
+                pire[p] = -retenus[0]
+            break
+        propositions += k - prochain[i]
+        prochain[i] = k
+
+    resultat = np.full(len(cohorte), -1, dtype=np.int32)
+    for p, retenus in enumerate(tas):
+        if retenus:
+            resultat[np.negative(retenus)] = p
+    etat_univ.places_prises[semestre] += np.bincount(resultat[resultat >= 0], minlength=len(etat_univ)).astype(etat_univ.places_prises[semestre].dtype)
+    logger_general.info("%s : acceptation différée en %d propositions", semestre, propositions)
+
+    if statistiques is not None:
+        enregistrer_issues(statistiques, cohorte, semestre, limite_ordre, resultat, time.perf_counter() - depart)
+    return resultat
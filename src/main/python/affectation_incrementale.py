@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+from src.main.python.algo_affectation_classement import preparer_df_etudiants, tri_df_etudiant_semestre_ponderation
+from src.main.python.analyse_choix import CHOIX_VIDE, encoder_choix_en_ids
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.journalisation import logger_general
+from src.main.python.moteur_rapide import affecter_semestre, compatibles_en_csr, encoder_cohorte, ids_vers_noms
+
+# Nombre d'étudiants (dans l'ordre de priorité) entre deux instantanés des places prises
+INTERVALLE_INSTANTANES = 256
+
+
+class AffectationIncrementale:
+    """Affectation (moteur rapide) qui garde des instantanés des places prises le long de l'ordre de priorité,
+    pour ne rejouer qu'une partie de la cohorte après une correction tardive des voeux ou des places.
+
+    Les étudiants placés avant le premier étudiant concerné par une correction ne consultent ni son voeu ni le partenaire modifié :
+    leurs affectations et l'état des places jusqu'à lui sont inchangés. L'affectation reprend donc depuis l'instantané
+    qui le précède, et le résultat est identique à celui d'un traitement complet sur les données corrigées.
+
+    Args:
+        df_univ: Le dataframe des universités partenaires (sortie de traitement_df_univ), non modifié.
+        df_etudiants: Le dataframe des choix des étudiants avant tri (sortie de conversion_df_brute_pour_affectation), non modifié.
+        alpha: Le coefficient de pénalité de tri_df_etudiant_semestre_ponderation.
+        limite_ordre: Le nombre de voeux ordonnés (entre 0 et 5).
+        calcul_completion: "Taux" ou "Places Prises".
+        intervalle: Le nombre d'étudiants entre deux instantanés.
+        semestres: Les semestres à affecter.
+    """
+
+    def __init__(self, df_univ:pd.DataFrame, df_etudiants:pd.DataFrame, alpha:float=0.05, limite_ordre:int=0, calcul_completion:str="Taux",
+                 intervalle:int=INTERVALLE_INSTANTANES, semestres:list[str]=["S8", "S9"]):
+        if intervalle < 1:
+            raise ValueError(f"L'intervalle entre deux instantanés doit être positif : {intervalle}")
+        self.df_univ = df_univ.copy()
+        self.df_etudiants = df_etudiants.copy()
+        self.alpha = alpha
+        self.limite_ordre = min(max(limite_ordre, 0), 5)
+        self.calcul_completion = calcul_completion if calcul_completion in ["Taux", "Places Prises"] else "Taux"
+        self.intervalle = intervalle
+        self.semestres = list(semestres)
+
+        self.etat_univ = EtatUniversites(self.df_univ, self.semestres)
+        self.index_noms = pd.Index(self.etat_univ.noms, dtype=object)
+        self.ordre = self._ordre_de_priorite()
+        self.cohorte = encoder_cohorte(self.df_etudiants.loc[self.ordre], self.etat_univ, self.semestres)
+
+        n = len(self.ordre)
+        nb_instantanes = -(-n // intervalle)
+        self.resultats = {semestre: np.full(n, -1, dtype=np.int32) for semestre in self.semestres}
+        self.instantanes = {semestre: np.zeros((nb_instantanes, len(self.etat_univ)), dtype=np.int64) for semestre in self.semestres}
+        for semestre in self.semestres:
+            self._rejouer(semestre, 0)
+
+    def _ordre_de_priorite(self) -> pd.Index:
+        colonnes = [f"Choix {semestre}" for semestre in ["S8", "S9"]]
+        return tri_df_etudiant_semestre_ponderation(self.df_etudiants[colonnes].copy(), alpha=self.alpha).index
+
+    def _rejouer(self, semestre:str, premier:int) -> int:
+        """Reprend l'affectation du semestre depuis le dernier instantané avant la position premier.
+
+        Returns:
+            res: le nombre d'étudiants réaffectés.
+        """
+        n = len(self.ordre)
+        if premier >= n:
+            return 0
+        debut = (premier // self.intervalle) * self.intervalle
+        self.etat_univ.places_prises[semestre][:] = self.instantanes[semestre][debut // self.intervalle]
+        affecter_semestre(self.cohorte, self.etat_univ, semestre, self.limite_ordre, self.calcul_completion,
+                          resultat=self.resultats[semestre], debut=debut, fin=n,
+                          instantanes=self.instantanes[semestre], pas_instantanes=self.intervalle)
+        logger_general.info("Réaffectation %s à partir de l'étudiant %d : %d étudiants rejoués", semestre, premier, n - debut)
+        return n - debut
+
+    def _encoder_ligne(self, semestre:str, position:int, valeur) -> dict:
+        """Réencode les voeux d'un étudiant dans la cohorte et retourne ses voeux inconnus (nom -> occurrences)."""
+        choix = self.cohorte.choix[semestre]
+        nouveau_choix, a_choisi, nouveau, noms_inconnus = encoder_choix_en_ids(pd.Series([valeur], dtype=object), self.index_noms, choix.shape[1],
+                                                                             avec_noms_inconnus=True)
+        if nouveau_choix.shape[1] > choix.shape[1]:
+            bourrage = np.full((len(choix), nouveau_choix.shape[1] - choix.shape[1]), CHOIX_VIDE, dtype=np.int32)
+            choix = self.cohorte.choix[semestre] = np.concatenate([choix, bourrage], axis=1)
+        choix[position] = nouveau_choix[0]
+        self.cohorte.a_choisi[semestre][position] = a_choisi[0]
+        self.cohorte.noms_inconnus[semestre].pop(position, None)
+        if noms_inconnus:
+            self.cohorte.noms_inconnus[semestre][position] = noms_inconnus[0]
+        return nouveau
+
+    def modifier_choix(self, index_etudiant, semestre:str, choix) -> int:
+        """Remplace les voeux d'un étudiant pour un semestre ("A; B; C" ou NaN) et met à jour l'affectation.
+
+        Si l'étudiant ajoute ou retire un semestre, sa priorité change : tous les semestres sont alors repris
+        depuis la première position où l'ordre de priorité diffère.
+
+        Args:
+            index_etudiant: L'index de l'étudiant dans df_etudiants.
+            semestre: Le semestre des voeux modifiés.
+            choix: Les nouveaux voeux.
+
+        Returns:
+            res: le nombre d'étudiants réaffectés (tous semestres confondus).
+        """
+        if semestre not in self.semestres:
+            raise ValueError(f"Semestre non affecté : {semestre}")
+        colonne = f"Choix {semestre}"
+        ancienne_valeur = self.df_etudiants.at[index_etudiant, colonne]
+        self.df_etudiants.at[index_etudiant, colonne] = choix
+
+        ancien_ordre = self.ordre
+        self.ordre = self._ordre_de_priorite()
+        if self.ordre.equals(ancien_ordre):
+            premier = ancien_ordre.get_loc(index_etudiant)
+            semestres_concernes = [semestre]
+        else:
+            # Les étudiants entre l'ancienne et la nouvelle position de l'étudiant sont décalés
+            permutation = ancien_ordre.get_indexer(self.ordre)
+            premier = int(np.argmax(permutation != np.arange(len(permutation))))
+            self.cohorte = self.cohorte.sous_ensemble(permutation)
+            self.resultats = {s: resultat[permutation] for s, resultat in self.resultats.items()}
+            semestres_concernes = self.semestres
+
+        position = self.ordre.get_loc(index_etudiant)
+        _, _, anciens_inconnus = encoder_choix_en_ids(pd.Series([ancienne_valeur], dtype=object), self.index_noms)
+        nouveaux_inconnus = self._encoder_ligne(semestre, position, choix)
+        inconnus = dict(self.cohorte.voeux_inconnus[semestre])
+        for nom, nombre in anciens_inconnus.items():
+            inconnus[nom] -= nombre
+        for nom, nombre in nouveaux_inconnus.items():
+            inconnus[nom] = inconnus.get(nom, 0) + nombre
+        self.cohorte.voeux_inconnus = dict(self.cohorte.voeux_inconnus, **{semestre: {nom: nombre for nom, nombre in inconnus.items() if nombre > 0}})
+
+        return sum(self._rejouer(s, premier) for s in semestres_concernes)
+
+    def premier_etudiant_concerne(self, id_partenaire:int, semestre:str) -> int:
+        """Retourne la position du premier étudiant qui peut consulter les places du partenaire :
+        le partenaire est dans ses voeux, ou il est compatible avec sa spécialité (scénario 3). len(cohorte) si aucun."""
+        concernes = (self.cohorte.choix[semestre] == id_partenaire).any(axis=1)
+        compat_debuts, compat_ids = compatibles_en_csr(self.etat_univ, semestre, self.cohorte.liste_specialites)
+        codes = [code for code in range(len(self.cohorte.liste_specialites))
+                 if id_partenaire in compat_ids[compat_debuts[code]:compat_debuts[code + 1]]]
+        concernes |= self.cohorte.a_choisi[semestre] & np.isin(self.cohorte.specialites, codes)
+        return int(np.argmax(concernes)) if concernes.any() else len(concernes)
+
+    def modifier_places(self, nom_du_partenaire:str, semestre:str, places) -> int:
+        """Change le nombre de places d'un partenaire pour un semestre (NaN pour inconnu) et met à jour l'affectation.
+
+        Returns:
+            res: le nombre d'étudiants réaffectés.
+        """
+        i = self.etat_univ.get_id(nom_du_partenaire)
+        if i is None or semestre not in self.semestres:
+            raise ValueError(f"Partenaire ou semestre inconnu : {nom_du_partenaire}, {semestre}")
+        self.df_univ.loc[self.etat_univ.lignes[i], f"Places {semestre}"] = places
+        connues = not pd.isna(places)
+        self.etat_univ.places_connues[semestre][i] = connues
+        self.etat_univ.places[semestre][i] = int(places) if connues else 0
+        return self._rejouer(semestre, self.premier_etudiant_concerne(i, semestre))
+
+    def resultat(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Retourne (df des étudiants, df des universités) tels que traitement_scenario_hybride les produirait sur les données corrigées."""
+        df_res = tri_df_etudiant_semestre_ponderation(self.df_etudiants.copy(), alpha=self.alpha)
+        preparer_df_etudiants(df_res, self.semestres)
+        df_res.attrs["voeux_inconnus"] = self.cohorte.voeux_inconnus
+        for semestre in self.semestres:
+            df_res[f"choix_final {semestre}"] = ids_vers_noms(self.etat_univ, self.resultats[semestre], df_res.index)
+        df_univ = self.df_univ.copy()
+        self.etat_univ.ecrire_dans_df(df_univ)
+        return df_res, df_univ
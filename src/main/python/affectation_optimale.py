@@ -0,0 +1,146 @@
+import time
+
+import numpy as np
+
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.indicateurs import rangs_obtenus
+from src.main.python.journalisation import logger_general
+from src.main.python.moteur_rapide import CohorteEncodee, compatibles_en_csr
+from src.main.python.statistiques import CODE_ISSUE, ISSUES, NB_COMPTEURS, StatistiquesAffectation
+
+# Écart de coût entre l'étudiant le plus prioritaire et le moins prioritaire : ses coûts sont multipliés par 1 + POIDS_PRIORITE
+POIDS_PRIORITE = 1.0
+
+
+def niveaux_aretes(cohorte:CohorteEncodee, etat_univ:EtatUniversites, semestre:str, limite_ordre:int):
+    """Retourne les arêtes admissibles étudiant -> partenaire d'un semestre et leur niveau de préférence.
+
+    Une arête est admissible si l'étudiant a fait au moins un voeu, que le partenaire a des places connues et libres
+    et que la note de l'étudiant atteint sa note min. Les niveaux suivent les scénarios de traiter_etudiant_semestre :
+        2 * r pour le voeu ordonné de rang r (r < limite_ordre),
+        2 * limite_ordre pour un voeu non ordonné chez un partenaire prioritaire, + 1 chez un non prioritaire,
+        2 * limite_ordre + 2 pour un partenaire compatible avec la spécialité (hors voeux), + 1 s'il n'est pas prioritaire.
+    Un partenaire cité plusieurs fois ne garde que son meilleur niveau. À niveau égal, le rang départage : la colonne du voeu,
+    ou la largeur de la matrice des voeux plus la position dans la liste des compatibles.
+
+    Returns:
+        tuple: (positions des étudiants, ids des partenaires, niveaux, rangs), triés par étudiant puis partenaire.
+    """
+    choix = cohorte.choix[semestre]
+    a_choisi = cohorte.a_choisi[semestre]
+    prioritaire = etat_univ.prioritaire[semestre]
+    connues = etat_univ.places_connues[semestre] & etat_univ.places_prises_connues[semestre]
+    libres = connues & (etat_univ.places[semestre] - etat_univ.places_prises[semestre] > 0)
+
+    # Voeux
+    lignes, rangs = np.nonzero((choix >= 0) & a_choisi[:, None])
+    ids = choix[lignes, rangs].astype(np.int64)
+    niveaux = np.where(rangs < limite_ordre, 2 * rangs, 2 * limite_ordre + ~prioritaire[ids])
+
+    # Partenaires compatibles avec la spécialité
+    compat_debuts, compat_ids = compatibles_en_csr(etat_univ, semestre, cohorte.liste_specialites)
+    avec_spe = np.flatnonzero(a_choisi & (cohorte.specialites >= 0))
+    codes = cohorte.specialites[avec_spe]
+    nombres = compat_debuts[codes + 1] - compat_debuts[codes]
+    lignes_compat = np.repeat(avec_spe, nombres)
+    decalages = np.arange(nombres.sum()) - np.repeat(np.cumsum(nombres) - nombres, nombres)
+    ids_compat = compat_ids[np.repeat(compat_debuts[codes], nombres) + decalages].astype(np.int64)
+    niveaux_compat = 2 * limite_ordre + 2 + ~prioritaire[ids_compat]
+    rangs_compat = choix.shape[1] + decalages
+
+    lignes = np.concatenate([lignes, lignes_compat]).astype(np.int64)
+    ids = np.concatenate([ids, ids_compat])
+    niveaux = np.concatenate([niveaux, niveaux_compat]).astype(np.int64)
+    rangs = np.concatenate([rangs, rangs_compat]).astype(np.int64)
+
+    # Le test est écrit comme dans le moteur rapide : une note ou une note min manquante ne bloque pas
+    garder = libres[ids] & ~(etat_univ.note_min[semestre].astype(cohorte.notes.dtype)[ids] > cohorte.notes[lignes])
+    lignes, ids, niveaux, rangs = lignes[garder], ids[garder], niveaux[garder], rangs[garder]
+    # Tri sur une seule clé entière (étudiant, partenaire, niveau, rang), bien plus rapide qu'un lexsort sur des millions d'arêtes
+    nb_rangs = int(rangs.max(initial=0)) + 1
+    cles = ((lignes * len(etat_univ) + ids) * (2 * limite_ordre + 4) + niveaux) * nb_rangs + rangs
+    ordre = np.argsort(cles)
+    lignes, ids, niveaux, rangs = lignes[ordre], ids[ordre], niveaux[ordre], rangs[ordre]
+    premier = np.ones(len(lignes), dtype=bool)
+    premier[1:] = (lignes[1:] != lignes[:-1]) | (ids[1:] != ids[:-1])
+    return lignes[premier], ids[premier], niveaux[premier], rangs[premier]
+
+
+def affecter_semestre_optimal(cohorte:CohorteEncodee, etat_univ:EtatUniversites, semestre:str, limite_ordre:int,
+                              poids_priorite:float=POIDS_PRIORITE, statistiques:StatistiquesAffectation | None=None) -> np.ndarray:
+    """Affecte un semestre en minimisant le coût total des affectations, plutôt qu'étudiant par étudiant.
+
+    Le graphe biparti creux relie chaque étudiant aux places libres des partenaires admissibles (voir niveaux_aretes) : chaque
+    partenaire est dupliqué en autant de colonnes que de places utilisables, et chaque étudiant a une colonne fictive « sans affectation »
+    plus chère que toutes ses arêtes. Le coût d'une arête est (niveau + 1) multiplié par le poids de l'étudiant, qui décroît
+    linéairement de 1 + poids_priorite (premier de l'ordre de priorité) à 1 (dernier). Le couplage de coût minimal est calculé
+    par scipy.sparse.csgraph.min_weight_full_bipartite_matching (LAPJVsp). Les places prises de l'état sont mises à jour.
+
+    Args:
+        cohorte: La cohorte encodée, dans l'ordre de priorité de tri_df_etudiant_semestre_ponderation.
+        etat_univ: L'état des universités, dont les places prises du semestre sont modifiées.
+        semestre: Le semestre à traiter.
+        limite_ordre: Le nombre de voeux ordonnés.
+        poids_priorite: L'avantage donné aux étudiants les mieux classés, 0 pour les traiter tous à égalité.
+        statistiques: Si fourni, complété avec l'issue de chaque étudiant (voeu ordonné, voeu non ordonné, spécialité, aucune) et la durée.
+
+    Returns:
+        resultat: le tableau int32 des ids obtenus (-1 si aucun), dans l'ordre de la cohorte.
+    """
+    try:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+    except ImportError as e:
+        raise ImportError("Le moteur optimal nécessite scipy (pip install scipy)") from e
+
+    depart = time.perf_counter()
+    n = len(cohorte)
+    resultat = np.full(n, -1, dtype=np.int32)
+    lignes, ids, niveaux, _ = niveaux_aretes(cohorte, etat_univ, semestre, limite_ordre)
+    candidats = np.flatnonzero(cohorte.a_choisi[semestre])
+    poids = 1.0 + poids_priorite * (n - 1 - np.arange(n)) / max(n - 1, 1)
+
+    if len(lignes):
+        # Un partenaire n'utilise jamais plus de places qu'il n'a de candidats
+        restantes = np.maximum(etat_univ.places[semestre] - etat_univ.places_prises[semestre], 0)
+        copies = np.minimum(restantes, np.bincount(ids, minlength=len(etat_univ))).astype(np.int64)
+        debuts = np.cumsum(copies) - copies
+        nb_sieges = int(copies.sum())
+        partenaire_siege = np.repeat(np.arange(len(etat_univ)), copies)
+
+        # Lignes de la matrice : les étudiants ayant fait un voeu, dans l'ordre de la cohorte
+        ligne_de = np.full(n, -1, dtype=np.int64)
+        ligne_de[candidats] = np.arange(len(candidats))
+        repetitions = copies[ids]
+        decalages = np.arange(repetitions.sum()) - np.repeat(np.cumsum(repetitions) - repetitions, repetitions)
+        rangees = np.concatenate([np.repeat(ligne_de[lignes], repetitions), np.arange(len(candidats))])
+        colonnes = np.concatenate([np.repeat(debuts[ids], repetitions) + decalages, nb_sieges + np.arange(len(candidats))])
+        cout_sans_affectation = 2 * limite_ordre + 5
+        couts = np.concatenate([np.repeat((niveaux + 1) * poids[lignes], repetitions), cout_sans_affectation * poids[candidats]])
+        logger_general.info("%s : graphe de %d étudiants, %d places, %d arêtes", semestre, len(candidats), nb_sieges, len(couts))
+
+        graphe = csr_matrix((couts, (rangees, colonnes)), shape=(len(candidats), nb_sieges + len(candidats)))
+        rangees_obtenues, colonnes_obtenues = min_weight_full_bipartite_matching(graphe)
+        affectes = colonnes_obtenues < nb_sieges
+        resultat[candidats[rangees_obtenues[affectes]]] = partenaire_siege[colonnes_obtenues[affectes]]
+        etat_univ.places_prises[semestre] += np.bincount(resultat[resultat >= 0], minlength=len(etat_univ)).astype(etat_univ.places_prises[semestre].dtype)
+
+    if statistiques is not None:
+        enregistrer_issues(statistiques, cohorte, semestre, limite_ordre, resultat, time.perf_counter() - depart)
+    return resultat
+
+
+def enregistrer_issues(statistiques:StatistiquesAffectation, cohorte:CohorteEncodee, semestre:str, limite_ordre:int, resultat:np.ndarray, duree:float):
+    """Ajoute aux statistiques l'issue de chaque étudiant d'une affectation calculée d'un bloc : voeu ordonné (scenario_1),
+    autre voeu (scenario_2), partenaire hors voeux (scenario_3), sans voeu ou aucune. Passages et décisions sont alors égaux."""
+    rangs = rangs_obtenus(cohorte.choix[semestre], resultat)
+    issues = np.select(
+        [~cohorte.a_choisi[semestre], rangs == -1, rangs == 0, rangs <= limite_ordre],
+        [CODE_ISSUE["sans_voeu"], CODE_ISSUE["aucune"], CODE_ISSUE["scenario_3"], CODE_ISSUE["scenario_1"]],
+        CODE_ISSUE["scenario_2"],
+    )
+    nombres = np.bincount(issues, minlength=len(ISSUES))
+    compteurs = np.zeros((len(ISSUES), NB_COMPTEURS), dtype=np.int64)
+    compteurs[:, 0] = nombres
+    compteurs[:, 1] = nombres
+    statistiques.ajouter_compteurs(semestre, compteurs, duree)
@@ -1,30 +1,48 @@
-import logging
+import os
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 
-# Configuration de base du logging
-import logging
-
-# Logger général
-logger_general = logging.getLogger('general')
-logger_general.setLevel(logging.INFO)
-fh_general = logging.FileHandler('log.txt', mode='w')
-fh_general.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger_general.addHandler(fh_general)
-
-# Logger spécifique pour le taux
-logger_debug = logging.getLogger('taux')
-logger_debug.setLevel(logging.DEBUG)
-fh_taux = logging.FileHandler('log_debug.txt', mode='w')
-fh_taux.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger_debug.addHandler(fh_taux)
-
-
-import pandas as pd
-import random
-
-def generer_df_choix_etudiants_spe_compatible(n, df_univ, proba_un_seul_semestre=0.3):
+from src.main.python.acceptation_differee import affecter_semestre_acceptation_differee
+from src.main.python.affectation_optimale import affecter_semestre_optimal
+from src.main.python.analyse_choix import eclater_choix
+from src.main.python.composantes import affecter_semestre_par_composantes
+from src.main.python.conversion_df_brute import BIT_SPECIALITE
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.moteur_rapide import encoder_cohorte, affecter_semestre, ids_vers_noms, noyau_compile
+from src.main.python.point_de_reprise import INTERVALLE_REPRISE, PointDeReprise, empreinte_affectation
+from src.main.python.statistiques import StatistiquesAffectation
+from src.main.python.journalisation import (
+    detacher_journalisation,
+    logger_general,
+    logger_debug,
+    logger_decisions,
+    CODE_SANS_VOEU,
+    CODE_VOEU_ORDONNE,
+    CODE_VOEU_NON_ORDONNE,
+    CODE_FALLBACK,
+    CODE_AUCUNE,
+)
+
+# Fréquence des appels au rappel de progression : tous les N étudiants (moteur de référence), par lots de N étudiants (moteur rapide)
+PAS_PROGRESSION_REFERENCE = 50
+TAILLE_LOT_PROGRESSION_RAPIDE = 10_000
+
+
+# Moteurs qui calculent chaque semestre d'un bloc, plutôt qu'étudiant par étudiant selon les scénarios
+MOTEURS_PAR_SEMESTRE = {
+    "optimal": affecter_semestre_optimal,
+    "acceptation_differee": affecter_semestre_acceptation_differee,
+}
+
+
+class AffectationAnnulee(Exception):
+    """Levée par traitement_scenario_hybride quand l'évènement d'annulation est déclenché en cours d'affectation."""
+
+
+def generer_df_choix_etudiants_spe_compatible(n, df_univ, proba_un_seul_semestre=0.3, graine=None):
     """
     Génère un DataFrame contenant les choix d'université de n étudiants répartis selon les quotas
     des spécialités, avec une note aléatoire et des choix compatibles pour les semestres S8 et S9.
@@ -35,9 +53,11 @@ def generer_df_choix_etudiants_spe_compatible(n, df_univ, proba_un_seul_semestre
     n : int
         Le nombre total d'étudiants.
     df_univ : pd.DataFrame
-        Le DataFrame des universités avec les colonnes 'Specialite', 'Semestre', 'Nom'.
+        Le DataFrame des universités issu de traitement_df_univ, ou un EtatUniversites déjà construit.
     proba_un_seul_semestre : float (entre 0 et 1)
         Probabilité qu'un étudiant ne fasse des vœux que pour un seul semestre.
+    graine : int | None
+        Graine d'un générateur aléatoire propre à l'appel ; si None, le module random global est utilisé.
 
     Retour :
     --------
@@ -51,9 +71,14 @@ def generer_df_choix_etudiants_spe_compatible(n, df_univ, proba_un_seul_semestre
     if n < 1:
         raise ValueError("Le nombre d'étudiants doit être au moins 1.")
 
+    alea = random if graine is None else random.Random(graine)
+
     taille_groupe_spe = {"MM":40, "MC":20, "SNI":20, "BAT":40, "EIT":20, "IDU":20}
     liste_semestre = ["S8", "S9"]
 
+    # Index des partenaires compatibles construit une seule fois pour toute la génération
+    etat_univ = df_univ if isinstance(df_univ, EtatUniversites) else EtatUniversites(df_univ, liste_semestre)
+
     total_defini = sum(taille_groupe_spe.values())
     effectifs_par_spe = {spe: round(taille_groupe_spe[spe] / total_defini * n) for spe in taille_groupe_spe}
 
@@ -70,13 +95,13 @@ def generer_df_choix_etudiants_spe_compatible(n, df_univ, proba_un_seul_semestre
         for _ in range(nb_etudiants):
             data["Id Etudiant"].append(id_etudiant)
             data["Specialite"].append(spe)
-            note = round(random.uniform(0, 20), 2)
+            note = round(alea.uniform(0, 20), 2)
             data["Note"].append(note)
 
             # Décider si l'étudiant fait des voeux pour un ou deux semestres
-            fait_un_seul_semestre = random.random() < proba_un_seul_semestre
+            fait_un_seul_semestre = alea.random() < proba_un_seul_semestre
             if fait_un_seul_semestre:
-                semestre_choisi = random.choice(liste_semestre)
+                semestre_choisi = alea.choice(liste_semestre)
             else:
                 semestre_choisi = None  # signifie les deux
 
@@ -84,12 +109,12 @@ def generer_df_choix_etudiants_spe_compatible(n, df_univ, proba_un_seul_semestre
                 if fait_un_seul_semestre and semestre != semestre_choisi:
                     data[f"Choix {semestre}"].append("")
                 else:
-                    liste_univ_compatibles = get_liste_univ_compatible(df_univ, semestre, spe)
+                    liste_univ_compatibles = get_liste_univ_compatible(etat_univ, semestre, spe)
                     if not liste_univ_compatibles:
                         choix = ""
                     else:
                         nb_choix = min(5, len(liste_univ_compatibles))
-                        choix = "; ".join(random.sample(liste_univ_compatibles, nb_choix))
+                        choix = "; ".join(alea.sample(liste_univ_compatibles, nb_choix))
                     data[f"Choix {semestre}"].append(choix)
 
             id_etudiant += 1
@@ -129,6 +154,8 @@ def get_nombre_places_total(df:pd.DataFrame, nom_du_partenaire:str, semestre:str
 
     if not semestre_est_valide(semestre):
         return None
+    if isinstance(df, EtatUniversites):
+        return df.get_nombre_places_total(nom_du_partenaire, semestre)
     places = df.loc[df["nom_partenaire"] == nom_du_partenaire, "Places "+str(semestre)]
     if places.empty:
         return None
@@ -156,6 +183,8 @@ def get_nombre_places_prises(df:pd.DataFrame, nom_du_partenaire:str, semestre:st
     
     if not semestre_est_valide(semestre):
         return None
+    if isinstance(df, EtatUniversites):
+        return df.get_nombre_places_prises(nom_du_partenaire, semestre)
     places = df.loc[df["nom_partenaire"] == nom_du_partenaire, "Places Prises "+str(semestre)]
     if places.empty:
         return None
@@ -175,7 +204,9 @@ def place_est_disponible(df_univ:pd.DataFrame, nom_du_partenaire:str, semestre:s
         bool: True si il y a au moins une place
         bool: False si il y a 0 place ou que la donnée est manquante
     """
-    if not semestre_est_valide(semestre) or get_nb_places_disponibles(df_univ, nom_du_partenaire, semestre) == None:
+    if isinstance(df_univ, EtatUniversites) and semestre_est_valide(semestre):
+        res = df_univ.place_est_disponible(nom_du_partenaire, semestre)
+    elif not semestre_est_valide(semestre) or get_nb_places_disponibles(df_univ, nom_du_partenaire, semestre) == None:
         res = None
     elif get_nb_places_disponibles(df_univ, nom_du_partenaire, semestre) > 0:
         res = True
@@ -191,6 +222,11 @@ def incrementer_places_prise(df_univ:pd.DataFrame, nom_du_partenaire:str, semest
         nom_du_partenaire: Le nom de l'université
 
     """
+    if isinstance(df_univ, EtatUniversites):
+        if semestre_est_valide(semestre):
+            df_univ.incrementer_places_prise(nom_du_partenaire, semestre)
+        return
+
     # Filtrage des lignes correspondantes
     mask = df_univ["nom_partenaire"] == nom_du_partenaire
 
@@ -247,7 +283,17 @@ def convertir_colonne_en_tuple(df:pd.DataFrame, colonne:str):
         colonne: La colonne à traiter
 
     """
-    df[colonne] = df[colonne].apply(lambda x: tuple(map(str.strip, x.split(";"))) if pd.notna(x) else x)
+    # Découpage et retrait des espaces vectorisés, puis un tuple par cellule renseignée
+    debuts, noms, renseignee = eclater_choix(df[colonne])
+    # Les voeux vides en fin de cellule ("A; B; ") sont retirés, comme la longueur des voeux dans le moteur rapide
+    non_vides = np.flatnonzero(noms != "")
+    fins = debuts[:-1].copy()
+    np.maximum.at(fins, np.searchsorted(debuts, non_vides, side="right") - 1, non_vides + 1)
+    noms = noms.tolist()
+    df[colonne] = pd.Series(
+        [tuple(noms[debut:fin]) if r else x for debut, fin, r, x in zip(debuts[:-1].tolist(), fins.tolist(), renseignee.tolist(), df[colonne].tolist())],
+        index=df.index, dtype=object
+    )
 
 def get_universite_la_moins_remplie(df_univ: pd.DataFrame, choix: tuple | list, semestre: str, calcul_completion: str = "Taux") -> str:
     """Retourne un str correspondant à l'université la moins remplie selon la méthode de calcul. Si elles sont toutes remplies, la première de la liste|tuple est renvoyée.
@@ -264,14 +310,19 @@ def get_universite_la_moins_remplie(df_univ: pd.DataFrame, choix: tuple | list,
     if not choix:
         return ""
 
+    if calcul_completion == "Taux":
+        mesure_completion = get_taux_completion_places
+    else:
+        mesure_completion = get_nombre_places_prises
+
+    # La complétion du meilleur candidat est gardée en mémoire plutôt que recalculée à chaque comparaison
     univ_la_moins_rempli = choix[0]
+    completion_min = mesure_completion(df_univ, univ_la_moins_rempli, semestre)
     for courant in choix[1:]:
-        if calcul_completion == "Taux":
-            if get_taux_completion_places(df_univ, courant, semestre) < get_taux_completion_places(df_univ, univ_la_moins_rempli, semestre):
-                univ_la_moins_rempli = courant
-        else:
-            if get_nombre_places_prises(df_univ, courant, semestre) < get_nombre_places_prises(df_univ, univ_la_moins_rempli, semestre):
-                univ_la_moins_rempli = courant
+        completion = mesure_completion(df_univ, courant, semestre)
+        if completion < completion_min:
+            univ_la_moins_rempli = courant
+            completion_min = completion
 
     return univ_la_moins_rempli
 
@@ -286,6 +337,14 @@ def get_liste_univ_compatible(df_univ:pd.DataFrame, semestre:str, specialite:str
         res: la liste des universités qui sont compatibles avec la spécialité et le semestre en paramètre.
     """
     
+    if isinstance(df_univ, EtatUniversites):
+        return df_univ.get_liste_univ_compatible(semestre, specialite)
+    col_masque = f"Masque Specialites {semestre}"
+    if col_masque in df_univ.columns:
+        if specialite not in BIT_SPECIALITE:
+            return []
+        mask = (df_univ[col_masque].to_numpy(dtype=np.uint8) & BIT_SPECIALITE[specialite]) != 0
+        return df_univ.loc[mask, "nom_partenaire"].tolist()
     col = f"Specialites Compatibles {semestre}"
     mask = df_univ[col].apply(lambda lst: specialite in lst if isinstance(lst, list) else False)
     return df_univ.loc[mask, "nom_partenaire"].tolist()
@@ -302,11 +361,17 @@ def get_depuis_df_univ_prioritaire_avec_place_niveau_spe(df_univ:pd.DataFrame, n
         res: le nom de l'université qui est la moins remplie en considérant d'abord les univ prioritaire ou une chaine vide si aucune n'est disponible.
     """
     res = ""
+    if isinstance(df_univ, EtatUniversites):
+        # Les arbres de l'état donnent directement la moins remplie parmi les compatibles avec place et au niveau
+        res = df_univ.get_univ_la_moins_remplie_compatible(semestre, specialite, note_etudiant, calcul_completion)
+        if res == "":
+            logger_debug.debug("Aucune univ compatible avec place et niveau pour %s", note_etudiant)
+        return res
     liste_univ_compatibles = get_liste_univ_compatible(df_univ, semestre, specialite)
     if liste_univ_compatibles != []:
         res = get_depuis_liste_univ_prioritaire_avec_place_et_niveau(df_univ, liste_univ_compatibles, note_etudiant, semestre, calcul_completion)
     else:
-        logger_debug.debug(f"Aucune univ compatible pour {note_etudiant}")
+        logger_debug.debug("Aucune univ compatible pour %s", note_etudiant)
     return res
 
 def scinder_liste_univ_par_prio(df_univ, liste_choix, semestre): 
@@ -321,6 +386,15 @@ def scinder_liste_univ_par_prio(df_univ, liste_choix, semestre):
     """
     liste_prioritaires = []
     liste_non_prioritaires = []
+
+    if isinstance(df_univ, EtatUniversites):
+        for nom in liste_choix:
+            prioritaire = df_univ.est_prioritaire(nom, semestre)
+            if prioritaire is True:
+                liste_prioritaires.append(nom)
+            elif prioritaire is False:
+                liste_non_prioritaires.append(nom)
+        return liste_prioritaires, liste_non_prioritaires
     
     for nom in liste_choix:
         ligne = df_univ[df_univ["nom_partenaire"] == nom]
@@ -379,12 +453,12 @@ def get_depuis_liste_univ_prioritaire_avec_place_et_niveau(df_univ:pd.DataFrame,
     if univ_prio_la_moins_remplie != "":
         res = univ_prio_la_moins_remplie
     else:
-        logger_debug.debug(f"pas de place disponible dans les univ prio pour note = {note_etudiant}")
+        logger_debug.debug("pas de place disponible dans les univ prio pour note = %s", note_etudiant)
         univ_non_prio_la_moins_remplie = get_universite_la_moins_remplie(df_univ, univ_non_prioritaires, semestre, calcul_completion)
         if univ_non_prio_la_moins_remplie != "":
             res = univ_non_prio_la_moins_remplie
         else:
-            logger_debug.debug(f"pas de places dispo dans les univ non prio pour etudiant {note_etudiant}")
+            logger_debug.debug("pas de places dispo dans les univ non prio pour etudiant %s", note_etudiant)
     return res
 
 def etudiant_a_niveau_requis(df_univ:pd.DataFrame, note_etudiant:float, nom_du_partenaire:str, semestre:str):
@@ -399,6 +473,8 @@ def etudiant_a_niveau_requis(df_univ:pd.DataFrame, note_etudiant:float, nom_du_p
     Returns:
         res: True si l'étudiant a le niveau requis ou qu'aucun niveau n'est précisé, False le cas échéant.
     """
+    if isinstance(df_univ, EtatUniversites):
+        return df_univ.etudiant_a_niveau_requis(note_etudiant, nom_du_partenaire, semestre)
     res = True
     note_min_univ = df_univ.loc[df_univ["nom_partenaire"] == nom_du_partenaire, "Note Min "+str(semestre)]
     note_min_valeur = note_min_univ.values[0] if not note_min_univ.empty else None
@@ -406,50 +482,80 @@ def etudiant_a_niveau_requis(df_univ:pd.DataFrame, note_etudiant:float, nom_du_p
         res = False
     return res
 
-def traiter_etudiant_semestre(row, df_univ, semestre, limite_ordre, calcul_completion):
+def traiter_etudiant_semestre(row, df_univ, semestre, limite_ordre, calcul_completion, statistiques=None):
     # Préparer un mapping dynamique des noms
     col_choix = f"Choix_{semestre}"
     id_etudiant = getattr(row, "Id_Etudiant", None)
     tuple_choix = getattr(row, col_choix, None)
     note_etudiant = getattr(row, "Note", None)
+    # Instrumentation optionnelle : sans statistiques, seul ce booléen est testé
+    mesurer = statistiques is not None
 
     if (
         not tuple_choix
         or not isinstance(tuple_choix, tuple)
         or all(not str(choix).strip() for choix in tuple_choix)
     ):
-        logger_general.info(f"{id_etudiant} n'a pas fait de choix pour le {semestre}")
-        logger_debug.debug(f"{id_etudiant} n'a pas fait de choix pour le {semestre}")
+        logger_general.info("%s n'a pas fait de choix pour le %s", id_etudiant, semestre)
+        logger_debug.debug("%s n'a pas fait de choix pour le %s", id_etudiant, semestre)
+        logger_decisions.info("%s;%s;%s", id_etudiant, semestre, CODE_SANS_VOEU)
+        if mesurer:
+            statistiques.enregistrer(semestre, "sans_voeu", True)
         return np.nan
 
     # Scénario 1 : Voeux ordonnés
-    for i, choix in enumerate(tuple_choix[:limite_ordre]):
+    if mesurer:
+        debut = time.perf_counter()
+    voeux_ordonnes = tuple_choix[:limite_ordre]
+    for i, choix in enumerate(voeux_ordonnes):
         if place_est_disponible(df_univ, choix, semestre) and etudiant_a_niveau_requis(df_univ, note_etudiant, choix, semestre):
-            logger_general.info(f"{id_etudiant} obtient le choix {choix} (ordre {i+1}) pour le {semestre}")
+            logger_general.info("%s obtient le choix %s (ordre %d) pour le %s", id_etudiant, choix, i+1, semestre)
+            logger_decisions.info("%s;%s;%s%d", id_etudiant, semestre, CODE_VOEU_ORDONNE, i+1)
+            if mesurer:
+                statistiques.enregistrer(semestre, "scenario_1", True, time.perf_counter() - debut, i + 1, i + 1)
             return choix
         else:
-            logger_general.info(f"{id_etudiant} n'obtient pas le choix {choix} pour {semestre} dans scénario 1")
-            logger_debug.debug(f"{id_etudiant} n'obtient pas le choix {choix} pour {semestre} dans scénario 1")
+            logger_general.info("%s n'obtient pas le choix %s pour %s dans scénario 1", id_etudiant, choix, semestre)
+            logger_debug.debug("%s n'obtient pas le choix %s pour %s dans scénario 1", id_etudiant, choix, semestre)
+    if mesurer and voeux_ordonnes:
+        statistiques.enregistrer(semestre, "scenario_1", False, time.perf_counter() - debut, len(voeux_ordonnes), len(voeux_ordonnes))
 
     # Scénario 2 : Choix restants
     choix_restants = tuple_choix[limite_ordre:]
     if choix_restants:
+        if mesurer:
+            debut = time.perf_counter()
         univ_choisie = get_depuis_liste_univ_prioritaire_avec_place_et_niveau(df_univ, choix_restants, note_etudiant, semestre, calcul_completion)
+        if mesurer:
+            statistiques.enregistrer(semestre, "scenario_2", univ_choisie != "", time.perf_counter() - debut, len(choix_restants), len(choix_restants))
         if univ_choisie != "":
-            logger_general.info(f"{id_etudiant} obtient {univ_choisie} via les choix non ordonnés pour {semestre}")
+            logger_general.info("%s obtient %s via les choix non ordonnés pour %s", id_etudiant, univ_choisie, semestre)
+            logger_decisions.info("%s;%s;%s", id_etudiant, semestre, CODE_VOEU_NON_ORDONNE)
             return univ_choisie
         else:
-            logger_general.info(f"{id_etudiant} n'obtient pas un des choix pour {semestre} dans scénario 2")
+            logger_general.info("%s n'obtient pas un des choix pour %s dans scénario 2", id_etudiant, semestre)
 
     # Scénario 3 : Aucune des options précédentes
     specialite = getattr(row, "Specialite", None)
 
+    if mesurer:
+        debut = time.perf_counter()
     univ_fallback = get_depuis_df_univ_prioritaire_avec_place_niveau_spe(df_univ, note_etudiant, semestre, specialite, calcul_completion)
+    if mesurer:
+        duree = time.perf_counter() - debut
+        # Avec l'état indexé, le scénario 3 est une requête sur les arbres des partenaires compatibles, sinon un parcours de ces partenaires
+        nb_compatibles = len(get_liste_univ_compatible(df_univ, semestre, specialite))
+        recherches = 1 if isinstance(df_univ, EtatUniversites) else nb_compatibles
+        statistiques.enregistrer(semestre, "scenario_3", univ_fallback != "", duree, recherches, nb_compatibles)
     if univ_fallback != "":
-        logger_general.info(f"{id_etudiant} affecté par fallback à {univ_fallback} pour {semestre}")
+        logger_general.info("%s affecté par fallback à %s pour %s", id_etudiant, univ_fallback, semestre)
+        logger_decisions.info("%s;%s;%s", id_etudiant, semestre, CODE_FALLBACK)
         return univ_fallback
     
-    logger_general.info(f"Aucune attribution possible pour {id_etudiant} au {semestre}")
+    logger_general.info("Aucune attribution possible pour %s au %s", id_etudiant, semestre)
+    logger_decisions.info("%s;%s;%s", id_etudiant, semestre, CODE_AUCUNE)
+    if mesurer:
+        statistiques.enregistrer(semestre, "aucune", True)
     return np.nan
 
 def tri_df_etudiant_semestre_ponderation(df_etudiants:pd.DataFrame, alpha=0.05):
@@ -474,7 +580,6 @@ def tri_df_etudiant_semestre_ponderation(df_etudiants:pd.DataFrame, alpha=0.05):
         .notna()
         .sum(axis=1)
     )
-    print(df_etudiants['Nb_semestres_demandes'])
 
     # Calcul de la priorité
     df_etudiants['Priorite'] = (df_etudiants['Rang'] / total_etudiants) + alpha * (df_etudiants['Nb_semestres_demandes'] - 1)
@@ -488,7 +593,94 @@ def tri_df_etudiant_semestre_ponderation(df_etudiants:pd.DataFrame, alpha=0.05):
     return df_etudiants_sorted
 
 
-def traitement_scenario_hybride(df_univ:pd.DataFrame, df_etudiants:pd.DataFrame, limite_ordre:int=0, calcul_completion:str="Taux"):
+def preparer_df_etudiants(df_etudiants:pd.DataFrame, semestres:list[str]=["S8", "S9"]):
+    """Prépare sur place le df des étudiants pour l'affectation : choix en tuples, colonnes renommées avec des _ et colonnes résultat.
+    
+    Args:
+        df_etudiants: Le dataframe des choix des étudiants
+        semestres: Les semestres à préparer
+    """
+    # Convertir les colonnes de choix en tuples
+    for semestre in semestres:
+        convertir_colonne_en_tuple(df_etudiants, f"Choix {semestre}")
+        logger_general.info("Conversion colonne Choix %s en tuple réussie", semestre)
+
+    df_etudiants.columns = df_etudiants.columns.str.replace(" ", "_")
+    
+    # Initialisation des colonnes résultat avec dtype=object pour éviter les FutureWarnings
+    for semestre in semestres:
+        col_final = f"choix_final {semestre}"
+        if col_final not in df_etudiants.columns:
+            df_etudiants[col_final] = pd.Series([np.nan] * len(df_etudiants), dtype=object)
+        else:
+            df_etudiants[col_final] = df_etudiants[col_final].astype(object)
+
+def _passe_semestre(moteur:str, etat_univ:EtatUniversites, donnees, semestre:str, limite_ordre:int, calcul_completion:str,
+                    statistiques:StatistiquesAffectation | None=None):
+    """Affecte tous les étudiants pour un seul semestre, dans l'ordre de priorité.
+
+    Args:
+        donnees: La cohorte encodée (moteur rapide) ou le df préparé des étudiants (moteur de référence).
+
+    Returns:
+        tuple: (ids obtenus int32, places prises du semestre, statistiques)
+    """
+    if moteur == "rapide":
+        ids_obtenus = affecter_semestre(donnees, etat_univ, semestre, limite_ordre, calcul_completion, statistiques=statistiques)
+    else:
+        ids_obtenus = np.full(len(donnees), -1, dtype=np.int32)
+        for position, row in enumerate(donnees.itertuples(index=True)):
+            choix_final = traiter_etudiant_semestre(row, etat_univ, semestre, limite_ordre, calcul_completion, statistiques)
+            if pd.notna(choix_final):
+                incrementer_places_prise(etat_univ, choix_final, semestre)
+                ids_obtenus[position] = etat_univ.get_id(choix_final)
+    return ids_obtenus, etat_univ.places_prises[semestre], statistiques
+
+
+def _passe_semestre_processus(moteur, etat_univ, donnees, semestre, limite_ordre, calcul_completion, avec_statistiques):
+    detacher_journalisation()
+    statistiques = StatistiquesAffectation() if avec_statistiques else None
+    return _passe_semestre(moteur, etat_univ, donnees, semestre, limite_ordre, calcul_completion, statistiques)
+
+
+def _semestres_en_parallele(moteur:str, etat_univ:EtatUniversites, cohorte, df_etudiants:pd.DataFrame, semestres:list[str],
+                            limite_ordre:int, calcul_completion:str, statistiques:StatistiquesAffectation | None) -> dict:
+    """Affecte chaque semestre dans sa propre tâche et reporte les places prises dans etat_univ.
+
+    Les semestres ne partagent aucune place et chaque décision ne dépend que de l'ordre des étudiants : le résultat est celui
+    de la boucle entrelacée. Le moteur rapide compilé par numba relâche le GIL, il tourne dans des threads sur le même état ;
+    sinon chaque semestre part dans un processus avec sa copie de l'état et de sa colonne de voeux.
+
+    Returns:
+        res: semestre -> ids obtenus
+    """
+    if moteur == "rapide" and noyau_compile() is not None:
+        with ThreadPoolExecutor(max_workers=len(semestres)) as executor:
+            taches = {semestre: executor.submit(_passe_semestre, moteur, etat_univ, cohorte, semestre, limite_ordre, calcul_completion, statistiques)
+                      for semestre in semestres}
+        return {semestre: tache.result()[0] for semestre, tache in taches.items()}
+
+    colonnes = [colonne for colonne in ["Id_Etudiant", "Specialite", "Note"] if colonne in df_etudiants.columns]
+    with ProcessPoolExecutor(max_workers=len(semestres)) as executor:
+        taches = {}
+        for semestre in semestres:
+            donnees = cohorte if moteur == "rapide" else df_etudiants[colonnes + [f"Choix_{semestre}"]]
+            taches[semestre] = executor.submit(_passe_semestre_processus, moteur, etat_univ, donnees, semestre, limite_ordre, calcul_completion,
+                                               statistiques is not None)
+        res = {}
+        for semestre, tache in taches.items():
+            ids_obtenus, places_prises, statistiques_semestre = tache.result()
+            etat_univ.places_prises[semestre][:] = places_prises
+            if statistiques is not None:
+                statistiques.fusionner(statistiques_semestre)
+            res[semestre] = ids_obtenus
+    return res
+
+
+def traitement_scenario_hybride(df_univ:pd.DataFrame, df_etudiants:pd.DataFrame, limite_ordre:int=0, calcul_completion:str="Taux", moteur:str="reference",
+                                statistiques:StatistiquesAffectation | None=None, rappel_progression=None, evenement_annulation=None,
+                                fichier_reprise:str | None=None, intervalle_reprise:int=INTERVALLE_REPRISE, reprise_obligatoire:bool=False,
+                                semestres_en_parallele:bool=False, composantes_en_parallele:bool=False):
     """Retourne un df correspondant aux affectations de chaque étudiant 
     à un seul choix pour les semestres qu'il a choisi selon un scénario hybride entre le classement et la complétion des partenaires.
     
@@ -497,42 +689,191 @@ def traitement_scenario_hybride(df_univ:pd.DataFrame, df_etudiants:pd.DataFrame,
         df_etudiants: Le dataframe des choix des étudiants
         limite_ordre: Le nombre de voeux qui sont ordonnés (entre 0 et 5), exemple : limite_ordre = 2, on traite les 2 premiers voeux dans l'ordre, et si il ne sont pas disponibles, on choisi un des autres voeux de manière à maximiser la complétion.
         calcul_completion: Un str qui va donner la méthode de calcule de la complétion, "Taux" calcule selon le rapport entre le total de place disponible et le nombre de places prises et choisi le partenaire avec le taux le plus bas. "Places Prises" regarde seulement combien de places sont prises et choisi ceux avec le moins de places prises.
+        moteur: "reference" traite chaque étudiant avec traiter_etudiant_semestre, "rapide" applique les mêmes scénarios sur des tableaux d'entiers (compilés avec numba s'il est installé) et donne un résultat identique.
+            "optimal" (nécessite scipy) calcule à la place, pour chaque semestre, l'affectation de coût minimal selon le rang des voeux, la priorité des étudiants
+            et le caractère prioritaire des partenaires (voir affectation_optimale.py) ; calcul_completion n'est pas utilisé. Le résultat a le même format,
+            calculer_indicateurs permet de le comparer à celui des scénarios.
+            "acceptation_differee" calcule une affectation stable où les partenaires classent leurs candidats selon l'ordre de priorité
+            (voir acceptation_differee.py) ; calcul_completion n'est pas utilisé non plus.
+        statistiques: Si une instance de StatistiquesAffectation est passée, elle est complétée avec les compteurs et les temps de chaque scénario par semestre (les temps par scénario ne sont mesurés que par le moteur de référence).
+        rappel_progression: Fonction appelée régulièrement avec (semestre, nombre d'étudiants traités, nombre total d'étudiants), par exemple pour une barre de progression.
+        evenement_annulation: Un threading.Event (ou tout objet avec is_set()) consulté entre deux étudiants ou deux lots : s'il est déclenché, l'affectation s'arrête et AffectationAnnulee est levée, sans modifier df_univ.
+        fichier_reprise: Si fourni, les places prises, la position atteinte dans chaque semestre et les affectations déjà faites y sont enregistrées
+            tous les intervalle_reprise étudiants (et à l'annulation). Si le fichier existe et correspond aux mêmes entrées et paramètres,
+            l'affectation reprend là où elle s'était arrêtée, avec le même résultat. Le fichier est supprimé une fois l'affectation terminée.
+            Les statistiques ne couvrent alors que les étudiants traités depuis la reprise.
+        intervalle_reprise: Le nombre d'étudiants entre deux enregistrements du point de reprise.
+        reprise_obligatoire: Lever une erreur plutôt que de repartir du début si fichier_reprise est absent ou ne correspond pas aux entrées.
+        semestres_en_parallele: Affecter chaque semestre dans sa propre tâche (threads pour le moteur rapide compilé par numba, processus sinon),
+            avec le même résultat. Non compatible avec la progression, l'annulation et la reprise ; les logs des processus ne sont pas écrits
+            dans les fichiers du processus principal.
+        composantes_en_parallele: Moteur rapide uniquement : découper chaque semestre en groupes d'étudiants qui ne consultent jamais les mêmes
+            partenaires (voir composantes.py) et affecter ces groupes dans des tâches parallèles, avec le même résultat.
+            Mêmes restrictions que semestres_en_parallele.
 
     Returns:
         df_res: le dataframe correspondant aux affectations de chaque étudiant 
-    à un seul choix pour les semestres qu'il a choisi.
+    à un seul choix pour les semestres qu'il a choisi. df_res.attrs["voeux_inconnus"] donne, pour chaque semestre,
+    les noms de voeux absents des partenaires et leur nombre d'occurrences.
     """
     
     # Validation des paramètres
     limite_ordre = min(max(limite_ordre, 0), 5)
     calcul_completion = calcul_completion if calcul_completion in ["Taux", "Places Prises"] else "Taux"
+    if moteur not in ["reference", "rapide", *MOTEURS_PAR_SEMESTRE]:
+        raise ValueError(f"Moteur d'affectation inconnu : {moteur}")
+    if moteur in MOTEURS_PAR_SEMESTRE and (fichier_reprise is not None or semestres_en_parallele or composantes_en_parallele):
+        raise ValueError(f"Le moteur {moteur} ne gère ni la reprise, ni l'affectation en parallèle")
+    if (semestres_en_parallele or composantes_en_parallele) and (rappel_progression is not None or evenement_annulation is not None or fichier_reprise is not None):
+        raise ValueError("L'affectation en parallèle ne gère ni la progression, ni l'annulation, ni la reprise")
+    if composantes_en_parallele and moteur != "rapide":
+        raise ValueError("L'affectation par composantes nécessite le moteur rapide")
     semestres = ["S8", "S9"]
 
-    # Convertir les colonnes de choix en tuples
-    for semestre in semestres:
-        convertir_colonne_en_tuple(df_etudiants, f"Choix {semestre}")
-        logger_general.info(f"Conversion colonne Choix {semestre} en tuple réussie")
+    # Les places sont suivies dans un état indexé, le df des universités n'est mis à jour qu'à la fin
+    etat_univ = EtatUniversites(df_univ, semestres)
 
-    df_etudiants.columns = df_etudiants.columns.str.replace(" ", "_")
-    
-    # Initialisation des colonnes résultat avec dtype=object pour éviter les FutureWarnings
-    for semestre in semestres:
-        col_final = f"choix_final {semestre}"
-        if col_final not in df_etudiants.columns:
-            df_etudiants[col_final] = pd.Series([np.nan] * len(df_etudiants), dtype=object)
-        else:
-            df_etudiants[col_final] = df_etudiants[col_final].astype(object)
+    # L'encodage (vectorisé, sur le texte brut des voeux) recense et signale aussi les voeux qui ne correspondent à aucun partenaire
+    cohorte = encoder_cohorte(df_etudiants, etat_univ, semestres)
+
+    preparer_df_etudiants(df_etudiants, semestres)
+    df_etudiants.attrs["voeux_inconnus"] = cohorte.voeux_inconnus
 
-    for row in df_etudiants.itertuples(index=True):
+    if composantes_en_parallele:
+        for semestre in semestres:
+            ids_obtenus = affecter_semestre_par_composantes(cohorte, etat_univ, semestre, limite_ordre, calcul_completion, statistiques=statistiques)
+            df_etudiants[f"choix_final {semestre}"] = ids_vers_noms(etat_univ, ids_obtenus, df_etudiants.index)
+        etat_univ.ecrire_dans_df(df_univ)
+        return df_etudiants
+
+    if moteur in MOTEURS_PAR_SEMESTRE:
+        # Chaque semestre est résolu d'un bloc : la progression et l'annulation ne sont suivies qu'entre deux semestres
+        for semestre in semestres:
+            if evenement_annulation is not None and evenement_annulation.is_set():
+                logger_general.info("Affectation annulée")
+                raise AffectationAnnulee("Affectation annulée")
+            ids_obtenus = MOTEURS_PAR_SEMESTRE[moteur](cohorte, etat_univ, semestre, limite_ordre, statistiques=statistiques)
+            df_etudiants[f"choix_final {semestre}"] = ids_vers_noms(etat_univ, ids_obtenus, df_etudiants.index)
+            if rappel_progression is not None:
+                rappel_progression(semestre, len(df_etudiants), len(df_etudiants))
+        etat_univ.ecrire_dans_df(df_univ)
+        return df_etudiants
+
+    if semestres_en_parallele:
+        ids_obtenus = _semestres_en_parallele(moteur, etat_univ, cohorte, df_etudiants, semestres, limite_ordre, calcul_completion, statistiques)
         for semestre in semestres:
+            df_etudiants[f"choix_final {semestre}"] = ids_vers_noms(etat_univ, ids_obtenus[semestre], df_etudiants.index)
+        etat_univ.ecrire_dans_df(df_univ)
+        return df_etudiants
+
+    n = len(df_etudiants)
+    suivi = rappel_progression is not None or evenement_annulation is not None
+
+    reprise = None
+    if fichier_reprise is not None:
+        empreinte = empreinte_affectation(cohorte, etat_univ, limite_ordre, calcul_completion)
+        reprise = PointDeReprise.charger(fichier_reprise)
+        if reprise is not None and reprise.empreinte == empreinte:
+            reprise.restaurer(etat_univ)
+            logger_general.info("Reprise de l'affectation depuis %s, étudiants déjà traités : %s", fichier_reprise, reprise.positions)
+        elif reprise_obligatoire:
+            raise ValueError(f"Aucun point de reprise correspondant à ces entrées : {fichier_reprise}")
+        else:
+            if reprise is not None:
+                logger_general.warning("Le point de reprise %s ne correspond pas aux entrées, l'affectation repart du début", fichier_reprise)
+            reprise = PointDeReprise.depart(empreinte, limite_ordre, calcul_completion, etat_univ, n)
+    positions = dict(reprise.positions) if reprise is not None else {semestre: 0 for semestre in semestres}
+
+    def enregistrer_reprise(positions_atteintes:dict):
+        if reprise is not None:
+            reprise.capturer(etat_univ, positions_atteintes)
+            reprise.enregistrer(fichier_reprise)
+
+    def verifier_annulation(positions_atteintes:dict):
+        if evenement_annulation is not None and evenement_annulation.is_set():
+            enregistrer_reprise(positions_atteintes)
+            logger_general.info("Affectation annulée")
+            raise AffectationAnnulee("Affectation annulée")
+
+    def terminer():
+        if fichier_reprise is not None and os.path.exists(fichier_reprise):
+            os.remove(fichier_reprise)
+        etat_univ.ecrire_dans_df(df_univ)
+
+    if moteur == "rapide":
+        # Les semestres ne partagent aucune place : les traiter l'un après l'autre donne le même résultat
+        taille_lot = TAILLE_LOT_PROGRESSION_RAPIDE if suivi else n
+        if reprise is not None:
+            taille_lot = min(taille_lot, intervalle_reprise)
+        taille_lot = max(taille_lot, 1)
+        for semestre in semestres:
+            ids_obtenus = reprise.resultats[semestre] if reprise is not None else cohorte.resultats[semestre]
+            for debut in range(positions[semestre], n, taille_lot):
+                verifier_annulation({semestre: debut})
+                fin = min(debut + taille_lot, n)
+                affecter_semestre(cohorte, etat_univ, semestre, limite_ordre, calcul_completion,
+                                  resultat=ids_obtenus, debut=debut, fin=fin, statistiques=statistiques)
+                enregistrer_reprise({semestre: fin})
+                if rappel_progression is not None:
+                    rappel_progression(semestre, fin, n)
+            df_etudiants[f"choix_final {semestre}"] = ids_vers_noms(etat_univ, ids_obtenus, df_etudiants.index)
+        terminer()
+        return df_etudiants
+
+    # Les deux semestres d'un étudiant sont traités ensemble : la progression avance au même rythme pour chacun
+    debut = min(positions.values(), default=0)
+    for traites, row in enumerate(df_etudiants.iloc[debut:].itertuples(index=True), start=debut):
+        if reprise is not None and traites > debut and traites % intervalle_reprise == 0:
+            enregistrer_reprise({semestre: max(positions[semestre], traites) for semestre in semestres})
+        if suivi and traites % PAS_PROGRESSION_REFERENCE == 0:
+            verifier_annulation({semestre: max(positions[semestre], traites) for semestre in semestres})
+            if rappel_progression is not None:
+                for semestre in semestres:
+                    rappel_progression(semestre, traites, n)
+        for semestre in semestres:
+            if traites < positions[semestre]:
+                continue
             choix_final = traiter_etudiant_semestre(
                 row=row,
-                df_univ=df_univ,
+                df_univ=etat_univ,
                 semestre=semestre,
                 limite_ordre=limite_ordre,
-                calcul_completion=calcul_completion
+                calcul_completion=calcul_completion,
+                statistiques=statistiques
             )
             if pd.notna(choix_final):
                 df_etudiants.at[row.Index, f"choix_final {semestre}"] = choix_final
-                incrementer_places_prise(df_univ, choix_final, semestre)
-    return df_etudiants
\ No newline at end of file
+                incrementer_places_prise(etat_univ, choix_final, semestre)
+                if reprise is not None:
+                    reprise.resultats[semestre][traites] = etat_univ.get_id(choix_final)
+
+    if reprise is not None:
+        # Les affectations faites avant la reprise ne sont connues que par leurs ids
+        for semestre in semestres:
+            df_etudiants[f"choix_final {semestre}"] = ids_vers_noms(etat_univ, reprise.resultats[semestre], df_etudiants.index)
+
+    if rappel_progression is not None:
+        for semestre in semestres:
+            rappel_progression(semestre, n, n)
+    terminer()
+    return df_etudiants
+
+
+def reprendre_traitement(df_univ:pd.DataFrame, df_etudiants:pd.DataFrame, fichier_reprise:str, moteur:str="rapide", **options):
+    """Reprend une affectation interrompue depuis son point de reprise, avec le nombre de voeux ordonnés et le calcul de complétion qui y sont enregistrés.
+
+    Args:
+        df_univ: Le dataframe des universités partenaires, tel qu'au lancement de l'affectation interrompue.
+        df_etudiants: Le dataframe trié des étudiants, tel qu'au lancement de l'affectation interrompue.
+        fichier_reprise: Le fichier de reprise de l'affectation interrompue.
+        moteur: Le moteur qui termine l'affectation ("reference" ou "rapide", au choix : le résultat est le même).
+        options: Les autres arguments de traitement_scenario_hybride (statistiques, rappel_progression...).
+
+    Returns:
+        df_res: le même résultat que traitement_scenario_hybride sans interruption.
+    """
+    reprise = PointDeReprise.charger(fichier_reprise)
+    if reprise is None:
+        raise FileNotFoundError(f"Aucun point de reprise lisible : {fichier_reprise}")
+    return traitement_scenario_hybride(df_univ, df_etudiants, reprise.limite_ordre, reprise.calcul_completion, moteur=moteur,
+                                       fichier_reprise=fichier_reprise, reprise_obligatoire=True, **options)
\ No newline at end of file
@@ -0,0 +1,126 @@
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+# Codes utilisés dans la matrice des choix
+CHOIX_VIDE = -1
+CHOIX_INCONNU = -2
+
+
+def _pyarrow_disponible() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def eclater_choix(serie_choix:pd.Series) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Découpe une colonne de voeux "A; B; C" sur les ; et retire les espaces autour de chaque nom, par opérations vectorisées
+    (calcul Arrow si pyarrow est installé, accesseur .str de pandas sinon).
+
+    Returns:
+        tuple: (debuts int64 (n + 1), noms object, renseignee bool (n)) : les noms de la cellule i sont noms[debuts[i]:debuts[i + 1]],
+        voeux vides compris ; une cellule vide (NaN) n'a aucun nom et renseignee[i] vaut False.
+    """
+    renseignee = serie_choix.notna().to_numpy()
+    if not renseignee.any():
+        return np.zeros(len(serie_choix) + 1, dtype=np.int64), np.empty(0, dtype=object), renseignee
+
+    if _pyarrow_disponible():
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        listes = pc.split_pattern(pa.array(serie_choix, type=pa.string(), from_pandas=True), ";")
+        debuts = listes.offsets.to_numpy().astype(np.int64)
+        noms = pc.utf8_trim_whitespace(listes.flatten()).to_numpy(zero_copy_only=False).astype(object)
+        return debuts, noms, renseignee
+
+    listes = serie_choix[renseignee].str.split(";")
+    debuts = np.zeros(len(serie_choix) + 1, dtype=np.int64)
+    debuts[1:][renseignee] = listes.str.len().to_numpy(dtype=np.int64)
+    debuts = np.cumsum(debuts)
+    noms = listes.explode().str.strip().to_numpy(dtype=object)
+    return debuts, noms, renseignee
+
+
+def _contient_des_tuples(serie_choix:pd.Series) -> bool:
+    renseignees = serie_choix.dropna()
+    return len(renseignees) > 0 and isinstance(renseignees.iloc[0], tuple)
+
+
+def decouper_choix(serie_choix:pd.Series) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Retourne les voeux non vides d'une colonne au format long : (ligne, position du voeu, nom).
+
+    La colonne peut contenir le texte brut "A; B" ou les tuples produits par convertir_colonne_en_tuple ;
+    la position d'un voeu est son rang dans la cellule (les voeux vides comptent dans les positions).
+    """
+    valeurs = serie_choix.tolist()
+    if _contient_des_tuples(serie_choix):
+        longueurs = np.asarray([len(valeur) if isinstance(valeur, tuple) else 0 for valeur in valeurs], dtype=np.int64)
+        debuts = np.concatenate([[0], np.cumsum(longueurs)])
+        noms = np.fromiter(chain.from_iterable(valeur for valeur in valeurs if isinstance(valeur, tuple)), dtype=object, count=debuts[-1])
+        noms = pd.Series(noms, dtype=object).str.strip().to_numpy(dtype=object)
+    else:
+        debuts, noms, _ = eclater_choix(serie_choix)
+
+    lignes = np.repeat(np.arange(len(valeurs), dtype=np.int64), np.diff(debuts))
+    positions = np.arange(len(noms), dtype=np.int64) - debuts[lignes]
+    non_vides = pd.notna(noms) & (noms != "")
+    return lignes[non_vides], positions[non_vides], noms[non_vides]
+
+
+def _decouper_et_joindre_arrow(serie_choix:pd.Series, index_noms:pd.Index):
+    """Découpage et jointure entièrement en Arrow pour une colonne de texte brut : seuls les noms inconnus deviennent des objets Python."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    listes = pc.split_pattern(pa.array(serie_choix, type=pa.string(), from_pandas=True), ";")
+    noms = pc.utf8_trim_whitespace(listes.flatten())
+    lignes = pc.list_parent_indices(listes).to_numpy().astype(np.int64)
+    positions = np.arange(len(noms), dtype=np.int64) - listes.offsets.to_numpy().astype(np.int64)[lignes]
+
+    non_vides = pc.not_equal(noms, "")
+    noms = noms.filter(non_vides)
+    non_vides = non_vides.to_numpy(zero_copy_only=False)
+    ids = pc.index_in(noms, value_set=pa.array(index_noms.to_numpy(dtype=object), type=pa.string())).to_numpy(zero_copy_only=False)
+    ids = np.where(np.isnan(ids), -1, ids).astype(np.int64) if ids.dtype.kind == "f" else ids.astype(np.int64)
+    noms_inconnus = noms.filter(pa.array(ids < 0)).to_numpy(zero_copy_only=False).astype(object)
+    return lignes[non_vides], positions[non_vides], ids, noms_inconnus
+
+
+def encoder_choix_en_ids(serie_choix:pd.Series, index_noms:pd.Index, largeur_min:int=5, avec_noms_inconnus:bool=False) -> tuple:
+    """Encode une colonne de voeux en matrice d'ids de partenaires par une seule jointure sur les noms.
+
+    Args:
+        serie_choix: La colonne de voeux (texte brut ou tuples).
+        index_noms: Les noms des partenaires, la position de chaque nom étant son id.
+        largeur_min: Le nombre minimal de colonnes de la matrice.
+        avec_noms_inconnus: Retourner aussi, pour chaque ligne qui en a, les noms de ses voeux inconnus.
+
+    Returns:
+        tuple: (matrice int32 (n, largeur) complétée par CHOIX_VIDE, avec CHOIX_INCONNU pour un nom absent des partenaires,
+        tableau bool des étudiants ayant fait au moins un voeu, dict nom inconnu -> nombre d'occurrences), suivi si demandé
+        du dict ligne -> tuple des noms inconnus de la ligne, dans l'ordre de ses CHOIX_INCONNU.
+    """
+    if _pyarrow_disponible() and serie_choix.notna().any() and not _contient_des_tuples(serie_choix):
+        lignes, positions, ids, noms_inconnus = _decouper_et_joindre_arrow(serie_choix, index_noms)
+    else:
+        lignes, positions, noms = decouper_choix(serie_choix)
+        ids = index_noms.get_indexer(noms)
+        noms_inconnus = noms[ids < 0]
+    largeur = max(largeur_min, int(positions.max()) + 1 if len(positions) else 0)
+
+    choix = np.full((len(serie_choix), largeur), CHOIX_VIDE, dtype=np.int32)
+    choix[lignes, positions] = np.where(ids < 0, CHOIX_INCONNU, ids)
+    a_choisi = np.zeros(len(serie_choix), dtype=bool)
+    a_choisi[lignes] = True
+    occurrences = pd.Series(noms_inconnus, dtype=object).value_counts(sort=False).to_dict()
+    if not avec_noms_inconnus:
+        return choix, a_choisi, occurrences
+    # Les voeux sont parcourus ligne par ligne, dans l'ordre des positions : les noms inconnus suivent les CHOIX_INCONNU de chaque ligne
+    noms_par_ligne = {}
+    for ligne, nom in zip(lignes[ids < 0].tolist(), noms_inconnus.tolist()):
+        noms_par_ligne.setdefault(ligne, []).append(nom)
+    return choix, a_choisi, occurrences, {ligne: tuple(noms) for ligne, noms in noms_par_ligne.items()}
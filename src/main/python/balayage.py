@@ -0,0 +1,113 @@
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.main.python.algo_affectation_classement import tri_df_etudiant_semestre_ponderation
+from src.main.python.conversion_df_brute import conversion_df_brute_pour_affectation
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.excel_en_dataframe import charger_excels
+from src.main.python.indicateurs import indicateurs_encodes
+from src.main.python.journalisation import MODE_SILENCIEUX, configurer_journalisation
+from src.main.python.moteur_rapide import affecter_semestre, encoder_cohorte
+
+SEMESTRES = ["S8", "S9"]
+
+# Entrées encodées partagées en lecture seule par les processus du balayage
+_etat_univ = None
+_cohorte = None
+
+
+def _initialiser_processus(etat_univ, cohorte, dossier_logs=None):
+    global _etat_univ, _cohorte
+    if dossier_logs is not None:
+        configurer_journalisation(mode=MODE_SILENCIEUX, dossier=dossier_logs, par_processus=True)
+    _etat_univ = etat_univ
+    _cohorte = cohorte
+
+
+def _evaluer_combinaison(alpha:float, ordre:np.ndarray, limite_ordre:int, calcul_completion:str) -> dict:
+    """Affecte la cohorte partagée dans l'ordre donné et retourne les indicateurs de la combinaison."""
+    etat_univ = _etat_univ.copie()
+    cohorte = _cohorte.sous_ensemble(ordre)
+    for semestre in SEMESTRES:
+        affecter_semestre(cohorte, etat_univ, semestre, limite_ordre, calcul_completion, resultat=cohorte.resultats[semestre])
+    res = {"alpha": alpha, "limite_ordre": limite_ordre, "calcul_completion": calcul_completion}
+    res.update(indicateurs_encodes(etat_univ, cohorte, cohorte.resultats))
+    return res
+
+
+def ordre_priorite(df_etudiants:pd.DataFrame, alpha:float) -> np.ndarray:
+    """Retourne les positions des étudiants dans l'ordre de priorité de tri_df_etudiant_semestre_ponderation."""
+    df_trie = tri_df_etudiant_semestre_ponderation(df_etudiants.copy(), alpha=alpha)
+    return df_etudiants.index.get_indexer(df_trie.index)
+
+
+def balayer_parametres(dataframes_convertis:dict, alphas:list[float], limites_ordre:list[int]=[0, 1, 2, 3, 4, 5],
+                       calculs_completion:list[str]=["Taux", "Places Prises"], nb_processus:int | None=None, dossier_logs:str | None=None) -> pd.DataFrame:
+    """Évalue toutes les combinaisons de paramètres et retourne un tableau comparatif des indicateurs.
+
+    Les entrées sont converties et encodées une seule fois, puis chaque combinaison est affectée avec le moteur rapide
+    dans un pool de processus qui reçoit les entrées encodées une seule fois à son initialisation.
+
+    Args:
+        dataframes_convertis: La sortie de conversion_df_brute_pour_affectation.
+        alphas: Les coefficients de pénalité à tester.
+        limites_ordre: Les nombres de voeux ordonnés à tester (entre 0 et 5).
+        calculs_completion: Les méthodes de calcul de la complétion à tester ("Taux", "Places Prises").
+        nb_processus: Le nombre de processus, 1 pour tout exécuter dans le processus courant, None pour le nombre de coeurs.
+        dossier_logs: Si fourni, chaque processus écrit ses logs (mode silencieux) dans ses propres fichiers de ce dossier, suffixés par son pid.
+
+    Returns:
+        df_res: une ligne par combinaison avec les indicateurs de chaque semestre.
+    """
+    df_univ = dataframes_convertis["universites_partenaires"]
+    df_etudiants = dataframes_convertis["choix_etudiants"].reset_index(drop=True)
+
+    etat_univ = EtatUniversites(df_univ, SEMESTRES)
+    cohorte = encoder_cohorte(df_etudiants, etat_univ, SEMESTRES)
+
+    ordres = {alpha: ordre_priorite(df_etudiants, alpha) for alpha in alphas}
+    limites_ordre = sorted({min(max(limite, 0), 5) for limite in limites_ordre})
+    combinaisons = [
+        (alpha, ordres[alpha], limite_ordre, calcul_completion)
+        for alpha, limite_ordre, calcul_completion in itertools.product(alphas, limites_ordre, calculs_completion)
+    ]
+
+    if nb_processus == 1:
+        _initialiser_processus(etat_univ, cohorte, dossier_logs)
+        lignes = [_evaluer_combinaison(*combinaison) for combinaison in combinaisons]
+    else:
+        with ProcessPoolExecutor(max_workers=nb_processus, initializer=_initialiser_processus, initargs=(etat_univ, cohorte, dossier_logs)) as executor:
+            lignes = list(executor.map(_evaluer_combinaison, *zip(*combinaisons)))
+    return pd.DataFrame(lignes)
+
+
+def main(arguments:list[str] | None=None):
+    parser = argparse.ArgumentParser(description="Compare les affectations obtenues pour une grille de paramètres.")
+    parser.add_argument("dossier", help="Dossier contenant univ_data_mobility.xlsx et choix_etudiants.xlsx")
+    parser.add_argument("--alphas", type=float, nargs="+", default=[0.0, 0.05, 0.1, 0.2, 0.5])
+    parser.add_argument("--limites-ordre", type=int, nargs="+", default=[0, 1, 2, 3, 4, 5])
+    parser.add_argument("--calculs-completion", nargs="+", default=["Taux", "Places Prises"], choices=["Taux", "Places Prises"])
+    parser.add_argument("--processus", type=int, default=None, help="Nombre de processus (par défaut : nombre de coeurs)")
+    parser.add_argument("--sortie", default=None, help="Fichier .csv ou .xlsx où écrire le tableau comparatif")
+    parser.add_argument("--dossier-logs", default=None, help="Dossier des logs, un fichier par processus (aucun journal par défaut)")
+    args = parser.parse_args(arguments)
+
+    dataframes = charger_excels(args.dossier)
+    dataframes_convertis = conversion_df_brute_pour_affectation(dataframes)
+    df_comparaison = balayer_parametres(dataframes_convertis, args.alphas, args.limites_ordre, args.calculs_completion, args.processus, args.dossier_logs)
+
+    if args.sortie is None:
+        with pd.option_context("display.max_rows", None, "display.max_columns", None, "display.width", None):
+            print(df_comparaison)
+    elif args.sortie.endswith(".csv"):
+        df_comparaison.to_csv(args.sortie, index=False)
+    else:
+        df_comparaison.to_excel(args.sortie, index=False)
+
+
+if __name__ == "__main__":
+    main()
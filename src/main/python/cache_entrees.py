@@ -0,0 +1,121 @@
+import hashlib
+import os
+
+from src.main.python.conversion_df_brute import conversion_df_brute_pour_affectation
+from src.main.python.excel_en_dataframe import charger_entrees, charger_excels, en_tete_partenaires
+from src.main.python.journalisation import logger_general
+
+# À incrémenter à chaque changement de traitement_df_univ ou du format des fichiers du cache
+VERSION_SCHEMA = 3
+
+TAILLE_BLOC_LECTURE = 1 << 20
+
+
+def empreinte_fichier(chemin:str) -> str:
+    """Retourne le SHA-256 du contenu d'un fichier, lu par blocs."""
+    sha = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(TAILLE_BLOC_LECTURE), b""):
+            sha.update(bloc)
+    return sha.hexdigest()
+
+
+def cle_cache(dossier:str) -> str:
+    """Retourne la clé de cache des fichiers Excel d'un dossier : SHA-256 de la version du schéma, des noms et des contenus."""
+    sha = hashlib.sha256(f"schema={VERSION_SCHEMA}".encode())
+    for fichier in sorted(os.listdir(dossier)):
+        if fichier.endswith((".xlsx", ".xls")):
+            sha.update(f"|{fichier}={empreinte_fichier(os.path.join(dossier, fichier))}".encode())
+    return sha.hexdigest()
+
+
+def cle_cache_fichiers(chemin_univ:str, chemin_etudiants:str) -> str:
+    """Retourne la clé de cache d'un couple de fichiers donnés explicitement : SHA-256 de la version du schéma, de la ligne
+    d'en-tête du fichier des partenaires (qui dépend de son nom) et des contenus."""
+    sha = hashlib.sha256(f"schema={VERSION_SCHEMA}|fichiers|en_tete={en_tete_partenaires(chemin_univ)}".encode())
+    for role, chemin in [("univ", chemin_univ), ("etudiants", chemin_etudiants)]:
+        sha.update(f"|{role}={empreinte_fichier(chemin)}".encode())
+    return sha.hexdigest()
+
+
+def _pyarrow_disponible() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _chemins_cache(dossier_cache:str, cle:str) -> dict:
+    return {
+        "universites_partenaires": os.path.join(dossier_cache, f"{cle}_universites.feather"),
+        "choix_etudiants": os.path.join(dossier_cache, f"{cle}_etudiants.feather"),
+    }
+
+
+def _lire_cache(chemins:dict) -> dict | None:
+    from pyarrow import feather
+
+    if not all(os.path.exists(chemin) for chemin in chemins.values()):
+        return None
+    res = {}
+    for nom, chemin in chemins.items():
+        res[nom] = feather.read_table(chemin, memory_map=True).to_pandas()
+    return res
+
+
+def _ecrire_cache(chemins:dict, dataframes_convertis:dict):
+    from pyarrow import feather
+    import pyarrow as pa
+
+    for nom, chemin in chemins.items():
+        table = pa.Table.from_pandas(dataframes_convertis[nom], preserve_index=False)
+        # Écriture dans un fichier temporaire puis renommage, pour ne jamais laisser un cache partiel
+        temporaire = f"{chemin}.{os.getpid()}.tmp"
+        feather.write_feather(table, temporaire, compression="uncompressed")
+        os.replace(temporaire, chemin)
+
+
+def charger_entrees_converties(dossier:str, dossier_cache:str | None) -> dict:
+    """Retourne les entrées converties (comme conversion_df_brute_pour_affectation) en passant par un cache Feather.
+
+    La clé du cache est le SHA-256 des fichiers Excel du dossier et de VERSION_SCHEMA : tant que les fichiers ne changent pas,
+    les tables converties sont relues (en mémoire mappée) sans ouvrir Excel. Sans pyarrow, ou si dossier_cache vaut None,
+    les fichiers sont simplement chargés et convertis.
+
+    Args:
+        dossier: Le dossier contenant les fichiers Excel des universités et des choix des étudiants.
+        dossier_cache: Le dossier du cache, créé si besoin.
+
+    Returns:
+        res: Le dictionnaire contenant 2 df, celui des universités et celui du choix des étudiants
+    """
+    return _charger_avec_cache(lambda: cle_cache(dossier), lambda: charger_excels(dossier), dossier_cache)
+
+
+def charger_fichiers_convertis(chemin_univ:str, chemin_etudiants:str, dossier_cache:str | None) -> dict:
+    """Comme charger_entrees_converties, pour un fichier des partenaires et un fichier des étudiants donnés par leurs chemins."""
+    return _charger_avec_cache(lambda: cle_cache_fichiers(chemin_univ, chemin_etudiants),
+                               lambda: charger_entrees(chemin_univ, chemin_etudiants), dossier_cache)
+
+
+def _charger_avec_cache(calculer_cle, charger, dossier_cache:str | None) -> dict:
+    if dossier_cache is None or not _pyarrow_disponible():
+        return conversion_df_brute_pour_affectation(charger())
+
+    chemins = _chemins_cache(dossier_cache, calculer_cle())
+    try:
+        res = _lire_cache(chemins)
+    except Exception as e:
+        logger_general.warning("Cache illisible, les fichiers Excel sont relus : %s", e)
+        res = None
+    if res is not None:
+        return res
+
+    res = conversion_df_brute_pour_affectation(charger())
+    try:
+        os.makedirs(dossier_cache, exist_ok=True)
+        _ecrire_cache(chemins, res)
+    except Exception as e:
+        logger_general.warning("Impossible d'écrire le cache : %s", e)
+    return res
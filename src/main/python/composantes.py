@@ -0,0 +1,163 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.journalisation import detacher_journalisation, logger_general
+from src.main.python.moteur_rapide import CohorteEncodee, affecter_semestre, compatibles_en_csr, noyau_compile
+from src.main.python.statistiques import StatistiquesAffectation
+
+
+class UnionFind:
+    """Union-find (compression de chemin et union par taille) sur les entiers 0..n-1."""
+
+    def __init__(self, n:int):
+        self.parent = list(range(n))
+        self.taille = [1] * n
+
+    def trouver(self, x:int) -> int:
+        racine = x
+        while self.parent[racine] != racine:
+            racine = self.parent[racine]
+        while self.parent[x] != racine:
+            self.parent[x], x = racine, self.parent[x]
+        return racine
+
+    def unir(self, a:int, b:int):
+        a, b = self.trouver(a), self.trouver(b)
+        if a == b:
+            return
+        if self.taille[a] < self.taille[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.taille[a] += self.taille[b]
+
+
+def composantes_semestre(cohorte:CohorteEncodee, etat_univ:EtatUniversites, semestre:str) -> np.ndarray:
+    """Retourne, pour chaque étudiant, le numéro de la composante de partenaires qu'il peut consulter pour le semestre.
+
+    Un étudiant consulte ses voeux (scénarios 1 et 2) et, en dernier recours, les partenaires compatibles avec sa spécialité
+    (scénario 3). Les partenaires et les spécialités sont les sommets d'un union-find : chaque étudiant relie ses voeux à sa
+    spécialité (ou à son premier voeu s'il n'a pas de spécialité connue), chaque spécialité à ses partenaires compatibles.
+    Deux étudiants de composantes différentes ne consultent jamais les mêmes places.
+
+    Returns:
+        res: un tableau int64 des numéros de composante (0..k-1), -1 pour un étudiant qui ne consulte aucun partenaire
+        (sans voeu, ou voeux inconnus et spécialité inconnue) et reste donc sans affectation.
+    """
+    nb_partenaires = len(etat_univ)
+    n = len(cohorte)
+    choix = cohorte.choix[semestre]
+    a_choisi = cohorte.a_choisi[semestre]
+    specialites = cohorte.specialites.astype(np.int64)
+
+    # Sommet d'ancrage de chaque étudiant : sa spécialité, sinon son premier voeu connu
+    premier_voeu = np.where(choix >= 0, choix, nb_partenaires).min(axis=1) if choix.shape[1] else np.full(n, nb_partenaires)
+    ancres = np.where(specialites >= 0, nb_partenaires + specialites, np.where(premier_voeu < nb_partenaires, premier_voeu, -1))
+    ancres = np.where(a_choisi, ancres, -1)
+
+    lignes, colonnes = np.nonzero(choix >= 0)
+    garder = ancres[lignes] >= 0
+    aretes = np.unique(np.stack([ancres[lignes[garder]], choix[lignes[garder], colonnes[garder]]], axis=1), axis=0)
+
+    union_find = UnionFind(nb_partenaires + len(cohorte.liste_specialites))
+    for a, b in aretes.tolist():
+        union_find.unir(a, b)
+    compat_debuts, compat_ids = compatibles_en_csr(etat_univ, semestre, cohorte.liste_specialites)
+    for code in np.unique(specialites[a_choisi & (specialites >= 0)]).tolist():
+        for p in compat_ids[compat_debuts[code]:compat_debuts[code + 1]].tolist():
+            union_find.unir(nb_partenaires + code, p)
+
+    racines = np.asarray([union_find.trouver(a) if a >= 0 else -1 for a in ancres.tolist()], dtype=np.int64)
+    _, res = np.unique(racines, return_inverse=True)
+    res = res.astype(np.int64).reshape(-1)
+    if (racines < 0).any():
+        res -= 1
+    return res
+
+
+def regrouper_composantes(composantes:np.ndarray, nb_lots:int) -> list[np.ndarray]:
+    """Répartit les composantes en au plus nb_lots lots de tailles proches (plus grande composante d'abord dans le lot le moins chargé).
+    Les étudiants sans composante (-1) ne consultent aucune place : ils rejoignent le premier lot, pour que chaque étudiant passe
+    par le moteur (et par ses statistiques) comme dans une affectation d'un seul tenant.
+
+    Returns:
+        res: pour chaque lot non vide, les positions de ses étudiants, dans l'ordre de priorité.
+    """
+    numeros, tailles = np.unique(composantes[composantes >= 0], return_counts=True)
+    charges = [0] * max(nb_lots, 1)
+    lot_de = {}
+    for numero, taille in sorted(zip(numeros.tolist(), tailles.tolist()), key=lambda c: -c[1]):
+        lot = charges.index(min(charges))
+        lot_de[numero] = lot
+        charges[lot] += taille
+    lots = np.zeros(max(int(composantes.max(initial=-1)) + 1, 1), dtype=np.int64)
+    for numero, lot in lot_de.items():
+        lots[numero] = lot
+    lot_etudiant = np.where(composantes >= 0, lots[np.maximum(composantes, 0)], 0)
+    return [positions for lot in range(len(charges)) if len(positions := np.flatnonzero(lot_etudiant == lot))]
+
+
+def _affecter_lot(cohorte:CohorteEncodee, etat_univ:EtatUniversites, semestre:str, limite_ordre:int, calcul_completion:str,
+                  statistiques:StatistiquesAffectation | None):
+    ids_obtenus = affecter_semestre(cohorte, etat_univ, semestre, limite_ordre, calcul_completion, statistiques=statistiques)
+    return ids_obtenus, etat_univ.places_prises[semestre], statistiques
+
+
+def _affecter_lot_processus(cohorte, etat_univ, semestre, limite_ordre, calcul_completion, avec_statistiques):
+    detacher_journalisation()
+    return _affecter_lot(cohorte, etat_univ, semestre, limite_ordre, calcul_completion, StatistiquesAffectation() if avec_statistiques else None)
+
+
+def affecter_semestre_par_composantes(cohorte:CohorteEncodee, etat_univ:EtatUniversites, semestre:str, limite_ordre:int, calcul_completion:str="Taux",
+                                      nb_taches:int | None=None, statistiques:StatistiquesAffectation | None=None) -> np.ndarray:
+    """Affecte un semestre en traitant les groupes d'étudiants indépendants (composantes_semestre) dans des tâches parallèles.
+
+    Chaque lot de composantes est affecté dans l'ordre de priorité par le moteur rapide, dans un thread si la boucle est compilée
+    par numba (elle relâche alors le GIL ; les lots écrivent dans des places disjointes), dans un processus sinon.
+    Les résultats sont replacés à la position de chaque étudiant : ils sont identiques à ceux de affecter_semestre.
+
+    Args:
+        nb_taches: Le nombre de tâches, le nombre de coeurs par défaut.
+
+    Returns:
+        resultat: le tableau int32 des ids obtenus (-1 si aucun), dans l'ordre de la cohorte.
+    """
+    nb_taches = nb_taches or os.cpu_count() or 1
+    composantes = composantes_semestre(cohorte, etat_univ, semestre)
+    lots = regrouper_composantes(composantes, nb_taches)
+    logger_general.info("%s : %d composantes indépendantes réparties en %d lots", semestre, int(composantes.max(initial=-1)) + 1, len(lots))
+
+    resultat = np.full(len(cohorte), -1, dtype=np.int32)
+    if len(lots) <= 1:
+        if lots:
+            resultat[lots[0]] = _affecter_lot(cohorte.sous_ensemble(lots[0]), etat_univ, semestre, limite_ordre, calcul_completion, statistiques)[0]
+        return resultat
+
+    if noyau_compile() is not None:
+        # Une instance de statistiques par lot : les compteurs d'un même semestre ne sont pas cumulés depuis plusieurs threads
+        with ThreadPoolExecutor(max_workers=len(lots)) as executor:
+            taches = [(positions, executor.submit(_affecter_lot, cohorte.sous_ensemble(positions), etat_univ, semestre, limite_ordre,
+                                                  calcul_completion, StatistiquesAffectation() if statistiques is not None else None))
+                      for positions in lots]
+        for positions, tache in taches:
+            ids_obtenus, _, statistiques_lot = tache.result()
+            resultat[positions] = ids_obtenus
+            if statistiques is not None:
+                statistiques.fusionner(statistiques_lot)
+        return resultat
+
+    with ProcessPoolExecutor(max_workers=len(lots)) as executor:
+        taches = [(positions, executor.submit(_affecter_lot_processus, cohorte.sous_ensemble(positions), etat_univ, semestre, limite_ordre,
+                                              calcul_completion, statistiques is not None)) for positions in lots]
+        # Chaque lot ne modifie que les places de ses propres partenaires
+        places_initiales = etat_univ.places_prises[semestre].copy()
+        for positions, tache in taches:
+            ids_obtenus, places_prises, statistiques_lot = tache.result()
+            resultat[positions] = ids_obtenus
+            modifiees = places_prises != places_initiales
+            etat_univ.places_prises[semestre][modifiees] = places_prises[modifiees]
+            if statistiques is not None:
+                statistiques.fusionner(statistiques_lot)
+    return resultat
@@ -1,4 +1,4 @@
-from collections import defaultdict
+import numpy as np
 import pandas as pd
 from src.main.python.excel_en_dataframe import charger_excels
 
@@ -18,35 +18,64 @@ def conversion_df_brute_pour_affectation(dataframes:dict) -> dict:
     res["universites_partenaires"] = df_univ_modified
     return res
 
-def traitement_df_univ(df:pd.DataFrame):
-    """Traite le df des univ avec les nouvelles colonnes Nom, Places S8, Places Prises S8, Specialites Compatibles S8, Places S9, Places Prises S9, Specialites Compatibles S9.
+SEMESTRES = ["S8", "S9"]
+SPECIALITES = ["MM", "MC", "SNI", "BAT", "EIT", "IDU"]
+
+# Bit de chaque spécialité dans les colonnes "Masque Specialites SX" (uint8)
+BIT_SPECIALITE = {spe: np.uint8(1 << k) for k, spe in enumerate(SPECIALITES)}
+
+# Liste des spécialités de chacun des 2^6 masques possibles
+_LISTES_PAR_MASQUE = [[spe for k, spe in enumerate(SPECIALITES) if masque >> k & 1] for masque in range(1 << len(SPECIALITES))]
+
+
+def masque_specialites(df:pd.DataFrame, semestre:str) -> np.ndarray:
+    """Retourne le masque uint8 des spécialités acceptées par chaque ligne (bit k si la colonne SX_<spécialité k> est > 0)."""
+    colonnes_semestre = [f"{semestre}_{spe}" for spe in SPECIALITES]
+    # Une valeur manquante (NaN) n'est jamais > 0
+    acceptees = df[colonnes_semestre].to_numpy(dtype=np.float64) > 0
+    return (acceptees.astype(np.uint8) << np.arange(len(SPECIALITES), dtype=np.uint8)).sum(axis=1, dtype=np.uint8)
+
+
+def listes_depuis_masques(masques) -> list[list[str]]:
+    """Retourne la liste des spécialités de chaque masque, dans l'ordre de SPECIALITES."""
+    return [list(_LISTES_PAR_MASQUE[masque]) for masque in np.asarray(masques, dtype=np.uint8).tolist()]
+
+
+def ajouter_listes_specialites(df_univ:pd.DataFrame, semestres:list[str]=SEMESTRES):
+    """Ajoute sur place les colonnes de présentation "Specialites Compatibles SX" déduites des colonnes "Masque Specialites SX"."""
+    for semestre in semestres:
+        col_liste = f"Specialites Compatibles {semestre}"
+        col_masque = f"Masque Specialites {semestre}"
+        if col_liste in df_univ.columns or col_masque not in df_univ.columns:
+            continue
+        df_univ.insert(df_univ.columns.get_loc(col_masque), col_liste, listes_depuis_masques(df_univ[col_masque]))
+
+
+def traitement_df_univ(df:pd.DataFrame, avec_listes:bool=False):
+    """Traite le df des univ avec les nouvelles colonnes Nom, Places S8, Places Prises S8, Masque Specialites S8, Places S9, Places Prises S9, Masque Specialites S9.
     
     Keyword arguments:
     df -- Le dictionnaire des dataframes lié au universités partenaire
-    Return: un dataframe avec les colonnes Nom, Places S8, Places Prises S8, Specialites Compatibles S8, Places S9, Places Prises S9, Specialites Compatibles S9
+    avec_listes -- Si True, ajoute aussi les colonnes de présentation "Specialites Compatibles SX" (sinon ajouter_listes_specialites les ajoute là où elles sont affichées)
+    Return: un dataframe avec les colonnes Nom, Places S8, Places Prises S8, Masque Specialites S8, Places S9, Places Prises S9, Masque Specialites S9
     """
-    semestres = ["S8", "S9"]
-    specialites = ["MM", "MC", "SNI", "BAT", "EIT", "IDU"]
-    
     # Récupère les noms des partenaires depuis l'un des DataFrames
     noms_partenaires = df["nom_partenaire"].str.strip()
 
     data = {"nom_partenaire": noms_partenaires}
-    for semestre in semestres:
-        
+    for semestre in SEMESTRES:
 
         # Places disponibles
         data[f"Places {semestre}"] = df[f"{semestre}_total_places"].tolist()
 
-        # Places prises initialisées à 0E
+        # Places prises initialisées à 0
         data[f"Places Prises {semestre}"] = [0] * len(df)
 
-        # Spécialités compatibles (liste des colonnes dont la valeur > 0)
-        colonnes_semestre = [f"{semestre}_{spe}" for spe in specialites]
-        data[f"Specialites Compatibles {semestre}"] = df[colonnes_semestre].apply(
-            lambda row: [spe for spe in specialites if pd.notna(row[f"{semestre}_{spe}"]) and row[f"{semestre}_{spe}"] > 0],
-            axis=1
-        )
+        # Spécialités compatibles (colonnes dont la valeur > 0), un bit par spécialité
+        masques = masque_specialites(df, semestre)
+        if avec_listes:
+            data[f"Specialites Compatibles {semestre}"] = listes_depuis_masques(masques)
+        data[f"Masque Specialites {semestre}"] = masques
 
         # Université prioritaire ou non
         data[f"Prioritaire {semestre}"] = df[f"important"].tolist()
@@ -61,6 +90,7 @@ if test :
     dataframes_test = charger_excels("src\\main\\data_for_test")
     
     df_test = conversion_df_brute_pour_affectation(dataframes=dataframes_test)
+    ajouter_listes_specialites(df_test["universites_partenaires"])
     
     print(df_test["universites_partenaires"])
     #df_test["universites_partenaires"].to_excel("src\\main\\output\\univ_data_mobility_refined.xlsx", index=False)
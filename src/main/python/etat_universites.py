@@ -0,0 +1,351 @@
+import copy
+import math
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+from src.main.python.conversion_df_brute import BIT_SPECIALITE
+
+# Valeur d'une feuille sans place disponible : (complétion, position dans la liste, id)
+_FEUILLE_VIDE = (math.inf, math.inf, -1)
+
+
+class EtatUniversites:
+    """État compact des universités partenaires pour l'algorithme d'affectation.
+
+    Construit une seule fois depuis la sortie de traitement_df_univ, il associe chaque nom de partenaire
+    à un identifiant entier et stocke, pour chaque semestre, des tableaux NumPy des places totales,
+    des places prises, des notes minimales et du caractère prioritaire. Les lectures et les incréments
+    se font en O(1) au lieu d'un filtrage du DataFrame à chaque appel.
+
+    Comme pour les fonctions sur DataFrame, seule la première ligne d'un nom de partenaire est prise en compte.
+    """
+
+    def __init__(self, df_univ:pd.DataFrame, semestres:list[str]=["S8", "S9"]):
+        self.semestres = list(semestres)
+        self.ids = {}
+        self.noms = []
+        lignes = []
+        positions = []
+        for position, (ligne, nom) in enumerate(zip(df_univ.index, df_univ["nom_partenaire"].tolist())):
+            if pd.isna(nom) or nom in self.ids:
+                continue
+            self.ids[nom] = len(self.noms)
+            self.noms.append(nom)
+            lignes.append(ligne)
+            positions.append(position)
+        self.lignes = lignes
+        positions = np.asarray(positions, dtype=np.int64)
+
+        self.places = {}
+        self.places_connues = {}
+        self.places_prises = {}
+        self.places_prises_connues = {}
+        self.places_prises_initiales = {}
+        self.note_min = {}
+        self.prioritaire = {}
+        self.compatibles = {}
+        self._arbres = {}
+        self._feuilles = {semestre: {} for semestre in self.semestres}
+        noms_lignes = df_univ["nom_partenaire"].tolist()
+        for semestre in self.semestres:
+            places, connues = _colonne_entiere(df_univ, f"Places {semestre}", positions)
+            self.places[semestre] = places
+            self.places_connues[semestre] = connues
+            prises, prises_connues = _colonne_entiere(df_univ, f"Places Prises {semestre}", positions)
+            self.places_prises[semestre] = prises
+            self.places_prises_connues[semestre] = prises_connues
+            self.places_prises_initiales[semestre] = prises.copy()
+
+            col_note = f"Note Min {semestre}"
+            if col_note in df_univ.columns:
+                notes = pd.to_numeric(df_univ[col_note], errors="coerce").to_numpy(dtype=np.float64)[positions]
+            else:
+                notes = np.full(len(positions), np.nan)
+            self.note_min[semestre] = notes
+
+            col_prio = f"Prioritaire {semestre}"
+            if col_prio in df_univ.columns:
+                valeurs = df_univ[col_prio].tolist()
+                prio = [isinstance(valeurs[p], str) and valeurs[p].strip().lower() == "oui" for p in positions]
+                self.prioritaire[semestre] = np.asarray(prio, dtype=bool)
+            else:
+                self.prioritaire[semestre] = np.zeros(len(positions), dtype=bool)
+
+            col_masque = f"Masque Specialites {semestre}"
+            col_spe = f"Specialites Compatibles {semestre}"
+            if col_masque in df_univ.columns:
+                ids_par_spe = self._ids_par_specialite_depuis_masques(noms_lignes, df_univ[col_masque].to_numpy(dtype=np.uint8))
+            else:
+                ids_par_spe = self._ids_par_specialite_depuis_listes(noms_lignes, df_univ[col_spe].tolist() if col_spe in df_univ.columns else [])
+            self.compatibles[semestre] = self._construire_index_compatibles(ids_par_spe, notes)
+
+    def _ids_par_specialite_depuis_masques(self, noms_lignes:list, masques:np.ndarray) -> dict:
+        """Retourne spécialité -> ids compatibles (ordre du DataFrame, sans doublon) à partir des masques uint8 des lignes."""
+        ids_lignes = np.asarray([-1 if pd.isna(nom) else self.ids[nom] for nom in noms_lignes], dtype=np.int32)
+        ids_par_spe = {}
+        for specialite, bit in BIT_SPECIALITE.items():
+            ids = ids_lignes[((masques & bit) != 0) & (ids_lignes >= 0)]
+            if len(ids):
+                _, premieres = np.unique(ids, return_index=True)
+                ids_par_spe[specialite] = ids[np.sort(premieres)]
+        return ids_par_spe
+
+    def _ids_par_specialite_depuis_listes(self, noms_lignes:list, listes:list) -> dict:
+        """Retourne spécialité -> ids compatibles (ordre du DataFrame, sans doublon) à partir des listes de spécialités des lignes."""
+        ids_par_spe = {}
+        for nom, lst in zip(noms_lignes, listes):
+            if not isinstance(lst, list):
+                continue
+            i = self.get_id(nom)
+            if i is None:
+                continue
+            for specialite in lst:
+                ids = ids_par_spe.setdefault(specialite, [])
+                if i not in ids:
+                    ids.append(i)
+        return ids_par_spe
+
+    def _construire_index_compatibles(self, ids_par_spe:dict, notes:np.ndarray) -> dict:
+        """Construit pour un semestre l'index spécialité -> (ids compatibles, positions triées par note min, notes min triées).
+
+        Les ids sont dans l'ordre du DataFrame (sans doublon), les notes min manquantes sont traitées comme -inf
+        pour qu'une recherche dichotomique sur la note de l'étudiant donne directement les partenaires à son niveau.
+        """
+        index = {}
+        for specialite, ids in ids_par_spe.items():
+            ids = np.asarray(ids, dtype=np.int32)
+            notes_spe = np.where(np.isnan(notes[ids]), -np.inf, notes[ids])
+            ordre_note = np.argsort(notes_spe, kind="stable")
+            index[specialite] = (ids, ordre_note, notes_spe[ordre_note])
+        return index
+
+    def __len__(self):
+        return len(self.noms)
+
+    def copie(self) -> "EtatUniversites":
+        """Retourne une copie dont les places prises peuvent être modifiées sans toucher à cet état."""
+        res = copy.copy(self)
+        res.places_prises = {semestre: prises.copy() for semestre, prises in self.places_prises.items()}
+        res._arbres = {}
+        res._feuilles = {semestre: {} for semestre in self.semestres}
+        return res
+
+    def __getstate__(self):
+        # Les arbres de segments sont reconstruits à la demande, inutile de les transmettre aux processus
+        etat = self.__dict__.copy()
+        etat["_arbres"] = {}
+        etat["_feuilles"] = {semestre: {} for semestre in self.semestres}
+        return etat
+
+    def get_id(self, nom_du_partenaire:str) -> int | None:
+        """Retourne l'identifiant entier du partenaire ou None s'il est inconnu."""
+        try:
+            return self.ids.get(nom_du_partenaire)
+        except TypeError:
+            return None
+
+    def get_nombre_places_total(self, nom_du_partenaire:str, semestre:str) -> int | None:
+        i = self.get_id(nom_du_partenaire)
+        if i is None or semestre not in self.places or not self.places_connues[semestre][i]:
+            return None
+        return int(self.places[semestre][i])
+
+    def get_nombre_places_prises(self, nom_du_partenaire:str, semestre:str) -> int | None:
+        i = self.get_id(nom_du_partenaire)
+        if i is None or semestre not in self.places_prises or not self.places_prises_connues[semestre][i]:
+            return None
+        return int(self.places_prises[semestre][i])
+
+    def get_nb_places_disponibles(self, nom_du_partenaire:str, semestre:str) -> int | None:
+        i = self.get_id(nom_du_partenaire)
+        if i is None or semestre not in self.places:
+            return None
+        if not (self.places_connues[semestre][i] and self.places_prises_connues[semestre][i]):
+            return None
+        return int(self.places[semestre][i] - self.places_prises[semestre][i])
+
+    def place_est_disponible(self, nom_du_partenaire:str, semestre:str) -> bool | None:
+        nb_places_disponibles = self.get_nb_places_disponibles(nom_du_partenaire, semestre)
+        if nb_places_disponibles is None:
+            return None
+        return nb_places_disponibles > 0
+
+    def get_taux_completion_places(self, nom_du_partenaire:str, semestre:str) -> float | None:
+        nb_places_total = self.get_nombre_places_total(nom_du_partenaire, semestre)
+        nb_places_prises = self.get_nombre_places_prises(nom_du_partenaire, semestre)
+        if nb_places_total is not None and nb_places_total != 0 and nb_places_prises is not None:
+            return nb_places_prises/nb_places_total
+        elif nb_places_total == 0:
+            return 1
+        return None
+
+    def etudiant_a_niveau_requis(self, note_etudiant:float, nom_du_partenaire:str, semestre:str) -> bool:
+        i = self.get_id(nom_du_partenaire)
+        if i is None or semestre not in self.note_min:
+            return True
+        note_min_valeur = self.note_min[semestre][i]
+        return not (note_min_valeur > note_etudiant)
+
+    def est_prioritaire(self, nom_du_partenaire:str, semestre:str) -> bool | None:
+        """Retourne si le partenaire est prioritaire pour le semestre, None s'il est inconnu."""
+        i = self.get_id(nom_du_partenaire)
+        if i is None or semestre not in self.prioritaire:
+            return None
+        return bool(self.prioritaire[semestre][i])
+
+    def get_ids_compatibles(self, semestre:str, specialite:str, note_etudiant:float=np.nan) -> np.ndarray:
+        """Retourne les ids des partenaires compatibles avec la spécialité pour le semestre, dans l'ordre du DataFrame.
+
+        Si une note est fournie, seuls les partenaires dont la note min est atteinte sont retournés (recherche dichotomique).
+        """
+        try:
+            ids, ordre_note, notes_triees = self.compatibles[semestre][specialite]
+        except (KeyError, TypeError):
+            return np.empty(0, dtype=np.int32)
+        if note_etudiant is None or pd.isna(note_etudiant):
+            return ids
+        k = np.searchsorted(notes_triees, note_etudiant, side="right")
+        if k == len(ids):
+            return ids
+        return ids[np.sort(ordre_note[:k])]
+
+    def get_liste_univ_compatible(self, semestre:str, specialite:str, note_etudiant:float=np.nan) -> list[str]:
+        """Retourne les noms des partenaires compatibles avec la spécialité (et la note si fournie), dans l'ordre du DataFrame."""
+        return [self.noms[i] for i in self.get_ids_compatibles(semestre, specialite, note_etudiant)]
+
+    def _completion(self, semestre:str, i:int, par_taux:bool):
+        """Retourne la complétion du partenaire i (taux ou places prises), None s'il n'a plus de place."""
+        if not (self.places_connues[semestre][i] and self.places_prises_connues[semestre][i]):
+            return None
+        places = int(self.places[semestre][i])
+        prises = int(self.places_prises[semestre][i])
+        if places - prises <= 0:
+            return None
+        return prises/places if par_taux else prises
+
+    def _get_arbres(self, semestre:str, specialite:str, par_taux:bool) -> list:
+        """Retourne (en les construisant au premier appel) les arbres prioritaire et non prioritaire de (semestre, spécialité)."""
+        cle = (semestre, specialite, par_taux)
+        if cle not in self._arbres:
+            arbres = []
+            try:
+                ids, ordre_note, notes_triees = self.compatibles[semestre][specialite]
+            except (KeyError, TypeError):
+                ids, ordre_note, notes_triees = np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64), np.empty(0)
+            prioritaires = self.prioritaire[semestre][ids[ordre_note]]
+            for tier in (True, False):
+                garder = prioritaires == tier
+                positions = ordre_note[garder].tolist()
+                ids_tier = ids[ordre_note[garder]].tolist()
+                arbre = ArbreMoinsRempli(positions, ids_tier, notes_triees[garder].tolist())
+                for feuille, i in enumerate(ids_tier):
+                    arbre.mettre_a_jour(feuille, self._completion(semestre, i, par_taux), construction=True)
+                    self._feuilles[semestre].setdefault(i, []).append((arbre, feuille, par_taux))
+                arbre.construire()
+                arbres.append(arbre)
+            self._arbres[cle] = arbres
+        return self._arbres[cle]
+
+    def get_univ_la_moins_remplie_compatible(self, semestre:str, specialite:str, note_etudiant:float, calcul_completion:str="Taux") -> str:
+        """Retourne le partenaire compatible, avec place et au niveau, le moins rempli en considérant d'abord les prioritaires.
+
+        Équivalent à get_depuis_liste_univ_prioritaire_avec_place_et_niveau sur la liste des compatibles, y compris
+        pour le départage des égalités (le premier de la liste l'emporte), mais en O(log n) grâce aux arbres de segments.
+
+        Returns:
+            res: le nom du partenaire ou une chaîne vide si aucun ne correspond.
+        """
+        if semestre not in self.semestres:
+            return ""
+        for arbre in self._get_arbres(semestre, specialite, calcul_completion == "Taux"):
+            i = arbre.minimum_au_niveau(note_etudiant)
+            if i >= 0:
+                return self.noms[i]
+        return ""
+
+    def incrementer_places_prise(self, nom_du_partenaire:str, semestre:str):
+        i = self.get_id(nom_du_partenaire)
+        if i is None or semestre not in self.places_prises:
+            return
+        if self.places_prises_connues[semestre][i] and self.places_prises[semestre][i] >= 0:
+            self.places_prises[semestre][i] += 1
+            for arbre, feuille, par_taux in self._feuilles[semestre].get(i, ()):
+                arbre.mettre_a_jour(feuille, self._completion(semestre, i, par_taux))
+
+    def ecrire_dans_df(self, df_univ:pd.DataFrame):
+        """Reporte les places prises dans le DataFrame des universités, uniquement pour les lignes modifiées.
+
+        Args:
+            df_univ: Le dataframe des universités partenaires ayant servi à construire l'état.
+        """
+        lignes = np.asarray(self.lignes, dtype=object)
+        for semestre in self.semestres:
+            modifies = self.places_prises[semestre] != self.places_prises_initiales[semestre]
+            if modifies.any():
+                df_univ.loc[list(lignes[modifies]), f"Places Prises {semestre}"] = self.places_prises[semestre][modifies]
+
+
+class ArbreMoinsRempli:
+    """Arbre de segments (minimum) sur les partenaires d'un (semestre, spécialité, niveau de priorité).
+
+    Les feuilles sont triées par note minimale croissante : les partenaires accessibles à un étudiant forment
+    donc un préfixe, trouvé par recherche dichotomique. Chaque feuille vaut (complétion, position dans la liste, id),
+    ce qui reproduit le départage de get_universite_la_moins_remplie (le premier de la liste l'emporte).
+    Les partenaires sans place disponible valent _FEUILLE_VIDE.
+    """
+
+    def __init__(self, positions:list[int], ids:list[int], notes_triees:list[float]):
+        self.positions = positions
+        self.ids = ids
+        self.notes_triees = notes_triees
+        self.taille = 1
+        while self.taille < len(ids):
+            self.taille *= 2
+        self.noeuds = [_FEUILLE_VIDE] * (2 * self.taille)
+
+    def construire(self):
+        for noeud in range(self.taille - 1, 0, -1):
+            self.noeuds[noeud] = min(self.noeuds[2 * noeud], self.noeuds[2 * noeud + 1])
+
+    def mettre_a_jour(self, feuille:int, completion, construction:bool=False):
+        """Met à jour la complétion d'une feuille (None si le partenaire n'a plus de place) en O(log n)."""
+        noeud = feuille + self.taille
+        self.noeuds[noeud] = _FEUILLE_VIDE if completion is None else (completion, self.positions[feuille], self.ids[feuille])
+        if construction:
+            return
+        noeud //= 2
+        while noeud:
+            self.noeuds[noeud] = min(self.noeuds[2 * noeud], self.noeuds[2 * noeud + 1])
+            noeud //= 2
+
+    def minimum_au_niveau(self, note_etudiant:float) -> int:
+        """Retourne l'id du partenaire le moins rempli accessible avec cette note, -1 s'il n'y en a pas."""
+        if note_etudiant is None or pd.isna(note_etudiant):
+            fin = len(self.ids)
+        else:
+            fin = bisect_right(self.notes_triees, note_etudiant)
+        res = _FEUILLE_VIDE
+        debut, fin = self.taille, self.taille + fin
+        while debut < fin:
+            if debut & 1:
+                res = min(res, self.noeuds[debut])
+                debut += 1
+            if fin & 1:
+                fin -= 1
+                res = min(res, self.noeuds[fin])
+            debut //= 2
+            fin //= 2
+        return res[2]
+
+
+def _colonne_entiere(df:pd.DataFrame, colonne:str, positions:np.ndarray):
+    """Retourne la colonne convertie en entiers (troncature comme int()) et le masque des valeurs renseignées."""
+    if colonne not in df.columns:
+        return np.zeros(len(positions), dtype=np.int64), np.zeros(len(positions), dtype=bool)
+    valeurs = pd.to_numeric(df[colonne], errors="coerce").to_numpy(dtype=np.float64)[positions]
+    connues = ~np.isnan(valeurs)
+    entiers = np.zeros(len(positions), dtype=np.int64)
+    entiers[connues] = valeurs[connues].astype(np.int64)
+    return entiers, connues
@@ -1,46 +1,133 @@
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 
-def charger_excels(dossier: str) -> dict:
+from src.main.python.journalisation import logger_general
+
+# Nom (sans extension) du fichier des partenaires dans le dossier lu par charger_excels
+NOM_FICHIER_PARTENAIRES = "univ_data_mobility"
+
+# Colonnes du fichier des partenaires utilisées par traitement_df_univ
+COLONNES_PARTENAIRE_TEXTE = {"nom_partenaire": object, "important": object}
+MOTIF_COLONNES_PARTENAIRE_NUMERIQUES = re.compile(r"^(S\d+_\w+|note_min)$")
+
+
+def moteur_excel_disponible() -> str | None:
+    """Retourne "calamine" si python-calamine est installé (lecture bien plus rapide), None pour le moteur par défaut de pandas."""
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return None
+    return "calamine"
+
+
+def en_tete_partenaires(chemin:str) -> int:
+    """Retourne la ligne d'en-tête du fichier des partenaires : la 3e si son nom contient "partner", la 1re sinon."""
+    return 2 if "partner" in os.path.basename(chemin).lower() else 0
+
+
+def _colonne_partenaire_utile(colonne) -> bool:
+    colonne = str(colonne)
+    return colonne in COLONNES_PARTENAIRE_TEXTE or MOTIF_COLONNES_PARTENAIRE_NUMERIQUES.match(colonne) is not None
+
+
+def lire_excel(chemin:str, **kwargs) -> pd.DataFrame:
+    """Lit un fichier Excel avec le moteur le plus rapide disponible, en revenant au moteur par défaut en cas d'échec."""
+    moteur = moteur_excel_disponible()
+    if moteur is not None:
+        from python_calamine import CalamineError
+        try:
+            return pd.read_excel(chemin, engine=moteur, **kwargs)
+        except CalamineError as e:
+            logger_general.warning("Lecture de %s avec %s impossible (%s), retour au moteur par défaut", chemin, moteur, e)
+    return pd.read_excel(chemin, **kwargs)
+
+
+def lire_excel_partenaires(chemin:str, header:int=0) -> pd.DataFrame:
+    """Lit uniquement les colonnes du fichier des partenaires utiles à traitement_df_univ, avec des types explicites.
+
+    Le classeur n'est lu qu'une fois ; les colonnes numériques sont ensuite converties en float64, sauf celles dont une cellule
+    ne s'y prête pas, qui restent telles que lues.
+    """
+    df = lire_excel(chemin, header=header, usecols=_colonne_partenaire_utile)
+    for colonne in df.columns:
+        if str(colonne) in COLONNES_PARTENAIRE_TEXTE:
+            df[colonne] = df[colonne].astype(COLONNES_PARTENAIRE_TEXTE[str(colonne)])
+        elif MOTIF_COLONNES_PARTENAIRE_NUMERIQUES.match(str(colonne)):
+            try:
+                df[colonne] = df[colonne].astype("float64")
+            except (TypeError, ValueError):
+                logger_general.warning("Colonne %s de %s non numérique, gardée telle quelle", colonne, chemin)
+    return df
+
+
+def charger_excel(chemin:str) -> pd.DataFrame:
+    """Charge un fichier Excel en DataFrame, en ne lisant que les colonnes utiles s'il s'agit du fichier des partenaires."""
+    nom = os.path.splitext(os.path.basename(chemin))[0]
+    if nom == NOM_FICHIER_PARTENAIRES:
+        return lire_excel_partenaires(chemin, header=en_tete_partenaires(chemin))
+    if "partner" in nom.lower():
+        return traiter_excel_partner(chemin)
+    return lire_excel(chemin)
+
+
+def charger_excels(dossier: str, nb_threads: int | None = None) -> dict:
     """
     Charge tous les fichiers Excel (.xlsx, .xls) d'un dossier en DataFrames pandas.
 
-    Parcourt les fichiers présents dans le dossier spécifié, lit ceux qui sont des fichiers Excel,
+    Parcourt les fichiers présents dans le dossier spécifié, lit ceux qui sont des fichiers Excel en parallèle,
     et les stocke dans un dictionnaire où chaque clé est le nom du fichier (sans extension)
-    et chaque valeur est un DataFrame pandas.
+    et chaque valeur est un DataFrame pandas. Le fichier des partenaires (NOM_FICHIER_PARTENAIRES) n'est lu que pour les colonnes utiles.
 
     Args:
         dossier (str): Le chemin vers le dossier contenant les fichiers Excel.
+        nb_threads (int | None): Le nombre de lectures simultanées, une par fichier par défaut.
 
     Returns:
         dict: Un dictionnaire où les clés sont les noms de fichiers sans extension
               et les valeurs sont les DataFrames correspondants.
     """
-    
+
+    fichiers = [fichier for fichier in os.listdir(dossier) if fichier.endswith((".xlsx", ".xls"))]
     dataframes = {}
-    for fichier in os.listdir(dossier):
-        if fichier.endswith((".xlsx", ".xls")):
-            chemin = os.path.join(dossier, fichier)
-            nom = os.path.splitext(fichier)[0]
-            try:
-                if "partner" in nom.lower():
-                    df = traiter_excel_partner(chemin)
-                else:
-                    df = pd.read_excel(chemin)
-                dataframes[nom] = df
-            except Exception as e:
-                print(f"Erreur avec {fichier}: {e}")
+    if not fichiers:
+        return dataframes
+    with ThreadPoolExecutor(max_workers=nb_threads or len(fichiers)) as executor:
+        lectures = {fichier: executor.submit(charger_excel, os.path.join(dossier, fichier)) for fichier in fichiers}
+    for fichier, lecture in lectures.items():
+        try:
+            dataframes[os.path.splitext(fichier)[0]] = lecture.result()
+        except Exception as e:
+            logger_general.warning("Erreur avec %s : %s", fichier, e)
     return dataframes
 
 def traiter_excel_partner(chemin):
-    return pd.read_excel(chemin, header=2)
- 
+    return lire_excel(chemin, header=2)
+
+
+def charger_entrees(chemin_univ:str, chemin_etudiants:str) -> dict:
+    """Charge en parallèle le fichier des partenaires et celui des choix des étudiants, donnés par leurs chemins,
+    sous les clés attendues par conversion_df_brute_pour_affectation (le nom des fichiers est libre).
+
+    Args:
+        chemin_univ: Le fichier Excel des universités partenaires (en-tête à la 3e ligne si son nom contient "partner").
+        chemin_etudiants: Le fichier Excel des choix des étudiants.
+
+    Returns:
+        dict: {"univ_data_mobility": df des partenaires, "choix_etudiants": df des étudiants}
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        univ = executor.submit(lire_excel_partenaires, chemin_univ, en_tete_partenaires(chemin_univ))
+        etudiants = executor.submit(lire_excel, chemin_etudiants)
+    return {"univ_data_mobility": univ.result(), "choix_etudiants": etudiants.result()}
+
 test = False
 
 if test:
     # Chemin du dossier contenant les fichiers Excel
-    dossier = r"src\\main\\data_for_test"  
-    
+    dossier = r"src\\main\\data_for_test"
+
     dataframes = charger_excels(dossier)
     print(dataframes.keys())
     # Afficher les 5 premières lignes de chaque DataFrame
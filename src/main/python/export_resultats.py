@@ -0,0 +1,241 @@
+import csv
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+SEMESTRES = ["S8", "S9"]
+
+# Colonnes d'aide au tri ajoutées par tri_df_etudiant_semestre_ponderation, laissées de côté par défaut
+COLONNES_AIDE = ["Rang", "Priorite", "Index_original", "Nb_semestres_demandes"]
+
+# Nombre de lignes formatées et écrites à la fois
+TAILLE_LOT_EXPORT = 10_000
+
+EXTENSIONS = {".xlsx": "excel", ".csv": "csv", ".parquet": "parquet"}
+
+
+def colonnes_par_defaut(df_resultat:pd.DataFrame) -> list[str]:
+    """Retourne les colonnes exportées par défaut : toutes celles de df_resultat (y compris les colonnes propres au fichier
+    des étudiants), sauf les colonnes d'aide au tri."""
+    return [colonne for colonne in df_resultat.columns if colonne not in COLONNES_AIDE]
+
+
+def _format_depuis_chemin(chemin:str) -> str:
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension not in EXTENSIONS:
+        raise ValueError(f"Format d'export non pris en charge : {extension} (attendu : {', '.join(EXTENSIONS)})")
+    return EXTENSIONS[extension]
+
+
+def _formater_valeur(valeur):
+    """Retourne la valeur telle qu'écrite dans une cellule : tuple de voeux joint par "; ", None pour une valeur manquante."""
+    if isinstance(valeur, (tuple, list)):
+        return "; ".join(str(v) for v in valeur)
+    if valeur is None or (isinstance(valeur, float) and np.isnan(valeur)):
+        return None
+    if isinstance(valeur, np.generic):
+        return valeur.item()
+    return valeur
+
+
+def _nom_unique(nom_base:str, noms_pris:set, longueur_max:int | None=None) -> str:
+    """Retourne nom_base, suffixé de ~1, ~2... s'il est déjà pris sans tenir compte de la casse, et l'ajoute à noms_pris (en minuscules)."""
+    nom_base = nom_base[:longueur_max]
+    nom, k = nom_base, 1
+    while nom.lower() in noms_pris:
+        suffixe = f"~{k}"
+        nom, k = (nom_base[:longueur_max - len(suffixe)] if longueur_max else nom_base) + suffixe, k + 1
+    noms_pris.add(nom.lower())
+    return nom
+
+
+def _formater_lot(df_lot:pd.DataFrame, colonnes:list[str]) -> list[tuple]:
+    colonnes_formatees = [[_formater_valeur(valeur) for valeur in df_lot[colonne].tolist()] for colonne in colonnes]
+    return list(zip(*colonnes_formatees))
+
+
+class EcrivainCSV:
+    """Écrit les lignes au fil de l'eau dans un fichier CSV (UTF-8 avec BOM pour l'ouverture dans Excel)."""
+
+    def __init__(self, chemin:str, colonnes:list[str]):
+        self._fichier = open(chemin, "w", newline="", encoding="utf-8-sig")
+        self._csv = csv.writer(self._fichier, delimiter=";")
+        self._csv.writerow(colonnes)
+
+    def ecrire(self, lignes:list[tuple]):
+        self._csv.writerows(lignes)
+
+    def fermer(self):
+        self._fichier.close()
+
+
+class EcrivainParquet:
+    """Écrit les lignes par groupes de lignes dans un fichier Parquet (nécessite pyarrow)."""
+
+    def __init__(self, chemin:str, colonnes:list[str], types:dict):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("L'export Parquet nécessite pyarrow (pip install pyarrow)") from e
+        self._pa = pa
+        self._colonnes = colonnes
+        self._schema = pa.schema([(colonne, _type_arrow(pa, types.get(colonne))) for colonne in colonnes])
+        self._ecrivain = pq.ParquetWriter(chemin, self._schema)
+
+    def ecrire(self, lignes:list[tuple]):
+        if not lignes:
+            return
+        colonnes = list(zip(*lignes))
+        self._ecrivain.write_table(self._pa.Table.from_arrays(
+            [self._pa.array(valeurs, type=champ.type) for valeurs, champ in zip(colonnes, self._schema)],
+            schema=self._schema,
+        ))
+
+    def fermer(self):
+        self._ecrivain.close()
+
+
+def _type_arrow(pa, dtype):
+    """Type Arrow d'une colonne exportée : numérique si la colonne l'est, texte sinon (voeux, noms de partenaires...)."""
+    if dtype is not None and pd.api.types.is_bool_dtype(dtype):
+        return pa.bool_()
+    if dtype is not None and pd.api.types.is_integer_dtype(dtype):
+        return pa.int64()
+    if dtype is not None and pd.api.types.is_float_dtype(dtype):
+        return pa.float64()
+    return pa.string()
+
+
+class ClasseurExcel:
+    """Classeur openpyxl en mode écriture seule : les lignes sont écrites sur disque au fur et à mesure."""
+
+    def __init__(self, chemin:str):
+        from openpyxl import Workbook
+
+        self.chemin = chemin
+        self._classeur = Workbook(write_only=True)
+        self._noms_feuilles = set()
+
+    def nouvelle_feuille(self, titre:str, colonnes:list[str]) -> "EcrivainFeuilleExcel":
+        # Excel limite les noms de feuilles à 31 caractères, sans []:*?/\ et uniques
+        titre = _nom_unique(re.sub(r"[\[\]:*?/\\]", "_", str(titre))[:31] or "Feuille", self._noms_feuilles, 31)
+        feuille = self._classeur.create_sheet(title=titre)
+        feuille.append(colonnes)
+        return EcrivainFeuilleExcel(feuille)
+
+    def fermer(self):
+        self._classeur.save(self.chemin)
+
+
+class EcrivainFeuilleExcel:
+
+    def __init__(self, feuille):
+        self._feuille = feuille
+        self.nom = feuille.title
+
+    def ecrire(self, lignes:list[tuple]):
+        for ligne in lignes:
+            self._feuille.append(ligne)
+
+    def fermer(self):
+        pass
+
+
+def _affectations_par_universite(df_resultat:pd.DataFrame, colonnes_finales:list[str]):
+    """Parcourt les partenaires obtenus, dans l'ordre alphabétique, avec le semestre et la position de chacun de leurs étudiants
+    (semestre par semestre, dans l'ordre de df_resultat)."""
+    semestres = np.repeat([colonne.split(" ")[-1] for colonne in colonnes_finales], len(df_resultat))
+    positions = np.tile(np.arange(len(df_resultat)), len(colonnes_finales))
+    univs = pd.concat([df_resultat[colonne] for colonne in colonnes_finales], ignore_index=True) if colonnes_finales else pd.Series([], dtype=object)
+    obtenus = univs.map(lambda univ: isinstance(univ, str)).to_numpy(dtype=bool)
+    semestres, positions, univs = semestres[obtenus], positions[obtenus], univs[obtenus].to_numpy(dtype=object)
+    ordre = np.argsort(univs, kind="stable")
+    semestres, positions, univs = semestres[ordre], positions[ordre], univs[ordre]
+    coupures = np.flatnonzero(univs[1:] != univs[:-1]) + 1
+    for debut, fin in zip(np.concatenate([[0], coupures]), np.concatenate([coupures, [len(univs)]])):
+        if fin > debut:
+            yield univs[debut], semestres[debut:fin].tolist(), positions[debut:fin]
+
+
+def _ouvrir_fichier(chemin:str, format_export:str, colonnes:list[str], types:dict):
+    if format_export == "csv":
+        return EcrivainCSV(chemin, colonnes)
+    return EcrivainParquet(chemin, colonnes, types)
+
+
+def exporter_resultats(df_resultat:pd.DataFrame, chemin:str, colonnes:list[str] | None=None, listes_par_universite:bool=False,
+                       semestres:list[str]=SEMESTRES, taille_lot:int=TAILLE_LOT_EXPORT) -> dict:
+    """Écrit les affectations par lots dans un fichier .xlsx (openpyxl en écriture seule), .csv ou .parquet.
+
+    Les voeux (tuples) sont écrits sous forme de texte "A; B; C". Si listes_par_universite est vrai, la liste des étudiants
+    affectés à chaque partenaire est écrite après le fichier principal, un partenaire après l'autre, plutôt que dans la même passe :
+    un seul fichier de liste est ainsi ouvert à la fois, quel que soit le nombre de partenaires. Une feuille par partenaire
+    pour un fichier Excel, un fichier par partenaire dans le dossier "<nom du fichier>_par_universite" sinon. Les noms de feuilles et de fichiers
+    sont rendus uniques (suffixe ~1, ~2...) sans tenir compte de la casse.
+
+    Args:
+        df_resultat: Le dataframe retourné par traitement_scenario_hybride.
+        chemin: Le fichier de sortie, dont l'extension donne le format.
+        colonnes: Les colonnes à exporter, dans l'ordre (par défaut colonnes_par_defaut(df_resultat)).
+        listes_par_universite: Écrire aussi la liste des étudiants affectés à chaque partenaire.
+        semestres: Les semestres dont les affectations alimentent les listes par partenaire.
+        taille_lot: Le nombre de lignes formatées et écrites à la fois.
+
+    Returns:
+        res: le nombre de lignes écrites dans le fichier principal et pour chaque partenaire, et le nom de la feuille ou du fichier
+            de chaque partenaire.
+    """
+    format_export = _format_depuis_chemin(chemin)
+    if colonnes is None:
+        colonnes = colonnes_par_defaut(df_resultat)
+    manquantes = [colonne for colonne in colonnes if colonne not in df_resultat.columns]
+    if manquantes:
+        raise KeyError(f"Colonnes absentes du résultat : {manquantes}")
+    colonnes_finales = [f"choix_final {semestre}" for semestre in semestres if f"choix_final {semestre}" in df_resultat.columns]
+    colonnes_listes = ["Semestre"] + colonnes
+    types = {colonne: df_resultat[colonne].dtype for colonne in colonnes}
+
+    classeur = None
+    if format_export == "excel":
+        classeur = ClasseurExcel(chemin)
+        principal = classeur.nouvelle_feuille("Affectations", colonnes)
+    else:
+        principal = _ouvrir_fichier(chemin, format_export, colonnes, types)
+        dossier_listes = os.path.splitext(chemin)[0] + "_par_universite"
+        if listes_par_universite:
+            os.makedirs(dossier_listes, exist_ok=True)
+
+    res = {"lignes": 0, "par_universite": {}, "listes": {}}
+    try:
+        for debut in range(0, len(df_resultat), taille_lot):
+            lignes = _formater_lot(df_resultat.iloc[debut:debut + taille_lot], colonnes)
+            principal.ecrire(lignes)
+            res["lignes"] += len(lignes)
+        if not listes_par_universite:
+            return res
+
+        # Les listes sont écrites un partenaire après l'autre : un seul fichier est ouvert à la fois
+        noms_fichiers = set()
+        for univ, semestres_lignes, positions in _affectations_par_universite(df_resultat, colonnes_finales):
+            if classeur is not None:
+                ecrivain = classeur.nouvelle_feuille(univ, colonnes_listes)
+                nom = ecrivain.nom
+            else:
+                nom = _nom_unique(re.sub(r'[<>:"/\\|?*]', "_", univ), noms_fichiers) + os.path.splitext(chemin)[1]
+                ecrivain = _ouvrir_fichier(os.path.join(dossier_listes, nom), format_export, colonnes_listes, dict(types, Semestre=None))
+            try:
+                for debut in range(0, len(positions), taille_lot):
+                    lignes = _formater_lot(df_resultat.iloc[positions[debut:debut + taille_lot]], colonnes)
+                    ecrivain.ecrire([(semestre,) + ligne for semestre, ligne in zip(semestres_lignes[debut:debut + taille_lot], lignes)])
+            finally:
+                ecrivain.fermer()
+            res["par_universite"][univ] = len(positions)
+            res["listes"][univ] = nom
+    finally:
+        principal.fermer()
+        if classeur is not None:
+            classeur.fermer()
+    return res
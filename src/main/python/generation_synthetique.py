@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+from src.main.python.etat_universites import EtatUniversites
+
+SEMESTRES = ["S8", "S9"]
+SPECIALITES = ["MM", "MC", "SNI", "BAT", "EIT", "IDU"]
+TAILLE_GROUPE_SPE = {"MM":40, "MC":20, "SNI":20, "BAT":40, "EIT":20, "IDU":20}
+
+# Nombre maximal de tirages (étudiants x partenaires) traités en une fois lors du tirage des choix
+TAILLE_LOT_TIRAGE = 2**22
+
+
+def generer_df_univ_synthetique(nb_univ:int, rng:np.random.Generator, places_max:int=4, proba_specialite:float=0.5,
+                                proba_important:float=0.3, proba_note_min:float=0.3) -> pd.DataFrame:
+    """Génère une table de partenaires fictifs au format brut attendu par traitement_df_univ.
+
+    Args:
+        nb_univ: Le nombre de partenaires.
+        rng: Le générateur NumPy.
+        places_max: Le nombre de places par semestre est tiré entre 0 et places_max inclus.
+        proba_specialite: Probabilité qu'un partenaire accepte une spécialité pour un semestre.
+        proba_important: Probabilité qu'un partenaire soit prioritaire.
+        proba_note_min: Probabilité qu'un partenaire impose une note minimale.
+
+    Returns:
+        pd.DataFrame avec les colonnes nom_partenaire, SX_total_places, SX_<spécialité>, important et note_min.
+    """
+    data = {"nom_partenaire": np.char.add("PARTENAIRE_", np.arange(nb_univ).astype(str)).astype(object)}
+    for semestre in SEMESTRES:
+        data[f"{semestre}_total_places"] = rng.integers(0, places_max + 1, nb_univ)
+        ouvert = rng.random((nb_univ, len(SPECIALITES))) < proba_specialite
+        places_spe = rng.integers(1, places_max + 1, (nb_univ, len(SPECIALITES)))
+        for k, spe in enumerate(SPECIALITES):
+            data[f"{semestre}_{spe}"] = np.where(ouvert[:, k], places_spe[:, k], np.nan)
+    data["important"] = np.where(rng.random(nb_univ) < proba_important, "Oui", "Non").astype(object)
+    data["note_min"] = np.where(rng.random(nb_univ) < proba_note_min, np.round(rng.uniform(8, 16, nb_univ), 1), np.nan)
+    return pd.DataFrame(data)
+
+
+def effectifs_par_specialite(n:int, taille_groupe_spe:dict=TAILLE_GROUPE_SPE) -> dict:
+    """Répartit n étudiants selon les quotas des spécialités, comme generer_df_choix_etudiants_spe_compatible."""
+    total_defini = sum(taille_groupe_spe.values())
+    return {spe: round(taille_groupe_spe[spe] / total_defini * n) for spe in taille_groupe_spe}
+
+
+def tirer_choix_distincts(nb_etudiants:int, candidats:np.ndarray, nb_choix:int, rng:np.random.Generator) -> np.ndarray:
+    """Tire pour chaque étudiant nb_choix partenaires distincts parmi les candidats, dans un ordre aléatoire.
+
+    Quand les candidats sont nombreux, les indices sont tirés avec remise et seules les lignes contenant un doublon
+    sont retirées (rejet). Sinon, chaque ligne est une permutation aléatoire tronquée, obtenue par lots en triant
+    des clés uniformes.
+
+    Returns:
+        np.ndarray int32 (nb_etudiants, nb_choix) des ids tirés.
+    """
+    m = len(candidats)
+    nb_choix = min(nb_choix, m)
+    res = np.empty((nb_etudiants, nb_choix), dtype=np.int32)
+    if nb_choix == 0:
+        return res
+    if m >= 4 * nb_choix:
+        indices = rng.integers(0, m, (nb_etudiants, nb_choix))
+        a_retirer = np.arange(nb_etudiants)
+        while len(a_retirer):
+            tries = np.sort(indices[a_retirer], axis=1)
+            doublons = (tries[:, 1:] == tries[:, :-1]).any(axis=1)
+            a_retirer = a_retirer[doublons]
+            indices[a_retirer] = rng.integers(0, m, (len(a_retirer), nb_choix))
+        res[:] = candidats[indices]
+        return res
+    taille_lot = max(1, TAILLE_LOT_TIRAGE // m)
+    for debut in range(0, nb_etudiants, taille_lot):
+        fin = min(debut + taille_lot, nb_etudiants)
+        cles = rng.random((fin - debut, m))
+        if nb_choix < m:
+            selection = np.argpartition(cles, nb_choix - 1, axis=1)[:, :nb_choix]
+            ordre = np.argsort(np.take_along_axis(cles, selection, axis=1), axis=1)
+            selection = np.take_along_axis(selection, ordre, axis=1)
+        else:
+            selection = np.argsort(cles, axis=1)
+        res[debut:fin] = candidats[selection]
+    return res
+
+
+def generer_choix_synthetiques(n:int, etat_univ:EtatUniversites, rng:np.random.Generator, proba_un_seul_semestre:float=0.3,
+                               nb_choix_max:int=5, taille_groupe_spe:dict=TAILLE_GROUPE_SPE) -> dict:
+    """Génère par opérations vectorisées une cohorte fictive de choix compatibles, triée par note décroissante.
+
+    Args:
+        n: Le nombre total d'étudiants (réparti selon les quotas des spécialités).
+        etat_univ: L'état des universités donnant les partenaires compatibles de chaque spécialité.
+        rng: Le générateur NumPy.
+        proba_un_seul_semestre: Probabilité qu'un étudiant ne fasse des vœux que pour un seul semestre.
+        nb_choix_max: Le nombre maximal de voeux par semestre.
+
+    Returns:
+        dict avec "Id Etudiant", "Specialite", "Note" et, pour chaque semestre, "Choix SX" : une matrice int32
+        (n, nb_choix_max) des ids de partenaires complétée par -1 (ligne vide si l'étudiant ne demande pas le semestre).
+    """
+    if n < 1:
+        raise ValueError("Le nombre d'étudiants doit être au moins 1.")
+    effectifs = effectifs_par_specialite(n, taille_groupe_spe)
+    specialites = np.repeat(np.asarray(list(effectifs), dtype=object), list(effectifs.values()))
+    total = len(specialites)
+    notes = np.round(rng.uniform(0, 20, total), 2)
+
+    un_seul_semestre = rng.random(total) < proba_un_seul_semestre
+    semestre_choisi = rng.integers(0, len(SEMESTRES), total)
+
+    res = {"Id Etudiant": np.arange(1, total + 1), "Specialite": specialites, "Note": notes}
+    for k, semestre in enumerate(SEMESTRES):
+        choix = np.full((total, nb_choix_max), -1, dtype=np.int32)
+        demande = ~un_seul_semestre | (semestre_choisi == k)
+        debut = 0
+        for spe, effectif in effectifs.items():
+            lignes = np.flatnonzero(demande[debut:debut + effectif]) + debut
+            candidats = etat_univ.get_ids_compatibles(semestre, spe)
+            tirage = tirer_choix_distincts(len(lignes), candidats, nb_choix_max, rng)
+            choix[lignes, :tirage.shape[1]] = tirage
+            debut += effectif
+        res[f"Choix {semestre}"] = choix
+
+    ordre = np.argsort(-notes, kind="stable")
+    return {cle: valeurs[ordre] for cle, valeurs in res.items()}
+
+
+def choix_synthetiques_vers_df(choix_synthetiques:dict, etat_univ:EtatUniversites) -> pd.DataFrame:
+    """Convertit la sortie de generer_choix_synthetiques au format de generer_df_choix_etudiants_spe_compatible
+    (voeux séparés par "; ", chaîne vide si le semestre n'est pas demandé)."""
+    noms = np.asarray(etat_univ.noms + [""], dtype=object)
+    data = {cle: choix_synthetiques[cle] for cle in ["Id Etudiant", "Specialite", "Note"]}
+    for semestre in SEMESTRES:
+        choix = choix_synthetiques[f"Choix {semestre}"]
+        ids = np.where(choix >= 0, choix, len(etat_univ.noms))
+        colonne = noms[ids[:, 0]]
+        for j in range(1, choix.shape[1]):
+            suite = choix[:, j] >= 0
+            colonne = np.where(suite, colonne + "; " + noms[ids[:, j]], colonne)
+        data[f"Choix {semestre}"] = colonne
+    return pd.DataFrame(data)
+
+
+def generer_df_choix_etudiants_vectorise(n:int, df_univ:pd.DataFrame | EtatUniversites, rng:np.random.Generator | None=None,
+                                         proba_un_seul_semestre:float=0.3) -> pd.DataFrame:
+    """Équivalent vectorisé de generer_df_choix_etudiants_spe_compatible, piloté par un générateur NumPy.
+
+    Args:
+        n: Le nombre total d'étudiants.
+        df_univ: Le dataframe des universités issu de traitement_df_univ, ou un EtatUniversites déjà construit.
+        rng: Le générateur NumPy (un nouveau générateur non initialisé si None).
+        proba_un_seul_semestre: Probabilité qu'un étudiant ne fasse des vœux que pour un seul semestre.
+
+    Returns:
+        pd.DataFrame trié par note décroissante avec Id Etudiant, Specialite, Note, Choix S8 et Choix S9.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    etat_univ = df_univ if isinstance(df_univ, EtatUniversites) else EtatUniversites(df_univ, SEMESTRES)
+    choix_synthetiques = generer_choix_synthetiques(n, etat_univ, rng, proba_un_seul_semestre)
+    return choix_synthetiques_vers_df(choix_synthetiques, etat_univ)
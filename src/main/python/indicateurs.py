@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.moteur_rapide import CohorteEncodee, encoder_cohorte
+
+
+def rangs_obtenus(choix:np.ndarray, ids_obtenus:np.ndarray) -> np.ndarray:
+    """Retourne pour chaque étudiant le rang (à partir de 1) du voeu obtenu, 0 s'il a été affecté hors de ses voeux, -1 s'il n'a rien obtenu."""
+    correspond = (choix == ids_obtenus[:, None]) & (ids_obtenus[:, None] >= 0)
+    rangs = np.where(correspond.any(axis=1), correspond.argmax(axis=1) + 1, 0)
+    return np.where(ids_obtenus >= 0, rangs, -1)
+
+
+def taux_remplissage(etat_univ:EtatUniversites, semestre:str, prioritaire:bool | None=None) -> float:
+    """Retourne le rapport entre places prises et places totales des partenaires du semestre (NaN si aucune place).
+
+    Args:
+        etat_univ: L'état des universités après affectation.
+        semestre: Le semestre.
+        prioritaire: True ou False pour se limiter aux partenaires prioritaires ou non prioritaires, None pour tous.
+    """
+    garder = etat_univ.places_connues[semestre] & etat_univ.places_prises_connues[semestre]
+    if prioritaire is not None:
+        garder &= etat_univ.prioritaire[semestre] == prioritaire
+    places = etat_univ.places[semestre][garder].sum()
+    if places <= 0:
+        return np.nan
+    return float(etat_univ.places_prises[semestre][garder].sum() / places)
+
+
+def indicateurs_encodes(etat_univ:EtatUniversites, cohorte:CohorteEncodee, resultats:dict) -> dict:
+    """Calcule les indicateurs de remplissage et de satisfaction d'une affectation encodée.
+
+    Args:
+        etat_univ: L'état des universités après affectation.
+        cohorte: La cohorte encodée.
+        resultats: Pour chaque semestre, le tableau des ids obtenus (-1 si aucun), dans l'ordre de la cohorte.
+
+    Returns:
+        res: un dictionnaire "indicateur semestre" -> valeur.
+    """
+    res = {}
+    for semestre, ids_obtenus in resultats.items():
+        a_choisi = cohorte.a_choisi[semestre]
+        rangs = rangs_obtenus(cohorte.choix[semestre], ids_obtenus)[a_choisi]
+        nb_demandes = int(a_choisi.sum())
+        nb_affectes = int((rangs != -1).sum())
+        res[f"Taux remplissage {semestre}"] = taux_remplissage(etat_univ, semestre)
+        res[f"Taux remplissage prioritaires {semestre}"] = taux_remplissage(etat_univ, semestre, True)
+        res[f"Taux remplissage non prioritaires {semestre}"] = taux_remplissage(etat_univ, semestre, False)
+        res[f"Demandes {semestre}"] = nb_demandes
+        res[f"Non affectes {semestre}"] = nb_demandes - nb_affectes
+        res[f"Premier voeu {semestre}"] = float((rangs == 1).sum() / nb_demandes) if nb_demandes else np.nan
+        res[f"Hors voeux {semestre}"] = int((rangs == 0).sum())
+        res[f"Rang moyen {semestre}"] = float(rangs[rangs > 0].mean()) if (rangs > 0).any() else np.nan
+    return res
+
+
+def calculer_indicateurs(df_univ:pd.DataFrame, df_resultat:pd.DataFrame, semestres:list[str]=["S8", "S9"]) -> dict:
+    """Calcule les indicateurs de remplissage et de satisfaction à partir des sorties de traitement_scenario_hybride.
+
+    Args:
+        df_univ: Le dataframe des universités partenaires après affectation.
+        df_resultat: Le dataframe des étudiants retourné par traitement_scenario_hybride.
+
+    Returns:
+        res: un dictionnaire "indicateur semestre" -> valeur.
+    """
+    etat_univ = EtatUniversites(df_univ, semestres)
+    cohorte = encoder_cohorte(df_resultat, etat_univ, semestres)
+    resultats = {}
+    for semestre in semestres:
+        ids = [etat_univ.get_id(nom) if isinstance(nom, str) else None for nom in df_resultat[f"choix_final {semestre}"].tolist()]
+        resultats[semestre] = np.asarray([-1 if i is None else i for i in ids], dtype=np.int32)
+    return indicateurs_encodes(etat_univ, cohorte, resultats)
@@ -0,0 +1,137 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+# Modes de journalisation
+MODE_COMPLET = "complet"
+MODE_SILENCIEUX = "silencieux"
+
+# Codes compacts des décisions, écrits par le logger des décisions en mode silencieux
+CODE_SANS_VOEU = "V"
+CODE_VOEU_ORDONNE = "O"  # suivi du rang du voeu obtenu, ex : O2
+CODE_VOEU_NON_ORDONNE = "R"
+CODE_FALLBACK = "F"
+CODE_AUCUNE = "N"
+
+FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Logger général
+logger_general = logging.getLogger('general')
+# Logger spécifique pour le taux
+logger_debug = logging.getLogger('taux')
+# Logger des décisions compactes (une ligne "id;semestre;code" par décision)
+logger_decisions = logging.getLogger('decisions')
+
+_listener = None
+_queue_handler = None
+
+
+class _QueueHandlerDiffere(logging.handlers.QueueHandler):
+    """QueueHandler qui laisse le formatage du message au thread d'écriture.
+
+    Le QueueHandler standard formate le message dans le thread appelant. Les arguments des messages
+    de l'algorithme sont des str et des nombres immuables, l'enregistrement peut donc être transmis tel quel.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class _FiltreLoggers(logging.Filter):
+    """Ne laisse passer que les enregistrements des loggers donnés."""
+
+    def __init__(self, noms:list[str]):
+        super().__init__()
+        self.noms = set(noms)
+
+    def filter(self, record):
+        return record.name in self.noms
+
+
+def _chemin_log(fichier:str, dossier:str | None, par_processus:bool) -> str:
+    if par_processus:
+        base, extension = os.path.splitext(fichier)
+        fichier = f"{base}_{os.getpid()}{extension}"
+    return os.path.join(dossier, fichier) if dossier is not None else fichier
+
+
+def configurer_journalisation(fichier_general:str='log.txt', fichier_debug:str='log_debug.txt', mode:str=MODE_COMPLET,
+                              dossier:str | None=None, par_processus:bool=False) -> dict:
+    """Configure l'écriture des logs de l'algorithme dans un thread d'arrière-plan.
+
+    Rien n'est configuré à l'import des modules : tant que cette fonction n'est pas appelée, aucun fichier n'est ouvert
+    et seuls les avertissements s'affichent (sur la sortie d'erreur). Les loggers n'envoient que des enregistrements dans
+    une file ; un QueueListener les formate et les écrit dans les fichiers, sans bloquer la boucle d'affectation.
+    Un nouvel appel remplace la configuration précédente.
+
+    Args:
+        fichier_general: Le fichier des logs généraux (et des décisions en mode silencieux).
+        fichier_debug: Le fichier des logs de debug.
+        mode: "complet" écrit tous les messages, "silencieux" n'écrit qu'un code compact par décision.
+        dossier: Le dossier des fichiers (créé si besoin), par exemple un dossier par exécution ; le dossier courant par défaut.
+        par_processus: Ajouter le pid au nom des fichiers, pour que les processus d'un pool n'écrivent pas dans les mêmes fichiers.
+
+    Returns:
+        res: les chemins des fichiers {"general": ..., "debug": ...}.
+    """
+    global _listener, _queue_handler
+    if mode not in [MODE_COMPLET, MODE_SILENCIEUX]:
+        raise ValueError(f"Mode de journalisation inconnu : {mode}")
+    arreter_journalisation()
+    if dossier is not None:
+        os.makedirs(dossier, exist_ok=True)
+    fichier_general = _chemin_log(fichier_general, dossier, par_processus)
+    fichier_debug = _chemin_log(fichier_debug, dossier, par_processus)
+
+    formatter = logging.Formatter(FORMAT)
+    fh_general = logging.FileHandler(fichier_general, mode='w')
+    fh_general.setFormatter(formatter)
+    fh_general.addFilter(_FiltreLoggers(['general', 'decisions']))
+    fh_taux = logging.FileHandler(fichier_debug, mode='w')
+    fh_taux.setFormatter(formatter)
+    fh_taux.addFilter(_FiltreLoggers(['taux']))
+
+    file_logs = queue.SimpleQueue()
+    _queue_handler = _QueueHandlerDiffere(file_logs)
+    _listener = logging.handlers.QueueListener(file_logs, fh_general, fh_taux)
+
+    # En mode silencieux, les messages détaillés ne sont même pas construits (niveau désactivé)
+    silencieux = mode == MODE_SILENCIEUX
+    logger_general.setLevel(logging.WARNING if silencieux else logging.INFO)
+    logger_debug.setLevel(logging.WARNING if silencieux else logging.DEBUG)
+    logger_decisions.setLevel(logging.INFO if silencieux else logging.WARNING)
+    for logger in (logger_general, logger_debug, logger_decisions):
+        logger.addHandler(_queue_handler)
+        logger.propagate = False
+    _listener.start()
+    return {"general": fichier_general, "debug": fichier_debug}
+
+
+def arreter_journalisation():
+    """Vide la file des logs, arrête le thread d'écriture et ferme les fichiers."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    if _queue_handler is not None:
+        for logger in (logger_general, logger_debug, logger_decisions):
+            logger.removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+def detacher_journalisation():
+    """Retire des loggers la file héritée d'un processus parent (démarrage par fork), sans toucher à ses fichiers
+    ni à son thread d'écriture : les enregistrements du processus enfant ne s'accumulent plus dans une file que personne ne lit."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        for logger in (logger_general, logger_debug, logger_decisions):
+            logger.removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+
+
+atexit.register(arreter_journalisation)
@@ -0,0 +1,97 @@
+# Affectation en ligne de commande, sans interface graphique (tkinter n'est jamais importé). Exemple :
+# python cli.py --cohorte univ.xlsx etudiants.xlsx affectations.xlsx --cohorte univ.xlsx promo2.xlsx promo2.csv --alpha 0.1 --limite-ordre 3
+import argparse
+import sys
+import time
+
+
+def analyser_arguments(argv:list[str] | None=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Affecte les étudiants aux universités partenaires pour une ou plusieurs cohortes, sans interface graphique.",
+    )
+    parser.add_argument("--cohorte", nargs=3, action="append", required=True, metavar=("UNIVERSITES", "ETUDIANTS", "SORTIE"),
+                        help="Fichier Excel des partenaires, fichier Excel des choix des étudiants et fichier de résultat (.xlsx, .csv ou .parquet). "
+                             "À répéter pour traiter plusieurs cohortes.")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Coefficient de pénalité des doubles mobilités, entre 0 et 1 (défaut : 0.05).")
+    parser.add_argument("--limite-ordre", type=int, default=3, help="Nombre de voeux traités dans l'ordre, entre 0 et 5 (défaut : 3).")
+    parser.add_argument("--calcul-completion", choices=["Taux", "Places Prises"], default="Taux", help="Calcul de la complétion des partenaires (défaut : Taux).")
+    parser.add_argument("--moteur", choices=["reference", "rapide", "optimal", "acceptation_differee"], default="rapide",
+                        help="Moteur d'affectation : reference et rapide donnent le même résultat, optimal minimise le coût total (nécessite scipy), "
+                             "acceptation_differee donne une affectation stable (défaut : rapide).")
+    parser.add_argument("--semestres-en-parallele", action="store_true", help="Affecter S8 et S9 en parallèle (même résultat).")
+    parser.add_argument("--composantes-en-parallele", action="store_true",
+                        help="Affecter en parallèle les groupes d'étudiants qui ne se disputent aucune place (moteur rapide, même résultat).")
+    parser.add_argument("--listes-par-universite", action="store_true", help="Exporter aussi la liste des étudiants de chaque université.")
+    parser.add_argument("--colonnes", nargs="+", default=None, metavar="COLONNE",
+                        help="Colonnes du résultat à exporter, dans l'ordre (défaut : toutes sauf Rang, Priorite, Index_original et Nb_semestres_demandes).")
+    parser.add_argument("--dossier-cache", default=None, help="Dossier du cache des entrées converties (aucun cache par défaut).")
+    parser.add_argument("--dossier-logs", default=None, help="Dossier où écrire log.txt et log_debug.txt (aucun journal par défaut, seuls les avertissements s'affichent).")
+    parser.add_argument("--mode-logs", choices=["complet", "silencieux"], default="silencieux",
+                        help="complet : tous les messages, silencieux : un code compact par décision (défaut : silencieux).")
+    return parser.parse_args(argv)
+
+
+def traiter_cohorte(chemin_univ:str, chemin_etudiants:str, chemin_sortie:str, alpha:float=0.05, limite_ordre:int=3, calcul_completion:str="Taux",
+                    moteur:str="rapide", listes_par_universite:bool=False, dossier_cache:str | None=None, semestres_en_parallele:bool=False,
+                    composantes_en_parallele:bool=False, colonnes:list[str] | None=None) -> dict:
+    """Charge une cohorte, l'affecte et écrit le résultat.
+
+    Returns:
+        res: le nombre d'étudiants, le nombre d'affectés par semestre et le résultat de exporter_resultats.
+    """
+    # Imports différés : l'aide (--help) et les erreurs d'arguments ne chargent ni pandas ni l'algorithme
+    from src.main.python.algo_affectation_classement import traitement_scenario_hybride, tri_df_etudiant_semestre_ponderation
+    from src.main.python.cache_entrees import charger_fichiers_convertis
+    from src.main.python.export_resultats import exporter_resultats
+
+    entrees = charger_fichiers_convertis(chemin_univ, chemin_etudiants, dossier_cache)
+    df_etu = tri_df_etudiant_semestre_ponderation(entrees["choix_etudiants"], alpha=alpha)
+    df_resultat = traitement_scenario_hybride(entrees["universites_partenaires"], df_etu, limite_ordre, calcul_completion, moteur=moteur,
+                                              semestres_en_parallele=semestres_en_parallele, composantes_en_parallele=composantes_en_parallele)
+    export = exporter_resultats(df_resultat, chemin_sortie, colonnes=colonnes, listes_par_universite=listes_par_universite)
+    return {
+        "etudiants": len(df_resultat),
+        "affectes": {semestre: int(df_resultat[f"choix_final {semestre}"].notna().sum()) for semestre in ["S8", "S9"]},
+        "export": export,
+    }
+
+
+def main(argv:list[str] | None=None) -> int:
+    """Traite chaque cohorte l'une après l'autre ; une cohorte en erreur est signalée sans arrêter les suivantes.
+
+    Returns:
+        res: le code de sortie, 0 si toutes les cohortes ont été traitées, 1 sinon.
+    """
+    arguments = analyser_arguments(argv)
+    if arguments.dossier_logs is not None:
+        from src.main.python.journalisation import configurer_journalisation
+
+        configurer_journalisation(mode=arguments.mode_logs, dossier=arguments.dossier_logs)
+    code = 0
+    for chemin_univ, chemin_etudiants, chemin_sortie in arguments.cohorte:
+        depart = time.perf_counter()
+        try:
+            res = traiter_cohorte(
+                chemin_univ, chemin_etudiants, chemin_sortie,
+                alpha=arguments.alpha,
+                limite_ordre=arguments.limite_ordre,
+                calcul_completion=arguments.calcul_completion,
+                moteur=arguments.moteur,
+                listes_par_universite=arguments.listes_par_universite,
+                dossier_cache=arguments.dossier_cache,
+                semestres_en_parallele=arguments.semestres_en_parallele,
+                composantes_en_parallele=arguments.composantes_en_parallele,
+                colonnes=arguments.colonnes,
+            )
+        except Exception as e:
+            print(f"Erreur pour {chemin_etudiants} : {e}", file=sys.stderr)
+            code = 1
+            continue
+        affectes = ", ".join(f"{semestre} : {nombre}" for semestre, nombre in res["affectes"].items())
+        print(f"{chemin_sortie} : {res['etudiants']} étudiants, affectés {affectes} ({time.perf_counter() - depart:.2f} s)")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.main.python.analyse_choix import CHOIX_INCONNU, CHOIX_VIDE, encoder_choix_en_ids
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.journalisation import logger_general
+from src.main.python.statistiques import ISSUES, NB_COMPTEURS, StatistiquesAffectation
+
+# Boucle d'affectation compilée par numba : None tant qu'elle n'a pas été demandée, False si numba n'est pas installé
+_affecter_semestre_compile = None
+
+
+class CohorteEncodee:
+    """Représentation compacte d'une cohorte pour les moteurs : des tableaux typés plutôt que des colonnes d'objets
+    (tuples de noms, texte libre), convertie en DataFrame uniquement pour l'export (vers_dataframe).
+
+    Attributs :
+        choix: pour chaque semestre, une matrice int32 (n, largeur) des ids de partenaires,
+            CHOIX_VIDE pour un voeu vide ou le bourrage, CHOIX_INCONNU pour un nom absent des partenaires.
+        a_choisi: pour chaque semestre, un tableau bool indiquant si l'étudiant a fait au moins un voeu.
+        specialites: le code int16 de la spécialité de chaque étudiant (indice dans liste_specialites, -1 si absente).
+        notes: la note de chaque étudiant en float32 (NaN si absente). Les notes min sont converties en float32 avant
+            d'y être comparées, ce qui ne change aucune comparaison pour des notes à moins de 7 chiffres significatifs.
+        liste_specialites: les spécialités des partenaires et des étudiants, triées.
+        voeux_inconnus: pour chaque semestre, les noms de voeux absents des partenaires et leur nombre d'occurrences.
+        noms_inconnus: pour chaque semestre, position de l'étudiant -> noms de ses voeux absents des partenaires,
+            dans l'ordre de ses CHOIX_INCONNU (seuls les étudiants concernés y figurent).
+        identifiants: les identifiants des étudiants (colonne Id Etudiant), None si le df n'en a pas.
+        resultats: pour chaque semestre, l'id int32 du partenaire obtenu par chaque étudiant (-1 si aucun).
+    """
+
+    __slots__ = ("choix", "a_choisi", "specialites", "notes", "liste_specialites", "voeux_inconnus", "noms_inconnus", "identifiants", "resultats")
+
+    def __init__(self, choix:dict, a_choisi:dict, specialites:np.ndarray, notes:np.ndarray, liste_specialites:list[str],
+                 voeux_inconnus:dict | None=None, noms_inconnus:dict | None=None, identifiants:np.ndarray | None=None,
+                 resultats:dict | None=None):
+        self.choix = choix
+        self.a_choisi = a_choisi
+        self.specialites = np.asarray(specialites, dtype=np.int16)
+        self.notes = np.asarray(notes, dtype=np.float32)
+        self.liste_specialites = liste_specialites
+        self.voeux_inconnus = voeux_inconnus if voeux_inconnus is not None else {semestre: {} for semestre in choix}
+        self.noms_inconnus = noms_inconnus if noms_inconnus is not None else {semestre: {} for semestre in choix}
+        self.identifiants = identifiants
+        if resultats is None:
+            resultats = {semestre: np.full(len(self.notes), -1, dtype=np.int32) for semestre in choix}
+        self.resultats = resultats
+
+    def __len__(self):
+        return len(self.notes)
+
+    def sous_ensemble(self, indices:np.ndarray) -> "CohorteEncodee":
+        """Retourne la cohorte restreinte aux étudiants donnés, dans l'ordre des indices."""
+        indices = np.asarray(indices, dtype=np.int64)
+        noms_inconnus = {}
+        for semestre, noms in self.noms_inconnus.items():
+            gardes = np.flatnonzero(np.isin(indices, np.fromiter(noms, dtype=np.int64, count=len(noms)))) if noms else []
+            noms_inconnus[semestre] = {int(k): noms[int(indices[k])] for k in gardes}
+        return CohorteEncodee(
+            {semestre: choix[indices] for semestre, choix in self.choix.items()},
+            {semestre: a_choisi[indices] for semestre, a_choisi in self.a_choisi.items()},
+            self.specialites[indices],
+            self.notes[indices],
+            self.liste_specialites,
+            self.voeux_inconnus,
+            noms_inconnus,
+            self.identifiants[indices] if self.identifiants is not None else None,
+            {semestre: resultat[indices] for semestre, resultat in self.resultats.items()},
+        )
+
+    def octets(self) -> int:
+        """Retourne la mémoire occupée par les tableaux de la cohorte (hors noms inconnus)."""
+        tableaux = [self.specialites, self.notes, *self.choix.values(), *self.a_choisi.values(), *self.resultats.values()]
+        if self.identifiants is not None:
+            tableaux.append(self.identifiants)
+        return sum(tableau.nbytes for tableau in tableaux)
+
+    def voeux_en_tuples(self, etat_univ:EtatUniversites, semestre:str) -> list:
+        """Retourne les voeux d'un semestre sous forme de tuples de noms comme convertir_colonne_en_tuple (NaN sans voeu)."""
+        noms = np.asarray(etat_univ.noms + ["", ""], dtype=object)
+        choix = self.choix[semestre]
+        # CHOIX_VIDE (-1) et CHOIX_INCONNU (-2) deviennent "" puis les noms inconnus sont replacés ligne par ligne
+        table = noms[np.where(choix >= 0, choix, len(etat_univ.noms))]
+        longueurs = choix.shape[1] - np.argmax((choix != CHOIX_VIDE)[:, ::-1], axis=1)
+        for ligne, noms_ligne in self.noms_inconnus[semestre].items():
+            table[ligne, choix[ligne] == CHOIX_INCONNU] = noms_ligne
+        return [tuple(table[i, :longueurs[i]]) if a_choisi else np.nan
+                for i, a_choisi in enumerate(self.a_choisi[semestre].tolist())]
+
+    def vers_dataframe(self, etat_univ:EtatUniversites) -> pd.DataFrame:
+        """Retourne la cohorte et ses résultats au format de traitement_scenario_hybride (Id_Etudiant, Specialite, Note, Choix_SX et choix_final SX), pour l'export.
+
+        Les notes sont rendues avec l'écriture décimale la plus courte de leur valeur float32 (12.1 reste 12.1).
+        """
+        colonnes = {}
+        if self.identifiants is not None:
+            colonnes["Id_Etudiant"] = self.identifiants
+        colonnes["Specialite"] = np.asarray(self.liste_specialites + [np.nan], dtype=object)[self.specialites]
+        colonnes["Note"] = self.notes.astype(str).astype(np.float64)
+        for semestre in self.choix:
+            colonnes[f"Choix_{semestre}"] = pd.Series(self.voeux_en_tuples(etat_univ, semestre), dtype=object)
+        for semestre, resultat in self.resultats.items():
+            colonnes[f"choix_final {semestre}"] = ids_vers_noms(etat_univ, resultat)
+        return pd.DataFrame(colonnes)
+
+
+def encoder_choix(serie_choix:pd.Series, etat_univ:EtatUniversites, largeur_min:int=5):
+    """Encode une colonne de choix (texte brut ou tuples de convertir_colonne_en_tuple) en matrice d'ids.
+
+    Args:
+        serie_choix: La colonne Choix_SX, contenant des voeux ou NaN.
+        etat_univ: L'état des universités donnant l'id de chaque nom.
+        largeur_min: Le nombre minimal de colonnes de la matrice.
+
+    Returns:
+        tuple: (matrice int32 (n, largeur), tableau bool des étudiants ayant fait au moins un voeu)
+    """
+    choix, a_choisi, _ = encoder_choix_en_ids(serie_choix, pd.Index(etat_univ.noms, dtype=object), largeur_min)
+    return choix, a_choisi
+
+
+def encoder_cohorte(df_etudiants:pd.DataFrame, etat_univ:EtatUniversites, semestres:list[str]=["S8", "S9"]) -> CohorteEncodee:
+    """Encode le df des étudiants pour le moteur rapide, depuis les colonnes "Choix SX" brutes (le plus rapide)
+    ou les colonnes "Choix_SX" déjà préparées par preparer_df_etudiants.
+
+    Les voeux qui ne correspondent à aucun partenaire sont recensés dans voeux_inconnus et signalés dans le journal.
+    """
+    # Codes catégoriels : les spécialités sans partenaire compatible gardent un code (pour l'export) mais aucun compatible
+    specialites_texte = df_etudiants["Specialite"].astype(object)
+    specialites_etudiants = {spe for spe in specialites_texte.dropna().unique().tolist() if isinstance(spe, str)}
+    liste_specialites = sorted({spe for semestre in semestres for spe in etat_univ.compatibles.get(semestre, {})} | specialites_etudiants)
+    specialites = pd.Index(liste_specialites, dtype=object).get_indexer(specialites_texte).astype(np.int16)
+    notes = pd.to_numeric(df_etudiants["Note"], errors="coerce").to_numpy(dtype=np.float32)
+
+    identifiants = None
+    for colonne in ["Id Etudiant", "Id_Etudiant"]:
+        if colonne in df_etudiants.columns:
+            identifiants = df_etudiants[colonne].to_numpy()
+            if identifiants.dtype.kind in "iu" and (len(identifiants) == 0 or np.abs(identifiants).max() < 2**31):
+                identifiants = identifiants.astype(np.int32)
+            break
+
+    index_noms = pd.Index(etat_univ.noms, dtype=object)
+    choix = {}
+    a_choisi = {}
+    voeux_inconnus = {}
+    noms_inconnus = {}
+    for semestre in semestres:
+        colonne = f"Choix {semestre}" if f"Choix {semestre}" in df_etudiants.columns else f"Choix_{semestre}"
+        choix[semestre], a_choisi[semestre], voeux_inconnus[semestre], noms_inconnus[semestre] = encoder_choix_en_ids(
+            df_etudiants[colonne], index_noms, avec_noms_inconnus=True)
+        if voeux_inconnus[semestre]:
+            logger_general.warning("Voeux inconnus au %s (nom : occurrences) : %s", semestre, voeux_inconnus[semestre])
+    return CohorteEncodee(choix, a_choisi, specialites, notes, liste_specialites, voeux_inconnus, noms_inconnus, identifiants)
+
+
+def compatibles_en_csr(etat_univ:EtatUniversites, semestre:str, liste_specialites:list[str]):
+    """Retourne les ids compatibles de chaque spécialité au format CSR (debuts, ids), dans l'ordre du DataFrame."""
+    listes = [etat_univ.get_ids_compatibles(semestre, spe) for spe in liste_specialites]
+    debuts = np.zeros(len(listes) + 1, dtype=np.int64)
+    debuts[1:] = np.cumsum([len(ids) for ids in listes])
+    ids = np.concatenate(listes).astype(np.int32) if listes else np.empty(0, dtype=np.int32)
+    return debuts, ids
+
+
+def _moins_rempli(ids, debut, fin, note, places, prises, connues, note_min, prioritaire, par_taux):
+    """Retourne l'id du partenaire le moins rempli parmi ids[debut:fin] (prioritaires d'abord), -1 si aucun."""
+    meilleur_prio = -1
+    completion_prio = 0.0
+    meilleur_non_prio = -1
+    completion_non_prio = 0.0
+    for k in range(debut, fin):
+        p = ids[k]
+        if p < 0 or not connues[p] or places[p] - prises[p] <= 0 or note_min[p] > note:
+            continue
+        if par_taux:
+            completion = prises[p] / places[p]
+        else:
+            completion = prises[p] * 1.0
+        if prioritaire[p]:
+            if meilleur_prio < 0 or completion < completion_prio:
+                meilleur_prio = p
+                completion_prio = completion
+        elif meilleur_non_prio < 0 or completion < completion_non_prio:
+            meilleur_non_prio = p
+            completion_non_prio = completion
+    if meilleur_prio >= 0:
+        return meilleur_prio
+    return meilleur_non_prio
+
+
+def _affecter_semestre(choix, largeur, a_choisi, specialites, notes, places, prises, connues, note_min, prioritaire,
+                       compat_debuts, compat_ids, limite_ordre, par_taux, resultat, debut, fin, compteurs, instantanes, pas_instantanes):
+    """Boucle des trois scénarios de traiter_etudiant_semestre sur des tableaux d'entiers.
+
+    choix est la matrice des voeux aplatie (n * largeur). Les places prises sont incrémentées sur place
+    et l'id obtenu par chaque étudiant de [debut, fin) est écrit dans resultat (-1 si aucun).
+    Si compteurs n'est pas vide, les passages, décisions et places consultées de chaque issue y sont cumulés
+    (tableau aplati len(ISSUES) * NB_COMPTEURS, voir statistiques.py).
+    Si pas_instantanes est positif, les places prises avant l'étudiant i (i multiple de pas_instantanes)
+    sont copiées dans instantanes (aplati, une ligne de len(prises) par instantané) à la ligne i // pas_instantanes.
+    """
+    compter = len(compteurs) > 0
+    ordonnes = min(limite_ordre, largeur)
+    nb_partenaires = len(prises)
+    for i in range(debut, fin):
+        if pas_instantanes > 0 and i % pas_instantanes == 0:
+            ligne = (i // pas_instantanes) * nb_partenaires
+            for p in range(nb_partenaires):
+                instantanes[ligne + p] = prises[p]
+        resultat[i] = -1
+        if not a_choisi[i]:
+            if compter:
+                compteurs[0] += 1
+                compteurs[1] += 1
+            continue
+        note = notes[i]
+        base = i * largeur
+        longueur = largeur
+        if compter:
+            # Nombre de voeux de l'étudiant (jusqu'au dernier voeu non vide), comme la longueur de son tuple de choix
+            while longueur > 0 and choix[base + longueur - 1] == -1:
+                longueur -= 1
+
+        # Scénario 1 : Voeux ordonnés
+        obtenu = -1
+        j = base
+        for j in range(base, base + ordonnes):
+            p = choix[j]
+            if p >= 0 and connues[p] and places[p] - prises[p] > 0 and not note_min[p] > note:
+                obtenu = p
+                break
+        if compter and ordonnes > 0:
+            compteurs[3] += 1
+            compteurs[5] += (j - base + 1) if obtenu >= 0 else min(ordonnes, longueur)
+            if obtenu >= 0:
+                compteurs[4] += 1
+
+        # Scénario 2 : Choix restants
+        if obtenu < 0:
+            obtenu = _moins_rempli(choix, base + ordonnes, base + largeur, note, places, prises, connues, note_min, prioritaire, par_taux)
+            if compter and longueur > ordonnes:
+                compteurs[6] += 1
+                compteurs[8] += longueur - ordonnes
+                if obtenu >= 0:
+                    compteurs[7] += 1
+
+        # Scénario 3 : Partenaires compatibles avec la spécialité
+        if obtenu < 0:
+            if specialites[i] >= 0:
+                s = specialites[i]
+                obtenu = _moins_rempli(compat_ids, compat_debuts[s], compat_debuts[s + 1], note, places, prises, connues, note_min, prioritaire, par_taux)
+                if compter:
+                    compteurs[11] += compat_debuts[s + 1] - compat_debuts[s]
+            if compter:
+                compteurs[9] += 1
+                if obtenu >= 0:
+                    compteurs[10] += 1
+                else:
+                    compteurs[12] += 1
+                    compteurs[13] += 1
+
+        if obtenu >= 0:
+            resultat[i] = obtenu
+            if prises[obtenu] >= 0:
+                prises[obtenu] += 1
+
+
+def noyau_compile():
+    """Retourne la boucle d'affectation compilée avec numba, None si numba n'est pas installé.
+
+    numba n'est importé (et la boucle compilée, ou relue depuis le cache de numba) qu'au premier appel,
+    pour que l'import du module reste léger dans les processus et les scripts qui n'affectent rien.
+    """
+    global _moins_rempli, _affecter_semestre_compile
+    if _affecter_semestre_compile is None:
+        try:
+            from numba import njit
+        except ImportError:
+            _affecter_semestre_compile = False
+        else:
+            # _affecter_semestre appelle la version compilée de _moins_rempli, résolue à la compilation
+            _moins_rempli = njit(cache=True, nogil=True)(_moins_rempli)
+            _affecter_semestre_compile = njit(cache=True, nogil=True)(_affecter_semestre)
+    return _affecter_semestre_compile or None
+
+
+def affecter_semestre(cohorte:CohorteEncodee, etat_univ:EtatUniversites, semestre:str, limite_ordre:int, calcul_completion:str="Taux",
+                      resultat:np.ndarray | None=None, debut:int=0, fin:int | None=None,
+                      statistiques:StatistiquesAffectation | None=None, instantanes:np.ndarray | None=None, pas_instantanes:int=0) -> np.ndarray:
+    """Affecte les étudiants [debut, fin) de la cohorte pour un semestre, en mettant à jour les places prises de l'état.
+
+    Args:
+        cohorte: La cohorte encodée, dans l'ordre de priorité.
+        etat_univ: L'état des universités, dont les places prises du semestre sont modifiées.
+        semestre: Le semestre à traiter.
+        limite_ordre: Le nombre de voeux ordonnés.
+        calcul_completion: "Taux" ou "Places Prises".
+        resultat: Le tableau des ids obtenus à compléter, créé (rempli de -1) s'il n'est pas fourni.
+        debut: L'indice du premier étudiant à traiter.
+        fin: L'indice de fin (exclu), la taille de la cohorte par défaut.
+        statistiques: Si fourni, complété avec les compteurs de chaque scénario et la durée de l'affectation.
+        instantanes: Si fourni avec pas_instantanes, un tableau int64 (ceil(n / pas_instantanes), nombre de partenaires)
+            dont la ligne k reçoit les places prises avant l'étudiant k * pas_instantanes (pour les étudiants traités ici).
+        pas_instantanes: L'intervalle, en nombre d'étudiants, entre deux instantanés.
+
+    Returns:
+        resultat: le tableau int32 des ids obtenus (-1 si aucun).
+    """
+    n = len(cohorte)
+    fin = n if fin is None else fin
+    if resultat is None:
+        resultat = np.full(n, -1, dtype=np.int32)
+    choix = cohorte.choix[semestre]
+    largeur = choix.shape[1]
+    compat_debuts, compat_ids = compatibles_en_csr(etat_univ, semestre, cohorte.liste_specialites)
+    connues = etat_univ.places_connues[semestre] & etat_univ.places_prises_connues[semestre]
+    arguments = [
+        choix.reshape(-1), largeur, cohorte.a_choisi[semestre], cohorte.specialites, cohorte.notes,
+        etat_univ.places[semestre], etat_univ.places_prises[semestre], connues,
+        etat_univ.note_min[semestre].astype(cohorte.notes.dtype), etat_univ.prioritaire[semestre], compat_debuts, compat_ids,
+        limite_ordre, calcul_completion == "Taux", resultat, debut, fin,
+        np.zeros(len(ISSUES) * NB_COMPTEURS if statistiques is not None else 0, dtype=np.int64),
+        instantanes.reshape(-1) if instantanes is not None else np.empty(0, dtype=np.int64),
+        pas_instantanes if instantanes is not None else 0,
+    ]
+    depart = time.perf_counter()
+    noyau = noyau_compile()
+    if noyau is not None:
+        noyau(*arguments)
+    else:
+        # Sans numba, la boucle est plus rapide sur des listes Python que sur des scalaires NumPy
+        arguments = [a.tolist() if isinstance(a, np.ndarray) else a for a in arguments]
+        _affecter_semestre(*arguments)
+        resultat[debut:fin] = arguments[14][debut:fin]
+        etat_univ.places_prises[semestre][:] = arguments[6]
+        if instantanes is not None:
+            instantanes.reshape(-1)[:] = arguments[18]
+    if statistiques is not None:
+        statistiques.ajouter_compteurs(semestre, arguments[17], time.perf_counter() - depart)
+    return resultat
+
+
+def ids_vers_noms(etat_univ:EtatUniversites, ids:np.ndarray, index:pd.Index | None=None) -> pd.Series:
+    """Convertit un tableau d'ids en noms de partenaires (NaN pour -1), dans une colonne de type object."""
+    noms = np.asarray(etat_univ.noms + [np.nan], dtype=object)
+    return pd.Series(noms[np.where(ids >= 0, ids, len(etat_univ.noms))], index=index, dtype=object)
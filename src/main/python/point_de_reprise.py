@@ -0,0 +1,113 @@
+import hashlib
+import os
+
+import numpy as np
+
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.journalisation import logger_general
+
+# À incrémenter à chaque changement du contenu des fichiers de reprise
+VERSION_REPRISE = 1
+
+# Nombre d'étudiants traités entre deux enregistrements du point de reprise
+INTERVALLE_REPRISE = 5_000
+
+
+def empreinte_affectation(cohorte, etat_univ:EtatUniversites, limite_ordre:int, calcul_completion:str) -> str:
+    """Retourne le SHA-256 des entrées d'une affectation : cohorte encodée (dans l'ordre de priorité), état initial
+    des partenaires et paramètres. Un point de reprise n'est repris que pour une empreinte identique."""
+    sha = hashlib.sha256(f"version={VERSION_REPRISE}|limite_ordre={limite_ordre}|calcul_completion={calcul_completion}".encode())
+    sha.update("|".join(etat_univ.noms).encode())
+    sha.update("|".join(cohorte.liste_specialites).encode())
+    tableaux = [cohorte.specialites, cohorte.notes]
+    for semestre in etat_univ.semestres:
+        sha.update(semestre.encode())
+        tableaux += [
+            cohorte.choix[semestre], cohorte.a_choisi[semestre],
+            etat_univ.places[semestre], etat_univ.places_connues[semestre],
+            etat_univ.places_prises_initiales[semestre], etat_univ.places_prises_connues[semestre],
+            etat_univ.note_min[semestre], etat_univ.prioritaire[semestre],
+        ]
+    for tableau in tableaux:
+        tableau = np.ascontiguousarray(tableau)
+        sha.update(f"{tableau.dtype.str}{tableau.shape}".encode())
+        sha.update(tableau.tobytes())
+    return sha.hexdigest()
+
+
+class PointDeReprise:
+    """État d'une affectation en cours, pour chaque semestre :
+        positions: le nombre d'étudiants déjà traités, dans l'ordre de priorité.
+        places_prises: les places prises de chaque partenaire après ces étudiants.
+        resultats: l'id du partenaire obtenu par chaque étudiant (-1 si aucun ou pas encore traité).
+    """
+
+    def __init__(self, empreinte:str, limite_ordre:int, calcul_completion:str, positions:dict, places_prises:dict, resultats:dict):
+        self.empreinte = empreinte
+        self.limite_ordre = limite_ordre
+        self.calcul_completion = calcul_completion
+        self.positions = positions
+        self.places_prises = places_prises
+        self.resultats = resultats
+
+    @classmethod
+    def depart(cls, empreinte:str, limite_ordre:int, calcul_completion:str, etat_univ:EtatUniversites, n:int) -> "PointDeReprise":
+        """Retourne le point de départ d'une affectation : aucun étudiant traité."""
+        return cls(
+            empreinte, limite_ordre, calcul_completion,
+            {semestre: 0 for semestre in etat_univ.semestres},
+            {semestre: etat_univ.places_prises[semestre].copy() for semestre in etat_univ.semestres},
+            {semestre: np.full(n, -1, dtype=np.int32) for semestre in etat_univ.semestres},
+        )
+
+    def restaurer(self, etat_univ:EtatUniversites):
+        """Remet les places prises de l'état à celles du point de reprise."""
+        for semestre in etat_univ.semestres:
+            etat_univ.places_prises[semestre][:] = self.places_prises[semestre]
+
+    def capturer(self, etat_univ:EtatUniversites, positions:dict):
+        """Met à jour le point de reprise avec les places prises de l'état et les positions atteintes."""
+        for semestre in etat_univ.semestres:
+            self.places_prises[semestre] = etat_univ.places_prises[semestre].copy()
+        self.positions.update(positions)
+
+    def enregistrer(self, chemin:str):
+        """Écrit le point de reprise (.npz non compressé) dans un fichier temporaire puis le renomme, pour ne jamais laisser de fichier tronqué."""
+        semestres = list(self.positions)
+        tableaux = {
+            "version": np.asarray(VERSION_REPRISE),
+            "empreinte": np.asarray(self.empreinte),
+            "limite_ordre": np.asarray(self.limite_ordre),
+            "calcul_completion": np.asarray(self.calcul_completion),
+            "semestres": np.asarray(semestres),
+            "positions": np.asarray([self.positions[semestre] for semestre in semestres], dtype=np.int64),
+        }
+        for semestre in semestres:
+            tableaux[f"places_prises_{semestre}"] = self.places_prises[semestre]
+            tableaux[f"resultats_{semestre}"] = self.resultats[semestre]
+        dossier = os.path.dirname(os.path.abspath(chemin))
+        os.makedirs(dossier, exist_ok=True)
+        temporaire = chemin + ".tmp"
+        with open(temporaire, "wb") as f:
+            np.savez(f, **tableaux)
+        os.replace(temporaire, chemin)
+
+    @classmethod
+    def charger(cls, chemin:str) -> "PointDeReprise | None":
+        """Lit un point de reprise, None si le fichier est absent, illisible ou d'une autre version."""
+        if not os.path.exists(chemin):
+            return None
+        try:
+            with np.load(chemin, allow_pickle=False) as fichier:
+                if int(fichier["version"]) != VERSION_REPRISE:
+                    return None
+                semestres = [str(semestre) for semestre in fichier["semestres"]]
+                return cls(
+                    str(fichier["empreinte"]), int(fichier["limite_ordre"]), str(fichier["calcul_completion"]),
+                    dict(zip(semestres, fichier["positions"].tolist())),
+                    {semestre: fichier[f"places_prises_{semestre}"] for semestre in semestres},
+                    {semestre: fichier[f"resultats_{semestre}"] for semestre in semestres},
+                )
+        except (OSError, ValueError, KeyError) as e:
+            logger_general.warning("Point de reprise illisible (%s) : %s", chemin, e)
+            return None
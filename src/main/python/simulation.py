@@ -1,39 +1,149 @@
+import argparse
+import math
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from algo_affectation_classement import traitement_scenario_hybride, generer_df_choix_etudiants_spe_compatible, comparaison_taux_completion_prio_non_prio, tri_df_etudiant_semestre_ponderation 
-from conversion_df_brute import conversion_df_brute_pour_affectation
-from excel_en_dataframe import charger_excels
+import numpy as np
+import pandas as pd
 
-dataframes = charger_excels("src\\main\\data_for_test")
-df_univ = conversion_df_brute_pour_affectation(dataframes)["universites_partenaires"]
+from src.main.python.algo_affectation_classement import tri_df_etudiant_semestre_ponderation
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.excel_en_dataframe import charger_excels
+from src.main.python.generation_synthetique import generer_df_choix_etudiants_vectorise
+from src.main.python.indicateurs import indicateurs_encodes
+from src.main.python.journalisation import MODE_SILENCIEUX, configurer_journalisation
+from src.main.python.moteur_rapide import affecter_semestre, encoder_cohorte
 
-df_etu_fictif = generer_df_choix_etudiants_spe_compatible(10, df_univ, proba_un_seul_semestre=0.2)
-#df_etu_fictif = conversion_df_brute_pour_affectation(dataframes)["choix_etudiants"]
+SEMESTRES = ["S8", "S9"]
 
-df_etu_fictif.to_excel("src\\main\\output\\df_etu_fictif.xlsx", index=False)
-df_etu_fictif = tri_df_etudiant_semestre_ponderation(df_etu_fictif, alpha=0.1)
-df_final = traitement_scenario_hybride(df_univ, df_etu_fictif, limite_ordre=1)
-df_univ.to_excel("src\\main\\output\\df_univ.xlsx", index=False)
-df_final.to_excel("src\\main\\output\\df_etu_fictif_final.xlsx", index=False)
-#comparaison_taux_completion_prio_non_prio(df_univ)
+# Quantile de la loi normale pour un intervalle de confiance à 95 %
+Z_95 = 1.959964
+
+# État des universités partagé en lecture seule par les processus de simulation
+_etat_univ = None
+
+
+class AgregatIndicateurs:
+    """Agrège au fil de l'eau les indicateurs des réplicats (moyenne et variance par l'algorithme de Welford)."""
+
+    def __init__(self):
+        self.n = {}
+        self.moyenne = {}
+        self.m2 = {}
+
+    def ajouter(self, indicateurs:dict):
+        for cle, valeur in indicateurs.items():
+            if valeur is None or (isinstance(valeur, float) and math.isnan(valeur)):
+                continue
+            n = self.n.get(cle, 0) + 1
+            moyenne = self.moyenne.get(cle, 0.0)
+            delta = valeur - moyenne
+            moyenne += delta / n
+            self.n[cle] = n
+            self.moyenne[cle] = moyenne
+            self.m2[cle] = self.m2.get(cle, 0.0) + delta * (valeur - moyenne)
+
+    def resume(self) -> pd.DataFrame:
+        """Retourne pour chaque indicateur le nombre de réplicats, la moyenne, l'écart-type et l'intervalle de confiance à 95 %."""
+        lignes = []
+        for cle, n in self.n.items():
+            ecart_type = math.sqrt(self.m2[cle] / (n - 1)) if n > 1 else np.nan
+            demi_largeur = Z_95 * ecart_type / math.sqrt(n) if n > 1 else np.nan
+            lignes.append({
+                "indicateur": cle,
+                "replicats": n,
+                "moyenne": self.moyenne[cle],
+                "ecart_type": ecart_type,
+                "ic95_bas": self.moyenne[cle] - demi_largeur,
+                "ic95_haut": self.moyenne[cle] + demi_largeur,
+            })
+        return pd.DataFrame(lignes, columns=["indicateur", "replicats", "moyenne", "ecart_type", "ic95_bas", "ic95_haut"])
+
+
+def _initialiser_processus(etat_univ, dossier_logs=None):
+    global _etat_univ
+    if dossier_logs is not None:
+        configurer_journalisation(mode=MODE_SILENCIEUX, dossier=dossier_logs, par_processus=True)
+    _etat_univ = etat_univ
+
+
+def simuler_replicat(graine:int, nb_etudiants:int, proba_un_seul_semestre:float, alpha:float, limite_ordre:int, calcul_completion:str) -> dict:
+    """Génère une cohorte fictive avec la graine donnée, l'affecte avec le moteur rapide et retourne ses indicateurs."""
+    etat_univ = _etat_univ.copie()
+    df_etudiants = generer_df_choix_etudiants_vectorise(nb_etudiants, etat_univ, np.random.default_rng(graine), proba_un_seul_semestre)
+    df_etudiants = tri_df_etudiant_semestre_ponderation(df_etudiants, alpha=alpha)
+    cohorte = encoder_cohorte(df_etudiants, etat_univ, SEMESTRES)
+    for semestre in SEMESTRES:
+        affecter_semestre(cohorte, etat_univ, semestre, limite_ordre, calcul_completion, resultat=cohorte.resultats[semestre])
+    return indicateurs_encodes(etat_univ, cohorte, cohorte.resultats)
+
+
+def simuler_replicats(df_univ:pd.DataFrame, nb_etudiants:int, nb_replicats:int, graine:int=0, proba_un_seul_semestre:float=0.3,
+                      alpha:float=0.05, limite_ordre:int=0, calcul_completion:str="Taux", nb_processus:int | None=None,
+                      dossier_logs:str | None=None) -> pd.DataFrame:
+    """Simule nb_replicats cohortes fictives indépendantes et retourne l'agrégat de leurs indicateurs.
+
+    Chaque réplicat reçoit sa propre graine dérivée de la graine principale (les résultats sont reproductibles
+    quel que soit le nombre de processus). Les indicateurs sont agrégés au fur et à mesure, sans fichier intermédiaire.
+
+    Args:
+        df_univ: Le dataframe des universités partenaires issu de traitement_df_univ.
+        nb_etudiants: Le nombre d'étudiants de chaque cohorte.
+        nb_replicats: Le nombre de cohortes simulées.
+        graine: La graine principale.
+        proba_un_seul_semestre: Probabilité qu'un étudiant ne fasse des vœux que pour un seul semestre.
+        alpha: Le coefficient de pénalité de tri_df_etudiant_semestre_ponderation.
+        limite_ordre: Le nombre de voeux ordonnés.
+        calcul_completion: "Taux" ou "Places Prises".
+        nb_processus: Le nombre de processus, 1 pour tout exécuter dans le processus courant, None pour le nombre de coeurs.
+        dossier_logs: Si fourni, chaque processus écrit ses logs (mode silencieux) dans ses propres fichiers de ce dossier, suffixés par son pid.
+
+    Returns:
+        df_res: une ligne par indicateur avec la moyenne, l'écart-type et l'intervalle de confiance à 95 %.
+    """
+    etat_univ = EtatUniversites(df_univ, SEMESTRES)
+    graines = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(graine).spawn(nb_replicats)]
+    parametres = (nb_etudiants, proba_un_seul_semestre, alpha, limite_ordre, calcul_completion)
+    agregat = AgregatIndicateurs()
+
+    if nb_processus == 1:
+        _initialiser_processus(etat_univ, dossier_logs)
+        for graine_replicat in graines:
+            agregat.ajouter(simuler_replicat(graine_replicat, *parametres))
+    else:
+        with ProcessPoolExecutor(max_workers=nb_processus, initializer=_initialiser_processus, initargs=(etat_univ, dossier_logs)) as executor:
+            futures = [executor.submit(simuler_replicat, graine_replicat, *parametres) for graine_replicat in graines]
+            for future in as_completed(futures):
+                agregat.ajouter(future.result())
+    return agregat.resume()
+
+
+def main(arguments:list[str] | None=None):
+    parser = argparse.ArgumentParser(description="Simule des cohortes fictives et agrège les indicateurs d'affectation.")
+    parser.add_argument("dossier", help="Dossier contenant univ_data_mobility.xlsx")
+    parser.add_argument("--etudiants", type=int, default=150)
+    parser.add_argument("--replicats", type=int, default=100)
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--proba-un-seul-semestre", type=float, default=0.3)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--limite-ordre", type=int, default=0)
+    parser.add_argument("--calcul-completion", default="Taux", choices=["Taux", "Places Prises"])
+    parser.add_argument("--processus", type=int, default=None, help="Nombre de processus (par défaut : nombre de coeurs)")
+    parser.add_argument("--dossier-logs", default=None, help="Dossier des logs, un fichier par processus (aucun journal par défaut)")
+    args = parser.parse_args(arguments)
+
+    dataframes = charger_excels(args.dossier)
+    df_univ = traitement_df_univ(dataframes["univ_data_mobility"])
 
-###########################################
-test = False
-if test:
-    nb_etudiants = 150
-    proba_unique_semestre = 0.0
     start = time.time()
-    limite_ordre = 0
-    dataframes = charger_excels("src\\main\\data_for_test")
-
-    df_univ = conversion_df_brute_pour_affectation(dataframes)["universites_partenaires"]
-    #df_etu_fictif = generer_df_choix_etudiants_spe_compatible(nb_etudiants, df_univ, proba_unique_semestre)
-    df_etu_fictif = conversion_df_brute_pour_affectation(dataframes)["choix_etudiants"]
-    df_etu_fictif.to_excel("statistics\\df_etu_fictif.xlsx")
-    df_final = traitement_scenario_hybride(df_univ, df_etu_fictif, limite_ordre, "Taux" )
+    df_resume = simuler_replicats(df_univ, args.etudiants, args.replicats, args.graine, args.proba_un_seul_semestre,
+                                  args.alpha, args.limite_ordre, args.calcul_completion, args.processus, args.dossier_logs)
     end = time.time()
-    df_etu_fictif.to_excel("statistics\\df_etu_fictif_final.xlsx") 
-    df_univ.to_excel("statistics\\df_univ.xlsx") 
-    df_final.to_excel("statistics\\df_final.xlsx") 
-    print(f"Temps d'exécution : {end - start:.2f} secondes pour " + str(nb_etudiants) + " etudiant et un proba de faire un unique semestre de "  + str(proba_unique_semestre) + " et une limite d'ordre de " + str(limite_ordre))
+    with pd.option_context("display.max_rows", None, "display.width", None):
+        print(df_resume)
+    print(f"Temps d'exécution : {end - start:.2f} secondes pour {args.replicats} réplicats de {args.etudiants} étudiants")
+
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Issues possibles du traitement d'un étudiant pour un semestre, dans l'ordre de traiter_etudiant_semestre
+ISSUES = ["sans_voeu", "scenario_1", "scenario_2", "scenario_3", "aucune"]
+CODE_ISSUE = {issue: code for code, issue in enumerate(ISSUES)}
+
+# Compteurs par issue remplis par le moteur rapide : passages, décisions, places consultées
+NB_COMPTEURS = 3
+
+
+class StatistiquesAffectation:
+    """Compteurs et temps cumulés par semestre et par scénario, remplis si on en passe une instance à traitement_scenario_hybride.
+
+    Pour chaque scénario (et les issues "sans_voeu" et "aucune") :
+        passages: le nombre d'étudiants arrivés à ce scénario.
+        decisions: le nombre d'étudiants affectés (ou classés) par ce scénario.
+        temps_s: le temps cumulé passé dans le scénario (moteur de référence uniquement).
+        recherches_places: le nombre de consultations des places d'un partenaire (ou de requêtes d'arbre pour le scénario 3).
+        taille_parcours: le nombre de partenaires candidats couverts (voeux examinés, partenaires compatibles).
+
+    temps_total donne en plus, pour chaque semestre, la durée de l'affectation par le moteur rapide.
+    """
+
+    def __init__(self):
+        self.passages = {}
+        self.decisions = {}
+        self.temps = {}
+        self.recherches_places = {}
+        self.taille_parcours = {}
+        self.temps_total = {}
+
+    def enregistrer(self, semestre:str, issue:str, decision:bool, duree:float=0.0, recherches:int=0, parcours:int=0):
+        cle = (semestre, issue)
+        self.passages[cle] = self.passages.get(cle, 0) + 1
+        self.decisions[cle] = self.decisions.get(cle, 0) + int(decision)
+        self.temps[cle] = self.temps.get(cle, 0.0) + duree
+        self.recherches_places[cle] = self.recherches_places.get(cle, 0) + recherches
+        self.taille_parcours[cle] = self.taille_parcours.get(cle, 0) + parcours
+
+    def ajouter_compteurs(self, semestre:str, compteurs:np.ndarray, duree:float):
+        """Ajoute les compteurs (len(ISSUES) * NB_COMPTEURS) remplis par le moteur rapide pour un semestre."""
+        compteurs = np.asarray(compteurs).reshape(len(ISSUES), NB_COMPTEURS)
+        for issue, (passages, decisions, recherches) in zip(ISSUES, compteurs.tolist()):
+            if passages == 0:
+                continue
+            cle = (semestre, issue)
+            self.passages[cle] = self.passages.get(cle, 0) + passages
+            self.decisions[cle] = self.decisions.get(cle, 0) + decisions
+            self.temps.setdefault(cle, 0.0)
+            self.recherches_places[cle] = self.recherches_places.get(cle, 0) + recherches
+            self.taille_parcours[cle] = self.taille_parcours.get(cle, 0) + recherches
+        self.temps_total[semestre] = self.temps_total.get(semestre, 0.0) + duree
+
+    def fusionner(self, autre:"StatistiquesAffectation"):
+        """Ajoute les compteurs et les temps d'une autre instance (par exemple remplie dans un autre processus)."""
+        for attribut in ["passages", "decisions", "temps", "recherches_places", "taille_parcours", "temps_total"]:
+            cumuls = getattr(self, attribut)
+            for cle, valeur in getattr(autre, attribut).items():
+                cumuls[cle] = cumuls.get(cle, 0) + valeur
+
+    def resume(self) -> pd.DataFrame:
+        """Retourne une ligne par semestre et par scénario avec les compteurs et les temps cumulés."""
+        lignes = [
+            {
+                "semestre": semestre,
+                "scenario": issue,
+                "passages": self.passages[(semestre, issue)],
+                "decisions": self.decisions[(semestre, issue)],
+                "temps_s": self.temps[(semestre, issue)],
+                "recherches_places": self.recherches_places[(semestre, issue)],
+                "taille_parcours": self.taille_parcours[(semestre, issue)],
+            }
+            for semestre, issue in sorted(self.passages, key=lambda cle: (cle[0], CODE_ISSUE[cle[1]]))
+        ]
+        return pd.DataFrame(lignes, columns=["semestre", "scenario", "passages", "decisions", "temps_s", "recherches_places", "taille_parcours"])
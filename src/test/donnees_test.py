@@ -0,0 +1,65 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.algo_affectation_classement import (
+    convertir_colonne_en_tuple,
+    incrementer_places_prise,
+    traiter_etudiant_semestre,
+)
+
+SPECIALITES = ["MM", "MC", "SNI", "BAT", "EIT", "IDU"]
+
+
+def generer_df_univ_brut(nb_univ, graine):
+    rng = np.random.default_rng(graine)
+    data = {"nom_partenaire": [f"UNIV_{i:03d}" for i in range(nb_univ)]}
+    for semestre in ["S8", "S9"]:
+        data[f"{semestre}_total_places"] = rng.integers(0, 4, nb_univ)
+        for spe in SPECIALITES:
+            data[f"{semestre}_{spe}"] = np.where(rng.random(nb_univ) < 0.5, 1, np.nan)
+    data["important"] = rng.choice(["Oui", "Non"], nb_univ)
+    data["note_min"] = np.where(rng.random(nb_univ) < 0.3, rng.integers(8, 16, nb_univ), np.nan)
+    return pd.DataFrame(data)
+
+
+def generer_df_etudiants(nb_etudiants, nb_univ, graine):
+    rng = np.random.default_rng(graine)
+    noms = [f"UNIV_{i:03d}" for i in range(nb_univ)] + ["INCONNUE"]
+    data = {
+        "Id Etudiant": np.arange(1, nb_etudiants + 1),
+        "Specialite": rng.choice(SPECIALITES, nb_etudiants),
+        "Note": np.round(rng.uniform(0, 20, nb_etudiants), 2),
+    }
+    for semestre in ["S8", "S9"]:
+        colonne = []
+        for _ in range(nb_etudiants):
+            tirage = rng.random()
+            if tirage < 0.2:
+                colonne.append(np.nan)
+            else:
+                nb_choix = int(rng.integers(1, 6))
+                colonne.append("; ".join(rng.choice(noms, nb_choix, replace=False)))
+        data[f"Choix {semestre}"] = colonne
+    df = pd.DataFrame(data).sort_values("Note", ascending=False).reset_index(drop=True)
+    return df
+
+
+def affectation_sur_dataframe(df_univ, df_etudiants, limite_ordre, calcul_completion):
+    """Même boucle que traitement_scenario_hybride, mais en interrogeant directement le DataFrame des universités."""
+    for semestre in ["S8", "S9"]:
+        convertir_colonne_en_tuple(df_etudiants, f"Choix {semestre}")
+    df_etudiants.columns = df_etudiants.columns.str.replace(" ", "_")
+    for semestre in ["S8", "S9"]:
+        df_etudiants[f"choix_final {semestre}"] = pd.Series([np.nan] * len(df_etudiants), dtype=object)
+    for row in df_etudiants.itertuples(index=True):
+        for semestre in ["S8", "S9"]:
+            choix_final = traiter_etudiant_semestre(row, df_univ, semestre, limite_ordre, calcul_completion)
+            if pd.notna(choix_final):
+                df_etudiants.at[row.Index, f"choix_final {semestre}"] = choix_final
+                incrementer_places_prise(df_univ, choix_final, semestre)
+    return df_etudiants
@@ -0,0 +1,81 @@
+import pandas as pd
+import numpy as np
+import pytest
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.acceptation_differee import affecter_semestre_acceptation_differee, listes_de_preferences
+from src.main.python.algo_affectation_classement import traitement_scenario_hybride, tri_df_etudiant_semestre_ponderation
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.moteur_rapide import encoder_cohorte
+from src.main.python.statistiques import StatistiquesAffectation
+from src.test.donnees_test import generer_df_univ_brut, generer_df_etudiants
+
+
+def test_evincement_par_un_etudiant_plus_prioritaire():
+    df_univ = pd.DataFrame({
+        "nom_partenaire": ["AAAA", "BBBB"],
+        "Places S8": [1, 1],
+        "Places Prises S8": [0, 0],
+        "Note Min S8": [np.nan, 15],
+    })
+    # Le premier étudiant (le plus prioritaire) n'a pas la note min de BBBB
+    df_etudiants = pd.DataFrame({
+        "Specialite": ["MM", "MM", "MM"],
+        "Note": [12.0, 16.0, 17.0],
+        "Choix S8": ["BBBB; AAAA", "AAAA; BBBB", "AAAA; BBBB"],
+    })
+    etat = EtatUniversites(df_univ, ["S8"])
+    cohorte = encoder_cohorte(df_etudiants, etat, ["S8"])
+    debuts, preferences = listes_de_preferences(cohorte, etat, "S8", 2)
+    assert debuts.tolist() == [0, 1, 3, 5]
+    assert preferences.tolist() == [0, 0, 1, 0, 1]
+
+    statistiques = StatistiquesAffectation()
+    ids = affecter_semestre_acceptation_differee(cohorte, etat, "S8", 2, statistiques=statistiques)
+    assert ids.tolist() == [0, 1, -1]
+    assert etat.places_prises["S8"].tolist() == [1, 1]
+    assert statistiques.decisions[("S8", "scenario_1")] == 2
+    assert statistiques.decisions[("S8", "aucune")] == 1
+
+
+@pytest.mark.parametrize("limite_ordre", [0, 3])
+def test_affectation_stable(limite_ordre):
+    df_univ = traitement_df_univ(generer_df_univ_brut(60, graine=81 + limite_ordre))
+    df_etu = tri_df_etudiant_semestre_ponderation(generer_df_etudiants(600, 60, graine=82 + limite_ordre))
+    etat = EtatUniversites(df_univ)
+    cohorte = encoder_cohorte(df_etu, etat)
+
+    for semestre in ["S8", "S9"]:
+        debuts, preferences = listes_de_preferences(cohorte, etat, semestre, limite_ordre)
+        restantes = etat.places[semestre] - etat.places_prises[semestre]
+        ids = affecter_semestre_acceptation_differee(cohorte, etat, semestre, limite_ordre)
+        nombres = np.bincount(ids[ids >= 0], minlength=len(etat))
+        assert (nombres <= np.maximum(restantes, 0)).all()
+        moins_prioritaire = np.full(len(etat), -1)
+        np.maximum.at(moins_prioritaire, ids[ids >= 0], np.flatnonzero(ids >= 0))
+
+        # Aucun étudiant ne préfère un partenaire qui a une place libre ou qui a retenu un étudiant moins prioritaire
+        for i in range(len(cohorte)):
+            liste = preferences[debuts[i]:debuts[i + 1]].tolist()
+            mieux = liste[:liste.index(ids[i])] if ids[i] >= 0 else liste
+            for p in mieux:
+                assert nombres[p] == restantes[p] and moins_prioritaire[p] < i
+
+
+def test_moteur_acceptation_differee_meme_format():
+    df_univ_brut = generer_df_univ_brut(30, graine=91)
+    df_etudiants = generer_df_etudiants(200, 30, graine=92)
+    df_rapide = traitement_scenario_hybride(traitement_df_univ(df_univ_brut), tri_df_etudiant_semestre_ponderation(df_etudiants.copy()), 3, moteur="rapide")
+    df_univ = traitement_df_univ(df_univ_brut)
+    df_res = traitement_scenario_hybride(df_univ, tri_df_etudiant_semestre_ponderation(df_etudiants.copy()), 3, moteur="acceptation_differee")
+
+    assert list(df_res.columns) == list(df_rapide.columns)
+    for semestre in ["S8", "S9"]:
+        comptes = df_res[f"choix_final {semestre}"].value_counts()
+        prises = df_univ.drop_duplicates("nom_partenaire").set_index("nom_partenaire")[f"Places Prises {semestre}"]
+        assert (prises.loc[comptes.index] == comptes).all()
@@ -0,0 +1,63 @@
+import pandas as pd
+import numpy as np
+import pytest
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.affectation_incrementale import AffectationIncrementale
+from src.main.python.algo_affectation_classement import traitement_scenario_hybride, tri_df_etudiant_semestre_ponderation
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.test.donnees_test import generer_df_univ_brut, generer_df_etudiants
+
+
+def traitement_complet(df_univ, df_etudiants, limite_ordre):
+    df_univ = df_univ.copy()
+    df_etu = tri_df_etudiant_semestre_ponderation(df_etudiants.copy(), alpha=0.1)
+    df_etu = traitement_scenario_hybride(df_univ, df_etu, limite_ordre, "Taux", moteur="rapide")
+    return df_etu, df_univ
+
+
+def verifier_identique(incremental, df_univ, df_etudiants, limite_ordre):
+    df_etu_ref, df_univ_ref = traitement_complet(df_univ, df_etudiants, limite_ordre)
+    df_etu, df_univ_res = incremental.resultat()
+    pd.testing.assert_frame_equal(df_etu, df_etu_ref)
+    pd.testing.assert_frame_equal(df_univ_res, df_univ_ref)
+    assert df_etu.attrs["voeux_inconnus"] == df_etu_ref.attrs["voeux_inconnus"]
+
+
+@pytest.mark.parametrize("limite_ordre", [0, 2])
+def test_corrections_identiques_a_un_traitement_complet(limite_ordre):
+    df_univ = traitement_df_univ(generer_df_univ_brut(30, graine=21))
+    df_etudiants = generer_df_etudiants(300, 30, graine=22)
+    incremental = AffectationIncrementale(df_univ, df_etudiants, alpha=0.1, limite_ordre=limite_ordre, intervalle=16)
+    verifier_identique(incremental, df_univ, df_etudiants, limite_ordre)
+
+    # Voeux modifiés sans changement de priorité, avec un voeu inconnu et plus de voeux que la largeur encodée
+    index = df_etudiants.index[df_etudiants["Choix S8"].notna()][150]
+    nouveaux = "UNIV_001; INCONNUE; UNIV_002; UNIV_003; UNIV_004; UNIV_005; UNIV_006"
+    rejoues = incremental.modifier_choix(index, "S8", nouveaux)
+    df_etudiants.at[index, "Choix S8"] = nouveaux
+    assert 0 < rejoues < len(df_etudiants)
+    verifier_identique(incremental, df_univ, df_etudiants, limite_ordre)
+
+    # Semestre retiré : la priorité de l'étudiant change
+    index = df_etudiants.index[df_etudiants[["Choix S8", "Choix S9"]].notna().all(axis=1)][100]
+    incremental.modifier_choix(index, "S9", np.nan)
+    df_etudiants.at[index, "Choix S9"] = np.nan
+    verifier_identique(incremental, df_univ, df_etudiants, limite_ordre)
+
+    # Places ajoutées chez un partenaire
+    ligne = df_univ.index[5]
+    places = df_univ.at[ligne, "Places S9"] + 2
+    incremental.modifier_places(df_univ.at[ligne, "nom_partenaire"], "S9", places)
+    df_univ = df_univ.copy()
+    df_univ.at[ligne, "Places S9"] = places
+    verifier_identique(incremental, df_univ, df_etudiants, limite_ordre)
+
+
+def test_intervalle_invalide():
+    with pytest.raises(ValueError):
+        AffectationIncrementale(pd.DataFrame(), pd.DataFrame(), intervalle=0)
@@ -0,0 +1,75 @@
+import pandas as pd
+import numpy as np
+import pytest
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.affectation_optimale import affecter_semestre_optimal
+from src.main.python.algo_affectation_classement import traitement_scenario_hybride, tri_df_etudiant_semestre_ponderation
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.indicateurs import calculer_indicateurs
+from src.main.python.moteur_rapide import affecter_semestre, encoder_cohorte
+from src.main.python.statistiques import StatistiquesAffectation
+from src.test.donnees_test import generer_df_univ_brut, generer_df_etudiants
+
+pytest.importorskip("scipy")
+
+
+def test_optimal_libere_le_premier_voeu_d_un_etudiant_sans_alternative():
+    df_univ = pd.DataFrame({
+        "nom_partenaire": ["AAAA", "BBBB", "CCCC"],
+        "Places S8": [1, 1, 1],
+        "Places Prises S8": [0, 0, 0],
+        "Note Min S8": [np.nan, np.nan, 15],
+    })
+    df_etudiants = pd.DataFrame({
+        "Specialite": ["MM", "MM", "MM"],
+        "Note": [18.0, 12.0, 10.0],
+        "Choix S8": ["AAAA; BBBB", "AAAA", "CCCC"],
+    })
+    etat = EtatUniversites(df_univ, ["S8"])
+    cohorte = encoder_cohorte(df_etudiants, etat, ["S8"])
+    assert affecter_semestre(cohorte, etat.copie(), "S8", 2).tolist() == [0, -1, -1]
+
+    statistiques = StatistiquesAffectation()
+    ids = affecter_semestre_optimal(cohorte, etat, "S8", 2, statistiques=statistiques)
+    # Le troisième étudiant n'a pas la note min de CCCC
+    assert ids.tolist() == [1, 0, -1]
+    assert etat.places_prises["S8"].tolist() == [1, 1, 0]
+    assert statistiques.decisions[("S8", "scenario_1")] == 2
+    assert statistiques.decisions[("S8", "aucune")] == 1
+
+
+def test_moteur_optimal_respecte_places_et_notes_min():
+    df_univ_brut = generer_df_univ_brut(60, graine=71)
+    df_etudiants = generer_df_etudiants(500, 60, graine=72)
+
+    df_univ_rapide = traitement_df_univ(df_univ_brut)
+    df_rapide = traitement_scenario_hybride(df_univ_rapide, tri_df_etudiant_semestre_ponderation(df_etudiants.copy()), 3, moteur="rapide")
+    df_univ = traitement_df_univ(df_univ_brut)
+    df_res = traitement_scenario_hybride(df_univ, tri_df_etudiant_semestre_ponderation(df_etudiants.copy()), 3, moteur="optimal")
+
+    assert list(df_res.columns) == list(df_rapide.columns)
+    for semestre in ["S8", "S9"]:
+        obtenus = df_res[f"choix_final {semestre}"]
+        assert obtenus[df_res[f"Choix_{semestre}"].isna()].isna().all()
+        comptes = obtenus.value_counts()
+        places = df_univ.drop_duplicates("nom_partenaire").set_index("nom_partenaire")
+        assert (comptes <= places.loc[comptes.index, f"Places {semestre}"]).all()
+        assert (places.loc[comptes.index, f"Places Prises {semestre}"] == comptes).all()
+        note_min = places.loc[obtenus.dropna(), f"Note Min {semestre}"].to_numpy()
+        assert not (note_min > df_res.loc[obtenus.notna(), "Note"].to_numpy()).any()
+
+    # Même format : les indicateurs des deux moteurs se comparent directement
+    assert calculer_indicateurs(df_univ, df_res).keys() == calculer_indicateurs(df_univ_rapide, df_rapide).keys()
+
+
+def test_moteur_optimal_refuse_la_reprise(tmp_path):
+    df_univ = traitement_df_univ(generer_df_univ_brut(10, graine=1))
+    df_etu = tri_df_etudiant_semestre_ponderation(generer_df_etudiants(20, 10, graine=2))
+    with pytest.raises(ValueError):
+        traitement_scenario_hybride(df_univ, df_etu, moteur="optimal", fichier_reprise=str(tmp_path / "reprise.npz"))
@@ -0,0 +1,53 @@
+import pandas as pd
+import numpy as np
+import pytest
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.algo_affectation_classement import convertir_colonne_en_tuple, traitement_scenario_hybride
+from src.main.python import analyse_choix
+from src.main.python.analyse_choix import CHOIX_INCONNU, CHOIX_VIDE, encoder_choix_en_ids
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.test.donnees_test import generer_df_univ_brut, generer_df_etudiants
+
+
+@pytest.mark.parametrize("avec_pyarrow", [True, False])
+def test_texte_brut_et_tuples_donnent_la_meme_matrice(monkeypatch, avec_pyarrow):
+    if avec_pyarrow:
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(analyse_choix, "_pyarrow_disponible", lambda: avec_pyarrow)
+    index_noms = pd.Index(["AAAA", "BBBB"], dtype=object)
+    df = pd.DataFrame({"Choix": ["BBBB; AAAA", np.nan, "  ", "XXXX ;", "A;B;C;D;E; AAAA", " AAAA;;BBBB", "XXXX"]})
+    choix, a_choisi, inconnus = encoder_choix_en_ids(df["Choix"], index_noms)
+
+    assert choix.dtype == np.int32 and choix.shape == (7, 6)
+    assert choix[0].tolist() == [1, 0] + [CHOIX_VIDE] * 4
+    assert choix[3].tolist()[:2] == [CHOIX_INCONNU, CHOIX_VIDE]
+    assert choix[4].tolist() == [CHOIX_INCONNU] * 5 + [0]
+    assert choix[5].tolist()[:3] == [0, CHOIX_VIDE, 1]
+    assert a_choisi.tolist() == [True, False, False, True, True, True, True]
+    assert inconnus == {"XXXX": 2, "A": 1, "B": 1, "C": 1, "D": 1, "E": 1}
+
+    convertir_colonne_en_tuple(df, "Choix")
+    assert df["Choix"].iloc[5] == ("AAAA", "", "BBBB")
+    assert df["Choix"].iloc[3] == ("XXXX",)
+    choix_tuples, a_choisi_tuples, inconnus_tuples = encoder_choix_en_ids(df["Choix"], index_noms)
+    np.testing.assert_array_equal(choix_tuples, choix)
+    np.testing.assert_array_equal(a_choisi_tuples, a_choisi)
+    assert inconnus_tuples == inconnus
+
+
+def test_voeux_inconnus_recenses():
+    df_univ = traitement_df_univ(generer_df_univ_brut(10, graine=1))
+    df_etudiants = generer_df_etudiants(40, 10, graine=2)
+    attendu = {
+        semestre: int(df_etudiants[f"Choix {semestre}"].str.contains("INCONNUE").sum())
+        for semestre in ["S8", "S9"]
+    }
+    df_res = traitement_scenario_hybride(df_univ, df_etudiants)
+    assert df_res.attrs["voeux_inconnus"] == {semestre: {"INCONNUE": nb} for semestre, nb in attendu.items() if nb} | {
+        semestre: {} for semestre, nb in attendu.items() if not nb
+    }
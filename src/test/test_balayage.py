@@ -0,0 +1,39 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.balayage import balayer_parametres
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.main.python.indicateurs import calculer_indicateurs, rangs_obtenus
+from src.main.python.algo_affectation_classement import traitement_scenario_hybride, tri_df_etudiant_semestre_ponderation
+from src.test.donnees_test import generer_df_univ_brut, generer_df_etudiants
+
+
+def test_rangs_obtenus():
+    choix = np.array([[3, 1, -1], [2, 4, 5], [1, -1, -1], [-1, -1, -1]], dtype=np.int32)
+    ids_obtenus = np.array([1, 7, -1, -1], dtype=np.int32)
+    assert rangs_obtenus(choix, ids_obtenus).tolist() == [2, 0, -1, -1]
+
+
+def test_balayage_identique_aux_affectations_individuelles():
+    df_univ_brut = generer_df_univ_brut(30, graine=5)
+    df_etudiants = generer_df_etudiants(120, 30, graine=6)
+    dataframes_convertis = {"universites_partenaires": traitement_df_univ(df_univ_brut), "choix_etudiants": df_etudiants}
+
+    df_comparaison = balayer_parametres(dataframes_convertis, [0.0, 0.3], [1, 4], ["Taux", "Places Prises"], nb_processus=2)
+    assert len(df_comparaison) == 8
+    pd.testing.assert_frame_equal(
+        df_comparaison,
+        balayer_parametres(dataframes_convertis, [0.0, 0.3], [1, 4], ["Taux", "Places Prises"], nb_processus=1),
+    )
+
+    for ligne in df_comparaison.to_dict("records"):
+        df_univ = traitement_df_univ(df_univ_brut)
+        df_etu = tri_df_etudiant_semestre_ponderation(df_etudiants.copy(), alpha=ligne["alpha"])
+        df_etu = traitement_scenario_hybride(df_univ, df_etu, ligne["limite_ordre"], ligne["calcul_completion"])
+        attendu = calculer_indicateurs(df_univ, df_etu)
+        assert {cle: ligne[cle] for cle in attendu} == attendu
@@ -0,0 +1,61 @@
+import pandas as pd
+import numpy as np
+import pytest
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python import cache_entrees
+from src.main.python.cache_entrees import charger_entrees_converties, cle_cache, cle_cache_fichiers
+from src.main.python.conversion_df_brute import conversion_df_brute_pour_affectation
+from src.main.python.excel_en_dataframe import charger_excels
+from src.test.donnees_test import generer_df_univ_brut, generer_df_etudiants
+
+pytest.importorskip("pyarrow")
+
+
+def ecrire_dossier(dossier, graine):
+    dossier.mkdir(exist_ok=True)
+    generer_df_univ_brut(15, graine=graine).to_excel(dossier / "univ_data_mobility.xlsx", index=False)
+    generer_df_etudiants(20, 15, graine=graine + 1).to_excel(dossier / "choix_etudiants.xlsx", index=False)
+
+
+def test_cache_relu_sans_excel(tmp_path, monkeypatch):
+    dossier, dossier_cache = tmp_path / "data", tmp_path / "cache"
+    ecrire_dossier(dossier, graine=4)
+    attendu = conversion_df_brute_pour_affectation(charger_excels(str(dossier)))
+
+    premier = charger_entrees_converties(str(dossier), str(dossier_cache))
+    assert len(os.listdir(dossier_cache)) == 2
+
+    def charger_excels_interdit(dossier):
+        raise AssertionError("Les fichiers Excel ne doivent pas être relus")
+    monkeypatch.setattr(cache_entrees, "charger_excels", charger_excels_interdit)
+    second = charger_entrees_converties(str(dossier), str(dossier_cache))
+
+    for nom in ["universites_partenaires", "choix_etudiants"]:
+        pd.testing.assert_frame_equal(premier[nom], attendu[nom])
+        # Les colonnes texte sont relues en type str plutôt qu'object
+        pd.testing.assert_frame_equal(second[nom], attendu[nom], check_dtype=False)
+    assert second["universites_partenaires"]["Masque Specialites S8"].dtype == np.uint8
+
+
+def test_cle_change_avec_le_contenu(tmp_path, monkeypatch):
+    ecrire_dossier(tmp_path, graine=4)
+    cle = cle_cache(str(tmp_path))
+    assert cle_cache(str(tmp_path)) == cle
+    generer_df_univ_brut(15, graine=9).to_excel(tmp_path / "univ_data_mobility.xlsx", index=False)
+    assert cle_cache(str(tmp_path)) != cle
+    cle = cle_cache(str(tmp_path))
+    monkeypatch.setattr(cache_entrees, "VERSION_SCHEMA", cache_entrees.VERSION_SCHEMA + 1)
+    assert cle_cache(str(tmp_path)) != cle
+
+
+def test_cle_fichiers_depend_de_la_ligne_d_en_tete(tmp_path):
+    ecrire_dossier(tmp_path, graine=4)
+    (tmp_path / "partner.xlsx").write_bytes((tmp_path / "univ_data_mobility.xlsx").read_bytes())
+    chemin_etudiants = str(tmp_path / "choix_etudiants.xlsx")
+    assert cle_cache_fichiers(str(tmp_path / "partner.xlsx"), chemin_etudiants) \
+        != cle_cache_fichiers(str(tmp_path / "univ_data_mobility.xlsx"), chemin_etudiants)
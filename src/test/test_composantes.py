@@ -0,0 +1,92 @@
+import pandas as pd
+import numpy as np
+import pytest
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.algo_affectation_classement import traitement_scenario_hybride, tri_df_etudiant_semestre_ponderation
+from src.main.python.composantes import affecter_semestre_par_composantes, composantes_semestre, regrouper_composantes
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.moteur_rapide import affecter_semestre, encoder_cohorte
+from src.main.python.statistiques import StatistiquesAffectation
+from src.test.donnees_test import generer_df_univ_brut, generer_df_etudiants
+
+
+def df_univ_par_departement(nb_univ:int, graine:int) -> pd.DataFrame:
+    """Partenaires bruts dont chaque spécialité n'est compatible qu'avec un bloc de partenaires qui lui est propre."""
+    df = generer_df_univ_brut(nb_univ, graine)
+    specialites = ["MM", "MC", "SNI", "BAT", "EIT", "IDU"]
+    for semestre in ["S8", "S9"]:
+        for k, spe in enumerate(specialites):
+            df[f"{semestre}_{spe}"] = np.where(np.arange(nb_univ) % len(specialites) == k, 1, np.nan)
+    return df
+
+
+def generer_etudiants_par_departement(nb_etudiants:int, nb_univ:int, graine:int) -> pd.DataFrame:
+    """Étudiants qui ne font des voeux que parmi les partenaires de leur spécialité."""
+    df = generer_df_etudiants(nb_etudiants, nb_univ, graine)
+    rng = np.random.default_rng(graine)
+    specialites = ["MM", "MC", "SNI", "BAT", "EIT", "IDU"]
+    for semestre in ["S8", "S9"]:
+        colonne = []
+        for spe, choix in zip(df["Specialite"].tolist(), df[f"Choix {semestre}"].tolist()):
+            if not isinstance(choix, str):
+                colonne.append(choix)
+                continue
+            noms = [f"UNIV_{i:03d}" for i in range(specialites.index(spe), nb_univ, len(specialites))]
+            colonne.append("; ".join(rng.choice(noms, min(3, len(noms)), replace=False)))
+        df[f"Choix {semestre}"] = colonne
+    return df
+
+
+def test_composantes_par_departement():
+    df_univ = traitement_df_univ(df_univ_par_departement(36, graine=41))
+    df_etudiants = generer_etudiants_par_departement(120, 36, graine=42)
+    etat = EtatUniversites(df_univ)
+    cohorte = encoder_cohorte(df_etudiants, etat)
+    composantes = composantes_semestre(cohorte, etat, "S8")
+
+    assert composantes.max() + 1 == df_etudiants["Specialite"][cohorte.a_choisi["S8"]].nunique()
+    assert (composantes[~cohorte.a_choisi["S8"]] == -1).all()
+    for spe in df_etudiants["Specialite"].unique():
+        assert len(set(composantes[(df_etudiants["Specialite"] == spe).to_numpy() & cohorte.a_choisi["S8"]].tolist())) == 1
+
+    lots = regrouper_composantes(composantes, 4)
+    assert len(lots) == 4
+    assert sorted(np.concatenate(lots).tolist()) == list(range(len(composantes)))
+    assert all((np.diff(positions) > 0).all() for positions in lots)
+
+
+@pytest.mark.parametrize("nb_taches", [1, 3])
+def test_par_composantes_identique(nb_taches):
+    df_univ = traitement_df_univ(df_univ_par_departement(36, graine=43))
+    df_etudiants = tri_df_etudiant_semestre_ponderation(generer_etudiants_par_departement(200, 36, graine=44), alpha=0.1)
+    for semestre in ["S8", "S9"]:
+        etat_ref = EtatUniversites(df_univ)
+        cohorte = encoder_cohorte(df_etudiants, etat_ref)
+        attendu = affecter_semestre(cohorte, etat_ref, semestre, 2, "Taux")
+
+        etat = EtatUniversites(df_univ)
+        statistiques = StatistiquesAffectation()
+        obtenu = affecter_semestre_par_composantes(cohorte, etat, semestre, 2, "Taux", nb_taches=nb_taches, statistiques=statistiques)
+        assert obtenu.tolist() == attendu.tolist()
+        assert etat.places_prises[semestre].tolist() == etat_ref.places_prises[semestre].tolist()
+        assert sum(statistiques.decisions.values()) == len(df_etudiants)
+
+
+def test_traitement_par_composantes_identique():
+    df_univ_brut = generer_df_univ_brut(30, graine=45)
+    df_etudiants = tri_df_etudiant_semestre_ponderation(generer_df_etudiants(150, 30, graine=46), alpha=0.1)
+    df_univ_ref = traitement_df_univ(df_univ_brut)
+    df_etu_ref = traitement_scenario_hybride(df_univ_ref, df_etudiants.copy(), 3, "Places Prises")
+    df_univ = traitement_df_univ(df_univ_brut)
+    df_etu = traitement_scenario_hybride(df_univ, df_etudiants.copy(), 3, "Places Prises", moteur="rapide", composantes_en_parallele=True)
+    pd.testing.assert_frame_equal(df_etu, df_etu_ref)
+    pd.testing.assert_frame_equal(df_univ, df_univ_ref)
+
+    with pytest.raises(ValueError):
+        traitement_scenario_hybride(df_univ, df_etudiants.copy(), moteur="reference", composantes_en_parallele=True)
@@ -0,0 +1,43 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.algo_affectation_classement import get_liste_univ_compatible
+from src.main.python.conversion_df_brute import ajouter_listes_specialites, traitement_df_univ
+from src.main.python.etat_universites import EtatUniversites
+from src.test.donnees_test import SPECIALITES, generer_df_univ_brut
+
+
+def test_masques_et_listes_de_specialites():
+    df_brut = generer_df_univ_brut(40, graine=6)
+    df_brut.loc[::5, "S8_MM"] = 0
+    df_brut.loc[::7, "S9_IDU"] = -1
+    df_univ = traitement_df_univ(df_brut, avec_listes=True)
+
+    for semestre in ["S8", "S9"]:
+        attendu = [
+            [spe for spe in SPECIALITES if pd.notna(ligne[f"{semestre}_{spe}"]) and ligne[f"{semestre}_{spe}"] > 0]
+            for _, ligne in df_brut.iterrows()
+        ]
+        assert df_univ[f"Specialites Compatibles {semestre}"].tolist() == attendu
+        assert df_univ[f"Masque Specialites {semestre}"].dtype == np.uint8
+
+    df_sans_listes = traitement_df_univ(df_brut)
+    assert "Specialites Compatibles S8" not in df_sans_listes.columns
+    ajouter_listes_specialites(df_sans_listes)
+    pd.testing.assert_frame_equal(df_sans_listes, df_univ)
+
+
+def test_compatibles_identiques_depuis_masques_ou_listes():
+    df_univ = traitement_df_univ(generer_df_univ_brut(40, graine=7), avec_listes=True)
+    df_univ = pd.concat([df_univ, df_univ.iloc[[3, 8]]], ignore_index=True)
+    df_listes = df_univ.drop(columns=["Masque Specialites S8", "Masque Specialites S9"])
+    etat_masques, etat_listes = EtatUniversites(df_univ), EtatUniversites(df_listes)
+    for semestre in ["S8", "S9"]:
+        for spe in SPECIALITES + ["INCONNUE"]:
+            assert get_liste_univ_compatible(df_univ, semestre, spe) == get_liste_univ_compatible(df_listes, semestre, spe)
+            assert etat_masques.get_liste_univ_compatible(semestre, spe, 12.0) == etat_listes.get_liste_univ_compatible(semestre, spe, 12.0)
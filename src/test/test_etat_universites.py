@@ -0,0 +1,107 @@
+import pandas as pd
+import numpy as np
+import pytest
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.main.python.algo_affectation_classement import (
+    get_depuis_df_univ_prioritaire_avec_place_niveau_spe,
+    incrementer_places_prise,
+    traitement_scenario_hybride,
+    tri_df_etudiant_semestre_ponderation,
+)
+from src.test.donnees_test import SPECIALITES, generer_df_univ_brut, generer_df_etudiants, affectation_sur_dataframe
+
+
+def test_lectures_identiques_au_dataframe():
+    df_univ = pd.DataFrame({
+        "nom_partenaire": ["AAAA", "BBBB", "AAAA"],
+        "Places S8": [2, np.nan, 5],
+        "Places Prises S8": [1, 0, 0],
+        "Prioritaire S8": ["Oui", "non", "Non"],
+        "Note Min S8": [12, np.nan, 3],
+    })
+    etat = EtatUniversites(df_univ, ["S8"])
+    assert len(etat) == 2
+    assert etat.get_nombre_places_total("AAAA", "S8") == 2
+    assert etat.get_nombre_places_total("BBBB", "S8") is None
+    assert etat.get_nombre_places_prises("AAAA", "S8") == 1
+    assert etat.get_nb_places_disponibles("AAAA", "S8") == 1
+    assert etat.place_est_disponible("BBBB", "S8") is None
+    assert etat.place_est_disponible("CCCC", "S8") is None
+    assert etat.get_taux_completion_places("AAAA", "S8") == 0.5
+    assert etat.etudiant_a_niveau_requis(11.99, "AAAA", "S8") is False
+    assert etat.etudiant_a_niveau_requis(12, "AAAA", "S8") is True
+    assert etat.etudiant_a_niveau_requis(0, "BBBB", "S8") is True
+    assert etat.est_prioritaire("AAAA", "S8") is True
+    assert etat.est_prioritaire("BBBB", "S8") is False
+
+
+def test_ecrire_dans_df_ne_modifie_que_la_premiere_ligne():
+    df_univ = pd.DataFrame({
+        "nom_partenaire": ["AAAA", "BBBB", "AAAA"],
+        "Places S8": [2, 2, 5],
+        "Places Prises S8": [1, 0, 0],
+    })
+    etat = EtatUniversites(df_univ, ["S8"])
+    etat.incrementer_places_prise("AAAA", "S8")
+    etat.incrementer_places_prise("CCCC", "S8")
+    assert df_univ["Places Prises S8"].tolist() == [1, 0, 0]
+    etat.ecrire_dans_df(df_univ)
+    assert df_univ["Places Prises S8"].tolist() == [2, 0, 0]
+
+
+@pytest.mark.parametrize("limite_ordre", [0, 2, 5])
+@pytest.mark.parametrize("calcul_completion", ["Taux", "Places Prises"])
+def test_traitement_scenario_hybride_identique_au_parcours_dataframe(limite_ordre, calcul_completion):
+    df_univ_brut = generer_df_univ_brut(25, graine=limite_ordre)
+    df_etudiants = generer_df_etudiants(60, 25, graine=limite_ordre + 1)
+
+    df_univ_ref = traitement_df_univ(df_univ_brut)
+    df_etu_ref = tri_df_etudiant_semestre_ponderation(df_etudiants.copy(), alpha=0.1)
+    df_etu_ref = affectation_sur_dataframe(df_univ_ref, df_etu_ref, limite_ordre, calcul_completion)
+
+    df_univ = traitement_df_univ(df_univ_brut)
+    df_etu = tri_df_etudiant_semestre_ponderation(df_etudiants.copy(), alpha=0.1)
+    df_etu = traitement_scenario_hybride(df_univ, df_etu, limite_ordre, calcul_completion)
+
+    pd.testing.assert_frame_equal(df_etu, df_etu_ref)
+    pd.testing.assert_frame_equal(df_univ, df_univ_ref)
+
+
+def test_index_compatibles_par_specialite_et_note():
+    df_univ = pd.DataFrame({
+        "nom_partenaire": ["AAAA", "BBBB", "CCCC", "DDDD", "BBBB"],
+        "Specialites Compatibles S8": [["MM", "IDU"], ["MM"], ["IDU"], ["MM", "IDU"], ["IDU"]],
+        "Note Min S8": [15, np.nan, 10, 12, 0],
+    })
+    etat = EtatUniversites(df_univ, ["S8"])
+    assert etat.get_liste_univ_compatible("S8", "MM") == ["AAAA", "BBBB", "DDDD"]
+    assert etat.get_liste_univ_compatible("S8", "IDU") == ["AAAA", "CCCC", "DDDD", "BBBB"]
+    assert etat.get_liste_univ_compatible("S8", "SNI") == []
+    assert etat.get_liste_univ_compatible("S9", "MM") == []
+    assert etat.get_liste_univ_compatible("S8", "MM", note_etudiant=12) == ["BBBB", "DDDD"]
+    assert etat.get_liste_univ_compatible("S8", "IDU", note_etudiant=11.5) == ["CCCC", "BBBB"]
+    assert etat.get_liste_univ_compatible("S8", "IDU", note_etudiant=20) == ["AAAA", "CCCC", "DDDD", "BBBB"]
+    assert etat.get_liste_univ_compatible("S8", "MM", note_etudiant=0) == ["BBBB"]
+
+
+@pytest.mark.parametrize("calcul_completion", ["Taux", "Places Prises"])
+def test_arbres_moins_rempli_identiques_au_dataframe(calcul_completion):
+    rng = np.random.default_rng(7)
+    df_univ = traitement_df_univ(generer_df_univ_brut(30, graine=3))
+    etat = EtatUniversites(df_univ)
+    for _ in range(80):
+        semestre = str(rng.choice(["S8", "S9"]))
+        specialite = str(rng.choice(SPECIALITES))
+        note = float(rng.choice([np.nan, rng.uniform(0, 20)]))
+        attendu = get_depuis_df_univ_prioritaire_avec_place_niveau_spe(df_univ, note, semestre, specialite, calcul_completion)
+        assert etat.get_univ_la_moins_remplie_compatible(semestre, specialite, note, calcul_completion) == attendu
+        if attendu != "":
+            incrementer_places_prise(df_univ, attendu, semestre)
+            etat.incrementer_places_prise(attendu, semestre)
@@ -0,0 +1,68 @@
+import pandas as pd
+import numpy as np
+import pytest
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python import excel_en_dataframe
+from src.main.python.excel_en_dataframe import charger_excels
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.test.donnees_test import generer_df_univ_brut, generer_df_etudiants
+
+
+def ecrire_dossier(dossier):
+    df_univ_brut = generer_df_univ_brut(15, graine=2)
+    df_univ_brut.insert(1, "pays", "France")
+    df_univ_brut["commentaire"] = "texte libre"
+    df_univ_brut.to_excel(dossier / "univ_data_mobility.xlsx", index=False)
+    df_etudiants = generer_df_etudiants(20, 15, graine=3)
+    df_etudiants.to_excel(dossier / "choix_etudiants.xlsx", index=False)
+    (dossier / "notes.txt").write_text("pas un excel")
+    return df_univ_brut, df_etudiants
+
+
+@pytest.mark.parametrize("moteur", ["calamine", None])
+def test_charger_excels_ne_lit_que_les_colonnes_utiles(tmp_path, monkeypatch, moteur):
+    if moteur == "calamine":
+        pytest.importorskip("python_calamine")
+    monkeypatch.setattr(excel_en_dataframe, "moteur_excel_disponible", lambda: moteur)
+    df_univ_brut, df_etudiants = ecrire_dossier(tmp_path)
+
+    dataframes = charger_excels(str(tmp_path))
+    assert sorted(dataframes) == ["choix_etudiants", "univ_data_mobility"]
+    df_univ = dataframes["univ_data_mobility"]
+    assert "pays" not in df_univ.columns and "commentaire" not in df_univ.columns
+    assert df_univ["S8_total_places"].dtype == np.float64
+    pd.testing.assert_frame_equal(traitement_df_univ(df_univ), traitement_df_univ(df_univ_brut), check_dtype=False)
+    assert dataframes["choix_etudiants"]["Id Etudiant"].tolist() == df_etudiants["Id Etudiant"].tolist()
+
+
+def test_lecture_partenaires_garde_une_colonne_non_numerique(tmp_path):
+    df_univ_brut = generer_df_univ_brut(5, graine=4)
+    df_univ_brut["note_min"] = df_univ_brut["note_min"].astype(object)
+    df_univ_brut.loc[0, "note_min"] = "voir dossier"
+    df_univ_brut.to_excel(tmp_path / "univ.xlsx", index=False)
+
+    df_univ = excel_en_dataframe.lire_excel_partenaires(str(tmp_path / "univ.xlsx"))
+    assert df_univ["note_min"].iloc[0] == "voir dossier"
+    assert df_univ["S8_total_places"].dtype == np.float64
+
+
+def test_lire_excel_signale_le_retour_au_moteur_par_defaut(tmp_path, caplog):
+    pytest.importorskip("python_calamine")
+    chemin = tmp_path / "abime.xlsx"
+    chemin.write_text("pas un excel")
+    with caplog.at_level("WARNING", logger="general"), pytest.raises(Exception):
+        excel_en_dataframe.lire_excel(str(chemin))
+    assert "moteur par défaut" in caplog.text
+
+
+def test_seul_le_fichier_des_partenaires_est_projete(tmp_path):
+    df_etudiants = generer_df_etudiants(10, 5, graine=5)
+    df_etudiants.to_excel(tmp_path / "choix_etudiants_univ.xlsx", index=False)
+
+    dataframes = charger_excels(str(tmp_path))
+    assert list(dataframes["choix_etudiants_univ"].columns) == list(df_etudiants.columns)
@@ -0,0 +1,101 @@
+import pandas as pd
+import numpy as np
+import pytest
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.algo_affectation_classement import traitement_scenario_hybride, tri_df_etudiant_semestre_ponderation
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.main.python.export_resultats import colonnes_par_defaut, exporter_resultats
+from src.test.donnees_test import generer_df_univ_brut, generer_df_etudiants
+
+
+@pytest.fixture(scope="module")
+def df_resultat():
+    df_univ = traitement_df_univ(generer_df_univ_brut(10, graine=1))
+    df_etudiants = tri_df_etudiant_semestre_ponderation(generer_df_etudiants(60, 10, graine=2))
+    return traitement_scenario_hybride(df_univ, df_etudiants, limite_ordre=2, moteur="rapide")
+
+
+def lire(chemin, **kwargs):
+    if chemin.endswith(".csv"):
+        return pd.read_csv(chemin, sep=";", **kwargs)
+    if chemin.endswith(".parquet"):
+        return pd.read_parquet(chemin, **kwargs)
+    return pd.read_excel(chemin, **kwargs)
+
+
+@pytest.mark.parametrize("extension", ["xlsx", "csv", "parquet"])
+def test_export_projete_et_listes(tmp_path, df_resultat, extension):
+    if extension == "parquet":
+        pytest.importorskip("pyarrow")
+    chemin = str(tmp_path / f"resultat.{extension}")
+    compte = exporter_resultats(df_resultat, chemin, listes_par_universite=True, taille_lot=7)
+
+    df_lu = lire(chemin)
+    assert list(df_lu.columns) == ["Id_Etudiant", "Specialite", "Note", "Choix_S8", "Choix_S9", "choix_final S8", "choix_final S9"]
+    assert compte["lignes"] == len(df_lu) == len(df_resultat)
+    assert df_lu["Id_Etudiant"].tolist() == df_resultat["Id_Etudiant"].tolist()
+    attendu = df_resultat["Choix_S8"].map(lambda choix: "; ".join(choix) if isinstance(choix, tuple) else np.nan)
+    assert df_lu["Choix_S8"].fillna("").tolist() == attendu.fillna("").tolist()
+
+    attendu_par_univ = pd.concat([df_resultat["choix_final S8"], df_resultat["choix_final S9"]]).value_counts().to_dict()
+    assert compte["par_universite"] == attendu_par_univ
+    for univ, nb in attendu_par_univ.items():
+        if extension == "xlsx":
+            df_liste = pd.read_excel(chemin, sheet_name=univ)
+        else:
+            df_liste = lire(str(tmp_path / "resultat_par_universite" / f"{univ}.{extension}"))
+        assert len(df_liste) == nb
+        assert ((df_liste["Semestre"] == "S8") & (df_liste["choix_final S8"] == univ)
+                | (df_liste["Semestre"] == "S9") & (df_liste["choix_final S9"] == univ)).all()
+
+
+def test_export_garde_les_colonnes_propres_au_fichier_des_etudiants(tmp_path):
+    df_univ = traitement_df_univ(generer_df_univ_brut(10, graine=1))
+    df_etudiants = generer_df_etudiants(30, 10, graine=3)
+    df_etudiants["Nom"] = [f"Etudiant {k}" for k in range(len(df_etudiants))]
+    df_resultat = traitement_scenario_hybride(df_univ, tri_df_etudiant_semestre_ponderation(df_etudiants), limite_ordre=2, moteur="rapide")
+    chemin = str(tmp_path / "resultat.xlsx")
+    exporter_resultats(df_resultat, chemin)
+
+    df_lu = lire(chemin)
+    assert list(df_lu.columns) == colonnes_par_defaut(df_resultat)
+    assert df_lu["Nom"].tolist() == df_resultat["Nom"].tolist()
+    assert not set(df_lu.columns) & {"Rang", "Priorite", "Index_original", "Nb_semestres_demandes"}
+
+
+def test_export_colonnes_choisies(tmp_path, df_resultat):
+    chemin = str(tmp_path / "resultat.csv")
+    exporter_resultats(df_resultat, chemin, colonnes=["Id_Etudiant", "choix_final S9"])
+    assert list(lire(chemin).columns) == ["Id_Etudiant", "choix_final S9"]
+    with pytest.raises(KeyError):
+        exporter_resultats(df_resultat, chemin, colonnes=["Inexistante"])
+    with pytest.raises(ValueError):
+        exporter_resultats(df_resultat, str(tmp_path / "resultat.txt"))
+
+
+@pytest.mark.parametrize("extension", ["xlsx", "csv"])
+def test_listes_noms_de_partenaires_en_collision(tmp_path, extension):
+    df_resultat = pd.DataFrame({
+        "Id_Etudiant": [1, 2, 3, 4],
+        "choix_final S8": ["A/B", "A:B", "a/b", None],
+        "choix_final S9": [None, None, None, "A/B"],
+    })
+    chemin = str(tmp_path / f"resultat.{extension}")
+    compte = exporter_resultats(df_resultat, chemin, listes_par_universite=True)
+
+    assert compte["par_universite"] == {"A/B": 2, "A:B": 1, "a/b": 1}
+    noms = list(compte["listes"].values())
+    assert len({nom.lower() for nom in noms}) == 3
+    for univ, nom in compte["listes"].items():
+        if extension == "xlsx":
+            df_liste = pd.read_excel(chemin, sheet_name=nom)
+        else:
+            df_liste = lire(str(tmp_path / "resultat_par_universite" / nom))
+        assert len(df_liste) == compte["par_universite"][univ]
+    if extension == "csv":
+        assert sorted(os.listdir(tmp_path / "resultat_par_universite")) == sorted(noms)
@@ -0,0 +1,59 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.main.python.generation_synthetique import (
+    generer_df_univ_synthetique,
+    generer_choix_synthetiques,
+    generer_df_choix_etudiants_vectorise,
+    tirer_choix_distincts,
+)
+
+
+def test_tirer_choix_distincts():
+    rng = np.random.default_rng(0)
+    for nb_candidats in [3, 8, 100]:
+        candidats = np.arange(10, 10 + nb_candidats, dtype=np.int32)
+        tirage = tirer_choix_distincts(500, candidats, 5, rng)
+        assert tirage.shape == (500, min(5, nb_candidats))
+        assert all(len(set(ligne)) == tirage.shape[1] for ligne in tirage.tolist())
+        assert np.isin(tirage, candidats).all()
+    assert tirer_choix_distincts(4, np.empty(0, dtype=np.int32), 5, rng).shape == (4, 0)
+
+
+def test_generer_choix_synthetiques_compatibles_et_reproductibles():
+    df_univ = traitement_df_univ(generer_df_univ_synthetique(50, np.random.default_rng(1)))
+    etat = EtatUniversites(df_univ)
+    choix = generer_choix_synthetiques(1000, etat, np.random.default_rng(2), proba_un_seul_semestre=0.3)
+
+    assert len(choix["Note"]) == 1000
+    assert (np.diff(choix["Note"]) <= 0).all()
+    assert pd.Series(choix["Specialite"]).value_counts().to_dict() == {"MM": 250, "BAT": 250, "MC": 125, "SNI": 125, "EIT": 125, "IDU": 125}
+    demandes = [(choix[f"Choix {semestre}"] >= 0).any(axis=1) for semestre in ["S8", "S9"]]
+    assert (demandes[0] | demandes[1]).all()
+    for semestre in ["S8", "S9"]:
+        for spe, ligne in zip(choix["Specialite"], choix[f"Choix {semestre}"]):
+            ids = ligne[ligne >= 0]
+            assert len(set(ids.tolist())) == len(ids)
+            assert np.isin(ids, etat.get_ids_compatibles(semestre, spe)).all()
+
+    choix_bis = generer_choix_synthetiques(1000, etat, np.random.default_rng(2), proba_un_seul_semestre=0.3)
+    for cle in choix:
+        np.testing.assert_array_equal(choix[cle], choix_bis[cle])
+
+
+def test_generer_df_choix_etudiants_vectorise_au_format_du_generateur():
+    df_univ = traitement_df_univ(generer_df_univ_synthetique(30, np.random.default_rng(3)))
+    df_etudiants = generer_df_choix_etudiants_vectorise(200, df_univ, np.random.default_rng(4), proba_un_seul_semestre=1.0)
+    assert list(df_etudiants.columns) == ["Id Etudiant", "Specialite", "Note", "Choix S8", "Choix S9"]
+    assert ((df_etudiants["Choix S8"] == "") != (df_etudiants["Choix S9"] == "")).all()
+    noms = set(df_univ["nom_partenaire"])
+    for valeur in df_etudiants["Choix S8"]:
+        if valeur:
+            assert set(valeur.split("; ")) <= noms
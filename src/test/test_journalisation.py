@@ -0,0 +1,90 @@
+import pandas as pd
+import numpy as np
+import subprocess
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.journalisation import configurer_journalisation, arreter_journalisation
+from src.main.python.algo_affectation_classement import traitement_scenario_hybride
+
+RACINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def traiter_petite_cohorte():
+    df_univ = pd.DataFrame({
+        "nom_partenaire": ["AAAA", "BBBB"],
+        "Places S8": [1, 1],
+        "Places Prises S8": [0, 0],
+        "Specialites Compatibles S8": [["MM"], ["MM"]],
+        "Prioritaire S8": ["Oui", "Non"],
+        "Note Min S8": [np.nan, np.nan],
+        "Places S9": [0, 0],
+        "Places Prises S9": [0, 0],
+        "Specialites Compatibles S9": [["MM"], ["MM"]],
+        "Prioritaire S9": ["Non", "Non"],
+        "Note Min S9": [np.nan, np.nan],
+    })
+    df_etudiants = pd.DataFrame({
+        "Id Etudiant": [1, 2, 3],
+        "Specialite": ["MM", "MM", "MM"],
+        "Note": [15, 12, 10],
+        "Choix S8": ["AAAA; BBBB", "AAAA", "BBBB"],
+        "Choix S9": [np.nan, "AAAA", np.nan],
+    })
+    return traitement_scenario_hybride(df_univ, df_etudiants, limite_ordre=1)
+
+
+def test_mode_silencieux_ecrit_un_code_par_decision(tmp_path):
+    fichier_general = tmp_path / "log.txt"
+    fichier_debug = tmp_path / "log_debug.txt"
+    try:
+        configurer_journalisation(str(fichier_general), str(fichier_debug), mode="silencieux")
+        traiter_petite_cohorte()
+        arreter_journalisation()
+        lignes = [ligne.split(" - ")[-1] for ligne in fichier_general.read_text().splitlines()]
+        assert lignes == ["1;S8;O1", "1;S9;V", "2;S8;F", "2;S9;N", "3;S8;N", "3;S9;V"]
+        assert fichier_debug.read_text() == ""
+    finally:
+        arreter_journalisation()
+
+
+def test_mode_complet_ecrit_les_messages_detailles(tmp_path):
+    fichier_general = tmp_path / "log.txt"
+    fichier_debug = tmp_path / "log_debug.txt"
+    try:
+        configurer_journalisation(str(fichier_general), str(fichier_debug))
+        traiter_petite_cohorte()
+        arreter_journalisation()
+        contenu = fichier_general.read_text()
+        assert "1 obtient le choix AAAA (ordre 1) pour le S8" in contenu
+        assert "2 affecté par fallback à BBBB pour S8" in contenu
+        assert "1;S8" not in contenu
+        assert "2 n'obtient pas le choix AAAA pour S8 dans scénario 1" in fichier_debug.read_text()
+    finally:
+        arreter_journalisation()
+
+
+def test_import_sans_effet_de_bord(tmp_path):
+    code = (
+        "import sys, logging; sys.path.insert(0, sys.argv[1]); "
+        "import src.main.python.algo_affectation_classement; "
+        "print('numba' in sys.modules, logging.getLogger('general').handlers)"
+    )
+    sortie = subprocess.run([sys.executable, "-c", code, RACINE], cwd=tmp_path, capture_output=True, text=True, check=True).stdout
+    assert sortie.strip() == "False []"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_fichiers_par_processus(tmp_path):
+    try:
+        chemins = configurer_journalisation(mode="silencieux", dossier=str(tmp_path / "logs"), par_processus=True)
+        traiter_petite_cohorte()
+        arreter_journalisation()
+        assert chemins["general"] == str(tmp_path / "logs" / f"log_{os.getpid()}.txt")
+        assert chemins["debug"] == str(tmp_path / "logs" / f"log_debug_{os.getpid()}.txt")
+        assert "1;S8;O1" in (tmp_path / "logs" / f"log_{os.getpid()}.txt").read_text()
+    finally:
+        arreter_journalisation()
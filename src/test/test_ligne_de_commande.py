@@ -0,0 +1,56 @@
+import pandas as pd
+import subprocess
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.algo_affectation_classement import traitement_scenario_hybride, tri_df_etudiant_semestre_ponderation
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.main.python.ligne_de_commande import main
+from src.test.donnees_test import generer_df_univ_brut, generer_df_etudiants
+
+RACINE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def test_plusieurs_cohortes(tmp_path, capsys):
+    df_univ_brut = generer_df_univ_brut(20, graine=31)
+    chemin_univ = tmp_path / "partenaires.xlsx"
+    df_univ_brut.to_excel(chemin_univ, index=False)
+    cohortes = []
+    for k in range(2):
+        df_etudiants = generer_df_etudiants(50, 20, graine=32 + k)
+        chemin_etudiants = tmp_path / f"promo{k}.xlsx"
+        df_etudiants.to_excel(chemin_etudiants, index=False)
+        cohortes.append((df_etudiants, chemin_etudiants, tmp_path / f"resultat{k}.csv"))
+
+    argv = ["--alpha", "0.1", "--limite-ordre", "2"]
+    for _, chemin_etudiants, chemin_sortie in cohortes:
+        argv += ["--cohorte", str(chemin_univ), str(chemin_etudiants), str(chemin_sortie)]
+    argv += ["--cohorte", str(chemin_univ), str(tmp_path / "absent.xlsx"), str(tmp_path / "absent.csv")]
+    assert main(argv) == 1
+    assert "absent.xlsx" in capsys.readouterr().err
+
+    for df_etudiants, _, chemin_sortie in cohortes:
+        df_etu = tri_df_etudiant_semestre_ponderation(df_etudiants.copy(), alpha=0.1)
+        attendu = traitement_scenario_hybride(traitement_df_univ(df_univ_brut), df_etu, 2, "Taux")
+        resultat = pd.read_csv(chemin_sortie, sep=";", encoding="utf-8-sig")
+        for semestre in ["S8", "S9"]:
+            colonne = f"choix_final {semestre}"
+            assert resultat[colonne].fillna("").tolist() == attendu[colonne].fillna("").tolist()
+
+
+def test_colonnes_exportees(tmp_path):
+    chemin_univ, chemin_etudiants = tmp_path / "partenaires.xlsx", tmp_path / "promo.xlsx"
+    generer_df_univ_brut(10, graine=33).to_excel(chemin_univ, index=False)
+    generer_df_etudiants(20, 10, graine=34).to_excel(chemin_etudiants, index=False)
+    chemin_sortie = tmp_path / "resultat.csv"
+    assert main(["--cohorte", str(chemin_univ), str(chemin_etudiants), str(chemin_sortie), "--colonnes", "Id_Etudiant", "choix_final S8"]) == 0
+    assert list(pd.read_csv(chemin_sortie, sep=";", encoding="utf-8-sig").columns) == ["Id_Etudiant", "choix_final S8"]
+
+
+def test_aucun_import_de_tkinter():
+    code = "import sys; from src.main.python import ligne_de_commande; ligne_de_commande.analyser_arguments(['--cohorte', 'a', 'b', 'c']); print('tkinter' in sys.modules)"
+    sortie = subprocess.run([sys.executable, "-c", code], cwd=RACINE, capture_output=True, text=True, check=True).stdout
+    assert sortie.strip() == "False"
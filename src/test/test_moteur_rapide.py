@@ -0,0 +1,212 @@
+import pandas as pd
+import numpy as np
+import pytest
+import sys
+import os
+import threading
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.etat_universites import EtatUniversites
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.main.python import algo_affectation_classement
+from src.main.python.algo_affectation_classement import traitement_scenario_hybride, tri_df_etudiant_semestre_ponderation, AffectationAnnulee
+from src.main.python.moteur_rapide import CHOIX_INCONNU, CHOIX_VIDE, affecter_semestre, encoder_choix, encoder_cohorte
+from src.main.python.statistiques import StatistiquesAffectation
+from src.test.donnees_test import generer_df_univ_brut, generer_df_etudiants
+
+
+def test_encoder_choix():
+    df_univ = pd.DataFrame({"nom_partenaire": ["AAAA", "BBBB"]})
+    etat = EtatUniversites(df_univ)
+    serie = pd.Series([("BBBB", "AAAA"), np.nan, ("", " "), ("XXXX", ""), ("A", "B", "C", "D", "E", "AAAA")], dtype=object)
+    choix, a_choisi = encoder_choix(serie, etat)
+    assert choix.dtype == np.int32
+    assert choix.shape == (5, 6)
+    assert choix[0].tolist() == [1, 0] + [CHOIX_VIDE] * 4
+    assert choix[1].tolist() == [CHOIX_VIDE] * 6
+    assert choix[3].tolist()[:2] == [CHOIX_INCONNU, CHOIX_VIDE]
+    assert choix[4].tolist() == [CHOIX_INCONNU] * 5 + [0]
+    assert a_choisi.tolist() == [True, False, False, True, True]
+
+
+@pytest.mark.parametrize("limite_ordre", [0, 1, 3, 5])
+@pytest.mark.parametrize("calcul_completion", ["Taux", "Places Prises"])
+def test_moteur_rapide_identique_au_moteur_reference(limite_ordre, calcul_completion):
+    df_univ_brut = generer_df_univ_brut(60, graine=10 + limite_ordre)
+    df_etudiants = generer_df_etudiants(400, 60, graine=20 + limite_ordre)
+
+    df_univ_ref = traitement_df_univ(df_univ_brut)
+    df_etu_ref = tri_df_etudiant_semestre_ponderation(df_etudiants.copy(), alpha=0.1)
+    df_etu_ref = traitement_scenario_hybride(df_univ_ref, df_etu_ref, limite_ordre, calcul_completion)
+
+    df_univ = traitement_df_univ(df_univ_brut)
+    df_etu = tri_df_etudiant_semestre_ponderation(df_etudiants.copy(), alpha=0.1)
+    df_etu = traitement_scenario_hybride(df_univ, df_etu, limite_ordre, calcul_completion, moteur="rapide")
+
+    pd.testing.assert_frame_equal(df_etu, df_etu_ref)
+    pd.testing.assert_frame_equal(df_univ, df_univ_ref)
+
+
+def test_moteur_inconnu():
+    with pytest.raises(ValueError):
+        traitement_scenario_hybride(pd.DataFrame(), pd.DataFrame(), moteur="inconnu")
+
+
+@pytest.mark.parametrize("limite_ordre", [0, 2, 5])
+def test_statistiques_identiques_entre_moteurs(limite_ordre):
+    df_univ_brut = generer_df_univ_brut(25, graine=11)
+    df_etudiants = generer_df_etudiants(60, 25, graine=12)
+    # Voeux vides en fin de cellule : ils ne comptent dans la longueur des voeux d'aucun moteur
+    df_etudiants.loc[::3, "Choix S8"] = df_etudiants.loc[::3, "Choix S8"] + "; "
+    df_etudiants.loc[1, "Choix S9"] = "UNIV_001; ; "
+    resumes = {}
+    for moteur in ["reference", "rapide"]:
+        statistiques = StatistiquesAffectation()
+        traitement_scenario_hybride(traitement_df_univ(df_univ_brut), df_etudiants.copy(), limite_ordre, "Taux", moteur=moteur, statistiques=statistiques)
+        resumes[moteur] = statistiques.resume().set_index(["semestre", "scenario"])
+    pd.testing.assert_frame_equal(resumes["reference"][["passages", "decisions"]], resumes["rapide"][["passages", "decisions"]])
+    voeux = resumes["reference"].index.get_level_values("scenario").isin(["scenario_1", "scenario_2"])
+    pd.testing.assert_series_equal(resumes["reference"]["recherches_places"][voeux], resumes["rapide"]["recherches_places"][voeux])
+
+    resume = resumes["reference"]
+    decisions = resume["decisions"].groupby(level="semestre").sum()
+    assert (decisions == len(df_etudiants)).all()
+    assert (resume["temps_s"] >= 0).all() and (resume["passages"] >= resume["decisions"]).all()
+    if limite_ordre == 0:
+        assert "scenario_1" not in resume.index.get_level_values("scenario")
+
+
+@pytest.mark.parametrize("moteur", ["reference", "rapide"])
+def test_progression_par_lots_identique(moteur, monkeypatch):
+    monkeypatch.setattr(algo_affectation_classement, "TAILLE_LOT_PROGRESSION_RAPIDE", 7)
+    df_univ_brut = generer_df_univ_brut(30, graine=13)
+    df_etudiants = generer_df_etudiants(120, 30, graine=14)
+
+    df_univ_ref = traitement_df_univ(df_univ_brut)
+    df_etu_ref = traitement_scenario_hybride(df_univ_ref, df_etudiants.copy(), 2, "Taux", moteur="reference")
+
+    progression = []
+    df_univ = traitement_df_univ(df_univ_brut)
+    df_etu = traitement_scenario_hybride(df_univ, df_etudiants.copy(), 2, "Taux", moteur=moteur,
+                                         rappel_progression=lambda semestre, traites, total: progression.append((semestre, traites, total)))
+
+    pd.testing.assert_frame_equal(df_etu, df_etu_ref)
+    pd.testing.assert_frame_equal(df_univ, df_univ_ref)
+    for semestre in ["S8", "S9"]:
+        traites = [t for s, t, total in progression if s == semestre]
+        assert traites == sorted(traites) and traites[-1] == len(df_etudiants)
+        assert all(total == len(df_etudiants) for s, t, total in progression)
+
+
+@pytest.mark.parametrize("moteur", ["reference", "rapide"])
+def test_annulation(moteur):
+    df_univ_brut = generer_df_univ_brut(30, graine=13)
+    df_univ = traitement_df_univ(df_univ_brut)
+    places_prises = df_univ["Places Prises S8"].copy()
+    annulation = threading.Event()
+
+    def rappel(semestre, traites, total):
+        if traites > 0:
+            annulation.set()
+
+    with pytest.raises(AffectationAnnulee):
+        traitement_scenario_hybride(df_univ, generer_df_etudiants(120, 30, graine=14), 2, "Taux", moteur=moteur,
+                                    rappel_progression=rappel, evenement_annulation=annulation)
+    pd.testing.assert_series_equal(df_univ["Places Prises S8"], places_prises)
+
+
+@pytest.mark.parametrize("moteur_interrompu", ["reference", "rapide"])
+@pytest.mark.parametrize("moteur_reprise", ["reference", "rapide"])
+def test_reprise_apres_interruption(moteur_interrompu, moteur_reprise, tmp_path, monkeypatch):
+    monkeypatch.setattr(algo_affectation_classement, "TAILLE_LOT_PROGRESSION_RAPIDE", 40)
+    df_univ_brut = generer_df_univ_brut(30, graine=15)
+    df_etudiants = tri_df_etudiant_semestre_ponderation(generer_df_etudiants(200, 30, graine=16), alpha=0.1)
+    fichier = str(tmp_path / "reprise.npz")
+
+    df_univ_ref = traitement_df_univ(df_univ_brut)
+    df_etu_ref = traitement_scenario_hybride(df_univ_ref, df_etudiants.copy(), 3, "Places Prises")
+
+    annulation = threading.Event()
+
+    def rappel(semestre, traites, total):
+        if semestre == "S9" or traites >= 120:
+            annulation.set()
+
+    with pytest.raises(AffectationAnnulee):
+        traitement_scenario_hybride(traitement_df_univ(df_univ_brut), df_etudiants.copy(), 3, "Places Prises", moteur=moteur_interrompu,
+                                    rappel_progression=rappel, evenement_annulation=annulation, fichier_reprise=fichier, intervalle_reprise=30)
+    assert os.path.exists(fichier)
+
+    df_univ = traitement_df_univ(df_univ_brut)
+    df_etu = algo_affectation_classement.reprendre_traitement(df_univ, df_etudiants.copy(), fichier, moteur=moteur_reprise)
+    pd.testing.assert_frame_equal(df_etu, df_etu_ref)
+    pd.testing.assert_frame_equal(df_univ, df_univ_ref)
+    assert not os.path.exists(fichier)
+
+
+def test_reprise_refusee_si_les_entrees_changent(tmp_path):
+    df_univ_brut = generer_df_univ_brut(20, graine=15)
+    df_etudiants = generer_df_etudiants(60, 20, graine=16)
+    fichier = str(tmp_path / "reprise.npz")
+    annulation = threading.Event()
+    annulation.set()
+    with pytest.raises(AffectationAnnulee):
+        traitement_scenario_hybride(traitement_df_univ(df_univ_brut), df_etudiants.copy(), 2, moteur="rapide",
+                                    evenement_annulation=annulation, fichier_reprise=fichier)
+
+    with pytest.raises(ValueError):
+        algo_affectation_classement.reprendre_traitement(traitement_df_univ(df_univ_brut), df_etudiants.iloc[::-1].copy(), fichier)
+    with pytest.raises(FileNotFoundError):
+        algo_affectation_classement.reprendre_traitement(traitement_df_univ(df_univ_brut), df_etudiants.copy(), str(tmp_path / "absent.npz"))
+
+
+@pytest.mark.parametrize("moteur", ["reference", "rapide"])
+def test_semestres_en_parallele_identique(moteur):
+    df_univ_brut = generer_df_univ_brut(30, graine=17)
+    df_etudiants = tri_df_etudiant_semestre_ponderation(generer_df_etudiants(150, 30, graine=18), alpha=0.1)
+
+    statistiques_ref = StatistiquesAffectation()
+    df_univ_ref = traitement_df_univ(df_univ_brut)
+    df_etu_ref = traitement_scenario_hybride(df_univ_ref, df_etudiants.copy(), 2, "Taux", moteur=moteur, statistiques=statistiques_ref)
+
+    statistiques = StatistiquesAffectation()
+    df_univ = traitement_df_univ(df_univ_brut)
+    df_etu = traitement_scenario_hybride(df_univ, df_etudiants.copy(), 2, "Taux", moteur=moteur, statistiques=statistiques,
+                                         semestres_en_parallele=True)
+
+    pd.testing.assert_frame_equal(df_etu, df_etu_ref)
+    pd.testing.assert_frame_equal(df_univ, df_univ_ref)
+    colonnes = ["passages", "decisions"]
+    pd.testing.assert_frame_equal(statistiques.resume()[colonnes], statistiques_ref.resume()[colonnes])
+
+
+def test_cohorte_compacte_vers_dataframe():
+    df_univ_brut = generer_df_univ_brut(40, graine=19)
+    df_etudiants = tri_df_etudiant_semestre_ponderation(generer_df_etudiants(300, 40, graine=20), alpha=0.1)
+    df_etudiants.loc[df_etudiants.index[:3], "Specialite"] = ["HORS_LISTE", np.nan, "HORS_LISTE"]
+    df_etudiants.loc[df_etudiants.index[4], "Note"] = 12.1
+
+    df_univ_ref = traitement_df_univ(df_univ_brut)
+    df_ref = traitement_scenario_hybride(df_univ_ref, df_etudiants.copy(), 3, moteur="reference")
+
+    etat = EtatUniversites(traitement_df_univ(df_univ_brut))
+    cohorte = encoder_cohorte(df_etudiants, etat)
+    assert cohorte.notes.dtype == np.float32 and cohorte.specialites.dtype == np.int16
+    assert cohorte.choix["S8"].dtype == np.int32 and cohorte.resultats["S8"].dtype == np.int32
+    assert not hasattr(cohorte, "__dict__")
+    for semestre in ["S8", "S9"]:
+        affecter_semestre(cohorte, etat, semestre, 3, resultat=cohorte.resultats[semestre])
+
+    # Même affectation que le moteur de référence en float64, même contenu que sa sortie (voeux inconnus compris)
+    df_res = cohorte.vers_dataframe(etat)
+    assert df_res.loc[4, "Note"] == 12.1
+    colonnes = list(df_res.columns)
+    attendu = df_ref[colonnes].reset_index(drop=True)
+    attendu["Id_Etudiant"] = attendu["Id_Etudiant"].astype(np.int32)
+    pd.testing.assert_frame_equal(df_res, attendu, check_dtype=False)
+
+    # Les noms inconnus suivent les étudiants dans un sous-ensemble
+    ordre = np.arange(len(cohorte))[::-1]
+    pd.testing.assert_frame_equal(cohorte.sous_ensemble(ordre).vers_dataframe(etat), df_res.iloc[ordre].reset_index(drop=True))
@@ -0,0 +1,23 @@
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.benchmark.outils_benchmark import charger_references, enregistrer_references, mesurer, regressions
+
+
+def test_mesure_references_et_regressions(tmp_path):
+    mesure = mesurer(lambda: (list(range(10_000)),), sorted, repetitions=2)
+    assert mesure["temps_s"] >= 0 and mesure["pic_memoire_mo"] > 0
+
+    chemin = str(tmp_path / "references.json")
+    enregistrer_references({"a": {"temps_s": 1.0, "pic_memoire_mo": 10.0}}, chemin)
+    enregistrer_references({"b": {"temps_s": 2.0, "pic_memoire_mo": 20.0}}, chemin)
+    references = charger_references(chemin)
+    assert sorted(references) == ["a", "b"]
+
+    assert regressions({"temps_s": 1.2, "pic_memoire_mo": 10.0}, references["a"], seuil=1.3) == []
+    depassements = regressions({"temps_s": 1.5, "pic_memoire_mo": 30.0}, references["a"], seuil=1.3)
+    assert [d.split(" ")[0] for d in depassements] == ["temps_s", "pic_memoire_mo"]
+    assert charger_references(str(tmp_path / "absent.json")) == {}
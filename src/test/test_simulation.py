@@ -0,0 +1,40 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Ajoute le dossier 'src' au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.main.python.simulation import AgregatIndicateurs, simuler_replicats
+from src.main.python.conversion_df_brute import traitement_df_univ
+from src.main.python.algo_affectation_classement import generer_df_choix_etudiants_spe_compatible
+from src.test.donnees_test import generer_df_univ_brut
+
+
+def test_agregat_indicateurs():
+    agregat = AgregatIndicateurs()
+    for valeur in [1.0, 2.0, 3.0, 4.0]:
+        agregat.ajouter({"a": valeur, "b": np.nan})
+    resume = agregat.resume().set_index("indicateur")
+    assert list(resume.index) == ["a"]
+    assert resume.loc["a", "replicats"] == 4
+    assert resume.loc["a", "moyenne"] == 2.5
+    assert np.isclose(resume.loc["a", "ecart_type"], np.std([1, 2, 3, 4], ddof=1))
+    assert resume.loc["a", "ic95_bas"] < 2.5 < resume.loc["a", "ic95_haut"]
+
+
+def test_generation_reproductible_avec_graine():
+    df_univ = traitement_df_univ(generer_df_univ_brut(20, graine=1))
+    df_a = generer_df_choix_etudiants_spe_compatible(30, df_univ, graine=4)
+    df_b = generer_df_choix_etudiants_spe_compatible(30, df_univ, graine=4)
+    pd.testing.assert_frame_equal(df_a, df_b)
+
+
+def test_simulation_reproductible_quel_que_soit_le_nombre_de_processus():
+    df_univ = traitement_df_univ(generer_df_univ_brut(20, graine=1))
+    resume_seq = simuler_replicats(df_univ, 40, 6, graine=3, nb_processus=1).set_index("indicateur").sort_index()
+    resume_par = simuler_replicats(df_univ, 40, 6, graine=3, nb_processus=2).set_index("indicateur").sort_index()
+    assert (resume_seq["replicats"] == 6).all()
+    pd.testing.assert_frame_equal(resume_seq[["replicats"]], resume_par[["replicats"]])
+    np.testing.assert_allclose(resume_seq["moyenne"], resume_par["moyenne"])